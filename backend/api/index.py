@@ -1,4 +1,9 @@
 # Vercel serverless entry point for FastAPI
+import os
+
+# Short-lived instances shouldn't hold pooled connections between requests
+os.environ.setdefault("DB_POOL_ROLE", "serverless")
+
 from main import app
 
 # Export the FastAPI app for Vercel
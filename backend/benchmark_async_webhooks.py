@@ -0,0 +1,73 @@
+"""
+Load test the async webhook handlers.
+Fires concurrent Twilio transcription webhooks (a contact lookup plus a
+conversation insert, no LLM call) at a running API and reports throughput,
+latency percentiles and overlap: the summed request latency divided by wall
+time. Overlap near 1 means requests serialized on the event loop; near the
+concurrency means their DB waits ran side by side.
+
+Usage: python benchmark_async_webhooks.py [--url http://localhost:8000] [--phone +1...]
+                                          [--requests 500] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+
+async def post_transcription(client: httpx.AsyncClient, url: str, phone: str, n: int) -> float:
+    started = time.perf_counter()
+    response = await client.post(f"{url}/webhooks/twilio/transcription", data={
+        "From": phone,
+        "TranscriptionText": f"Load test message {n}",
+        "CallSid": f"CA{n:032d}",
+        "RecordingUrl": "",
+    })
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+async def run(url: str, phone: str, total: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(n: int) -> float:
+        async with semaphore:
+            return await post_transcription(client, url, phone, n)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(timeout=30, limits=limits) as client:
+        await one(-1)  # warm up the pool
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*[one(n) for n in range(total)])
+        wall = time.perf_counter() - started
+
+    latencies = sorted(latencies)
+    return {
+        "requests_per_sec": total / wall,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "p99_ms": latencies[int(len(latencies) * 0.99) - 1] * 1000,
+        "overlap": sum(latencies) / wall,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--phone", default="+10000000000",
+                        help="an existing contact's phone exercises the insert path too")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=50)
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args.url.rstrip("/"), args.phone, args.requests, args.concurrency))
+
+    print(f"{'req/sec':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'overlap':>10}")
+    print(f"{result['requests_per_sec']:>10.0f}{result['p50_ms']:>10.1f}{result['p95_ms']:>10.1f}"
+          f"{result['p99_ms']:>10.1f}{result['overlap']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
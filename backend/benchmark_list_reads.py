@@ -0,0 +1,112 @@
+"""
+Benchmark the list endpoint read paths.
+Compares ORM instances + Pydantic from_attributes against a Core select()
+of the response columns serialized with orjson, on a seeded in-memory
+SQLite database. Reports rows/sec and peak memory per page.
+
+Usage: python benchmark_list_reads.py [--rows 20000] [--page 1000] [--repeat 20]
+"""
+import os
+
+# config.Settings requires these; the benchmark never talks to them
+# (database.engine is created lazily and never connected)
+for _var in ("DATABASE_URL", "REDIS_URL", "TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN",
+             "TWILIO_PHONE_NUMBER", "OPENAI_API_KEY", "SECRET_KEY"):
+    os.environ.setdefault(_var, "sqlite:///benchmark.db" if _var == "DATABASE_URL" else "benchmark")
+
+import argparse
+import json
+import time
+import tracemalloc
+from typing import List
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from database import Base
+from models import Contact
+from schemas import ContactResponse
+from row_reads import select_columns, fetch_rows, rows_response
+
+
+def seed(session, rows: int):
+    session.bulk_insert_mappings(Contact, [
+        {
+            "sl_no": str(i),
+            "name": f"Member {i}",
+            "address": f"{i} Main St",
+            "city": "San Bernardino",
+            "state_zip": "CA 92408",
+            "phone": f"+1909{i:07d}",
+            "preferred_language": "bengali" if i % 3 else "english",
+            "active": True,
+        }
+        for i in range(rows)
+    ])
+    session.commit()
+
+
+def orm_page(session, page: int) -> bytes:
+    """Current path: ORM instances re-read by Pydantic, then json.dumps"""
+    contacts = session.query(Contact).filter(Contact.active == True).limit(page).all()
+    payload = [ContactResponse.model_validate(c).model_dump(mode="json") for c in contacts]
+    session.expunge_all()
+    return json.dumps(payload).encode("utf-8")
+
+
+def core_page(session, page: int) -> bytes:
+    """New path: Core select of response columns, orjson encoding"""
+    statement = select_columns(Contact, ContactResponse).filter(Contact.active == True).limit(page)
+    return rows_response(fetch_rows(session, statement)).body
+
+
+def measure(name: str, fn, session, page: int, repeat: int) -> dict:
+    fn(session, page)  # warm up statement cache
+
+    timings: List[float] = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(session, page)
+        timings.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    fn(session, page)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    best = min(timings)
+    return {
+        "path": name,
+        "ms_per_page": best * 1000,
+        "rows_per_sec": page / best,
+        "peak_kib_per_page": peak / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--page", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = create_engine("sqlite://", poolclass=StaticPool,
+                           connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    seed(session, args.rows)
+
+    results = [
+        measure("orm+pydantic", orm_page, session, args.page, args.repeat),
+        measure("core+orjson", core_page, session, args.page, args.repeat),
+    ]
+
+    print(f"{'path':<14}{'ms/page':>10}{'rows/sec':>12}{'peak KiB':>10}")
+    for r in results:
+        print(f"{r['path']:<14}{r['ms_per_page']:>10.2f}{r['rows_per_sec']:>12.0f}{r['peak_kib_per_page']:>10.0f}")
+    print(f"speedup: {results[0]['ms_per_page'] / results[1]['ms_per_page']:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
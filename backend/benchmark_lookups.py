@@ -0,0 +1,179 @@
+"""
+Benchmark the hot per-contact and per-call lookups.
+Seeds realistic volumes (1M conversations by default), then times the
+lookups every inbound SMS, LLM route and voice webhook makes, checks each
+query plan uses its index and fails if any p99 exceeds --max-ms. Uses an
+in-memory SQLite database unless --url is given; point --url only at a
+scratch PostgreSQL database, since the benchmark creates and fills tables.
+
+Usage: python benchmark_lookups.py [--url postgresql://...] [--conversations 1000000]
+                                   [--repeat 500] [--max-ms 5] [--compare]
+"""
+import os
+
+# config.Settings requires these; the benchmark never talks to them
+for _var in ("DATABASE_URL", "REDIS_URL", "TWILIO_ACCOUNT_SID", "TWILIO_AUTH_TOKEN",
+             "TWILIO_PHONE_NUMBER", "OPENAI_API_KEY", "SECRET_KEY"):
+    os.environ.setdefault(_var, "sqlite:///benchmark.db" if _var == "DATABASE_URL" else "benchmark")
+
+import argparse
+import json
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import create_engine, insert, select, text
+from sqlalchemy.pool import StaticPool
+
+from database import Base
+from models import Contact, Conversation, ConversationHistory, CallLog, Message, MessageStatus, MessageType
+
+BATCH = 50000
+NEW_INDEXES = (
+    (Conversation, "ix_conversations_contact_id_timestamp"),
+    (ConversationHistory, "ix_conversation_history_call_log_id_id"),
+    (CallLog, "ix_call_logs_twilio_call_sid"),
+)
+
+
+def insert_batched(conn, table, rows):
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH:
+            conn.execute(insert(table), batch)
+            batch = []
+    if batch:
+        conn.execute(insert(table), batch)
+
+
+def seed(engine, contacts: int, conversations: int, calls: int, turns: int, messages: int):
+    rng = random.Random(42)
+    now = datetime.now(timezone.utc)
+
+    def moment():
+        return now - timedelta(seconds=rng.randint(0, 2 * 365 * 86400))
+
+    started = time.perf_counter()
+    with engine.begin() as conn:
+        insert_batched(conn, Contact.__table__, (
+            {"id": i, "sl_no": str(i), "name": f"Member {i}", "phone": f"+1909{i:07d}", "active": True}
+            for i in range(1, contacts + 1)
+        ))
+        insert_batched(conn, Conversation.__table__, (
+            {
+                "contact_id": rng.randint(1, contacts),
+                "direction": "inbound" if i % 2 else "outbound",
+                "message": "Please pray for my family this week",
+                "timestamp": moment(),
+            }
+            for i in range(conversations)
+        ))
+        insert_batched(conn, CallLog.__table__, (
+            {"id": i, "contact_id": rng.randint(1, contacts), "caller_phone": "+19095550100",
+             "direction": "outbound", "twilio_call_sid": f"CA{i:032x}", "created_at": moment()}
+            for i in range(1, calls + 1)
+        ))
+        insert_batched(conn, ConversationHistory.__table__, (
+            {"call_log_id": call_id, "role": "user" if turn % 2 else "assistant", "content": "Amen"}
+            for call_id in range(1, calls + 1) for turn in range(turns)
+        ))
+        insert_batched(conn, Message.__table__, (
+            {"contact_id": rng.randint(1, contacts), "message_type": MessageType.SMS.name,
+             "content": "Sunday service at 10am", "status": MessageStatus.DELIVERED.name,
+             "twilio_sid": f"SM{i:032x}", "created_at": moment()}
+            for i in range(messages)
+        ))
+    if engine.dialect.name == "postgresql":
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("ANALYZE"))
+    print(f"seeded in {time.perf_counter() - started:.0f}s")
+
+
+def lookups(args):
+    """(name, index the plan must use, statement factory) for each hot path"""
+    return [
+        ("conversation window", "ix_conversations_contact_id_timestamp",
+         lambda rng: select(Conversation).where(Conversation.contact_id == rng.randint(1, args.contacts))
+         .order_by(Conversation.timestamp.desc()).limit(10)),
+        ("call turns", "ix_conversation_history_call_log_id_id",
+         lambda rng: select(ConversationHistory).where(ConversationHistory.call_log_id == rng.randint(1, args.calls))
+         .order_by(ConversationHistory.id)),
+        ("call by sid", "ix_call_logs_twilio_call_sid",
+         lambda rng: select(CallLog).where(CallLog.twilio_call_sid == f"CA{rng.randint(1, args.calls):032x}")),
+        ("contact messages", "ix_messages_contact_id_id",
+         lambda rng: select(Message.id).where(Message.contact_id == rng.randint(1, args.contacts))
+         .order_by(Message.id.desc()).limit(50)),
+        ("message by sid", "ix_messages_twilio_sid",
+         lambda rng: select(Message.id).where(Message.twilio_sid == f"SM{rng.randrange(args.messages):032x}")),
+    ]
+
+
+def plan_indexes(conn, statement) -> str:
+    """The query plan as text, for matching index names"""
+    sql = str(statement.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    if conn.dialect.name == "postgresql":
+        return json.dumps(conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar())
+    return " ".join(row[-1] for row in conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}"))
+
+
+def measure(engine, args, check_plans: bool) -> bool:
+    ok = True
+    rng = random.Random(7)
+    print(f"{'lookup':<22}{'p50 ms':>9}{'p99 ms':>9}{'max ms':>9}  plan")
+    with engine.connect() as conn:
+        for name, index, make in lookups(args):
+            conn.execute(make(rng)).all()  # warm up
+            timings = []
+            for _ in range(args.repeat):
+                statement = make(rng)
+                started = time.perf_counter()
+                conn.execute(statement).all()
+                timings.append((time.perf_counter() - started) * 1000)
+            timings.sort()
+            p50, p99 = timings[len(timings) // 2], timings[int(len(timings) * 0.99) - 1]
+            verdict = ""
+            if check_plans:
+                uses_index = index in plan_indexes(conn, make(rng))
+                verdict = f"uses {index}" if uses_index else f"NOT using {index}"
+                ok = ok and uses_index and p99 <= args.max_ms
+            print(f"{name:<22}{p50:>9.3f}{p99:>9.3f}{timings[-1]:>9.3f}  {verdict}")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--url", help="scratch database; default in-memory SQLite")
+    parser.add_argument("--contacts", type=int, default=20000)
+    parser.add_argument("--conversations", type=int, default=1000000)
+    parser.add_argument("--calls", type=int, default=50000)
+    parser.add_argument("--turns", type=int, default=10, help="conversation_history rows per call")
+    parser.add_argument("--messages", type=int, default=500000)
+    parser.add_argument("--repeat", type=int, default=500)
+    parser.add_argument("--max-ms", type=float, default=5.0, help="fail if any lookup's p99 is slower")
+    parser.add_argument("--compare", action="store_true", help="re-run without the new indexes")
+    args = parser.parse_args()
+
+    if args.url:
+        engine = create_engine(args.url)
+    else:
+        engine = create_engine("sqlite://", poolclass=StaticPool,
+                               connect_args={"check_same_thread": False})
+    Base.metadata.create_all(bind=engine)
+    seed(engine, args.contacts, args.conversations, args.calls, args.turns, args.messages)
+
+    ok = measure(engine, args, check_plans=True)
+
+    if args.compare:
+        for model, name in NEW_INDEXES:
+            next(i for i in model.__table__.indexes if i.name == name).drop(bind=engine)
+        print("\nwithout the new indexes:")
+        measure(engine, args, check_plans=False)
+
+    print("PASS" if ok else f"FAIL: a lookup missed its index or exceeded {args.max_ms}ms at p99")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
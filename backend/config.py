@@ -5,6 +5,25 @@ from typing import List
 class Settings(BaseSettings):
     # Database
     DATABASE_URL: str
+    READ_REPLICA_URL: str = ""  # optional streaming replica for read-only routes
+    READ_REPLICA_MAX_LAG: float = 5.0  # seconds; a replica further behind is bypassed
+    READ_REPLICA_LAG_CHECK_INTERVAL: float = 5.0  # seconds between replica lag checks per process
+    READ_YOUR_WRITES_WINDOW: float = 10.0  # seconds a client's reads stay on the primary after it writes
+    
+    # Connection pools, sized per process role. DB_POOL_ROLE is "api",
+    # "worker" (Celery, beat, outbox relay) or "serverless" (api/index.py).
+    # Each process holds up to size + overflow connections per engine, so
+    # keep the total across processes under Postgres max_connections.
+    DB_POOL_ROLE: str = "api"
+    DB_POOL_SIZE_API: int = 10
+    DB_MAX_OVERFLOW_API: int = 20
+    DB_POOL_SIZE_WORKER: int = 1  # prefork children run one task at a time
+    DB_MAX_OVERFLOW_WORKER: int = 2
+    DB_POOL_SIZE_SERVERLESS: int = 0  # 0 disables pooling: one connection per request
+    DB_MAX_OVERFLOW_SERVERLESS: int = 0
+    DB_POOL_TIMEOUT: float = 30.0  # seconds a checkout waits before failing
+    DB_POOL_RECYCLE: int = 1800  # seconds before a pooled connection is replaced
+    DB_PGBOUNCER: bool = False  # behind PgBouncer transaction pooling: no local pool, no prepared statements
     
     # Redis
     REDIS_URL: str
@@ -24,6 +43,67 @@ class Settings(BaseSettings):
     DEBUG: bool = False
     ALLOWED_ORIGINS: str = "https://gpbc-contact-beryl.vercel.app,http://localhost:3000,http://localhost:5173"
     
+    # Scheduling
+    CHURCH_TIMEZONE: str = "America/Los_Angeles"
+    FANOUT_BATCH_SIZE: int = 500  # recipients per insert/commit when expanding a broadcast
+    SEND_CHUNK_SIZE: int = 50  # messages per send_sms_batch_task
+    SCHEDULED_RELEASE_INTERVAL: float = 15.0  # seconds between scheduled-message release ticks
+    SCHEDULED_RELEASE_BATCH: int = 500  # most scheduled messages released per tick
+    
+    # Celery workers; per-queue concurrency is set on each worker's command line
+    CELERY_PREFETCH_MULTIPLIER: int = 1  # with acks_late, a slow send doesn't hold other tasks back
+    CELERY_RESULT_EXPIRES: int = 3600  # seconds kept for tasks that store results
+    
+    # Outbox relay (publishes outbox_events to Celery)
+    OUTBOX_RELAY_BATCH: int = 500  # events published per relay transaction
+    OUTBOX_POLL_INTERVAL: float = 0.5  # seconds the relay process sleeps when the outbox is empty
+    OUTBOX_SWEEP_INTERVAL: float = 10.0  # seconds between beat sweeps, a backstop for the relay process
+    
+    # Send retries for transient provider errors (429, 5xx, timeouts)
+    SEND_MAX_RETRIES: int = 5  # then the message is dead-lettered
+    SEND_RETRY_BACKOFF: int = 5  # seconds before the first retry, doubled each time, with jitter
+    SEND_RETRY_BACKOFF_MAX: int = 600
+    
+    # SMS delivery status callbacks
+    STATUS_FLUSH_INTERVAL: float = 5.0  # seconds between bulk applications of buffered callbacks
+    STATUS_FLUSH_BATCH: int = 5000  # most callbacks drained per flush
+    STATUS_UNMATCHED_TTL: int = 600  # seconds to keep retrying callbacks whose sid isn't stored yet
+    
+    # Send window (quiet hours), in each recipient's local time
+    SEND_WINDOW_ENABLED: bool = True
+    SEND_WINDOW_START: str = "08:00"
+    SEND_WINDOW_END: str = "21:00"
+    SEND_WINDOW_SPREAD_MINUTES: int = 30  # stagger deferred sends after the window opens
+    
+    # Dashboard statistics
+    STATISTICS_CACHE_SECONDS: float = 5.0  # per-process cache of /api/statistics
+    
+    # Analytics rollups (analytics_hourly / analytics_daily)
+    ANALYTICS_ROLLUP_INTERVAL: float = 300.0  # seconds between rollup_analytics runs
+    ANALYTICS_SETTLE_HOURS: int = 6  # recent hours recomputed each run, for late delivery callbacks
+    ANALYTICS_MAX_HOURS_PER_RUN: int = 168  # backfill pace on first run or after downtime
+    ANALYTICS_MAX_BUCKETS: int = 2000  # most buckets one timeseries request may ask for
+    
+    # Monthly partitions and archival of messages, conversations and conversation_history
+    PARTITION_MONTHS_AHEAD: int = 3  # future months' partitions kept ready (PostgreSQL)
+    ARCHIVE_AFTER_MONTHS: int = 0  # archive whole months older than this; 0 keeps everything
+    ARCHIVE_DIR: str = "archive"  # gzip NDJSON files, one per table and month
+    ARCHIVE_INTERVAL: float = 86400.0  # seconds between archive_history runs
+    ARCHIVE_BATCH_SIZE: int = 5000  # rows streamed per fetch while exporting
+    ARCHIVE_LOCK_TIMEOUT: float = 5.0  # seconds a partition detach waits for its lock before retrying next run
+    
+    # Per-contact conversation window in Redis, the history prompts are built from
+    CONVERSATION_WINDOW_SIZE: int = 10  # most recent turns kept per contact
+    CONVERSATION_WINDOW_TTL: int = 86400  # seconds an idle contact's window is kept
+    CONVERSATION_WINDOW_REDIS_TIMEOUT: float = 0.5  # seconds to connect or answer before falling back
+    
+    # Contact search
+    CONTACT_SEARCH_BUDGET_MS: int = 200
+    
+    # Phone -> contact lookups for inbound webhooks, cached per process
+    CONTACT_LOOKUP_CACHE_SIZE: int = 10000  # most phone numbers kept
+    CONTACT_LOOKUP_TTL: float = 60.0  # seconds before another worker's contact writes show up
+    
     # URLs
     BACKEND_URL: str = "https://gpbc-backend.up.railway.app"
     FRONTEND_URL: str = "https://gpbc-contact-beryl.vercel.app"
@@ -1,19 +1,107 @@
-from sqlalchemy import create_engine
+from fastapi import Request
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from config import settings
+from pool_metrics import InstrumentedQueuePool, InstrumentedAsyncPool, pool_status
+from uuid import uuid4
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Pool size and max overflow per DB_POOL_ROLE
+POOL_ROLES = {
+    "api": (settings.DB_POOL_SIZE_API, settings.DB_MAX_OVERFLOW_API),
+    "worker": (settings.DB_POOL_SIZE_WORKER, settings.DB_MAX_OVERFLOW_WORKER),
+    "serverless": (settings.DB_POOL_SIZE_SERVERLESS, settings.DB_MAX_OVERFLOW_SERVERLESS),
+}
+
+
+def _pool_options(is_async: bool = False) -> dict:
+    """Pool arguments for this process's role; NullPool behind PgBouncer or when sized 0"""
+    if settings.DB_POOL_ROLE not in POOL_ROLES:
+        raise ValueError(f"DB_POOL_ROLE must be one of {', '.join(POOL_ROLES)}")
+    size, overflow = POOL_ROLES[settings.DB_POOL_ROLE]
+    if settings.DB_PGBOUNCER or size <= 0:
+        return {"poolclass": NullPool}
+    return {
+        "poolclass": InstrumentedAsyncPool if is_async else InstrumentedQueuePool,
+        "pool_size": size,
+        "max_overflow": overflow,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+    }
+
+
+def _create_engine(url: str):
+    return create_engine(url, pool_pre_ping=True, **_pool_options())
+
 
 # Create database engine
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=10,
-    max_overflow=20
-)
+engine = _create_engine(settings.DATABASE_URL)
 
 # Create session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+
+def _async_url(url: str):
+    """The same database through its asyncio driver: asyncpg, or aiosqlite for SQLite"""
+    url = make_url(url)
+    connect_args = {}
+    if url.get_backend_name() == "postgresql":
+        # asyncpg takes ssl as a connect argument, not libpq's sslmode
+        sslmode = url.query.get("sslmode")
+        if sslmode:
+            connect_args["ssl"] = sslmode
+        if settings.DB_PGBOUNCER:
+            # Transaction pooling hands each transaction any server connection,
+            # so statements can't be prepared once and reused by name
+            connect_args.update(
+                statement_cache_size=0,
+                prepared_statement_cache_size=0,
+                prepared_statement_name_func=lambda: f"__asyncpg_{uuid4()}__",
+            )
+        url = url.set(drivername="postgresql+asyncpg").difference_update_query(["sslmode"])
+    elif url.get_backend_name() == "sqlite":
+        url = url.set(drivername="sqlite+aiosqlite")
+    return url, connect_args
+
+
+def _create_async_engine(url: str):
+    async_url, connect_args = _async_url(url)
+    return create_async_engine(
+        async_url,
+        connect_args=connect_args,
+        pool_pre_ping=True,
+        **(_pool_options(is_async=True) if async_url.get_backend_name() != "sqlite" else {})
+    )
+
+
+# Async engine for async route handlers, so DB waits don't block the event loop
+async_engine = _create_async_engine(settings.DATABASE_URL)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+# Read replica for dashboard reads; without one, reads use the primary engines
+if settings.READ_REPLICA_URL:
+    read_engine = _create_engine(settings.READ_REPLICA_URL)
+    async_read_engine = _create_async_engine(settings.READ_REPLICA_URL)
+else:
+    read_engine, async_read_engine = engine, async_engine
+
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
+AsyncReadSessionLocal = async_sessionmaker(
+    async_read_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
+# Writes return this header; clients echo it so their next reads see the write
+READ_PRIMARY_HEADER = "X-Read-Primary-Until"
+
 # Create base class for models
 Base = declarative_base()
 
@@ -25,3 +113,97 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Dependency for async handlers
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+# ==================== Read Replica Routing ====================
+
+_replica = {"checked_at": float("-inf"), "usable": False}
+
+
+def replica_enabled() -> bool:
+    return read_engine is not engine
+
+
+def _replica_lag() -> float:
+    """Seconds the replica is behind the primary; infinite if it can't be asked"""
+    if read_engine.dialect.name != "postgresql":
+        return 0.0
+    try:
+        with read_engine.connect() as conn:
+            # An idle primary leaves the last replay timestamp old; caught up means no lag
+            lag = conn.execute(text(
+                "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+                "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+            )).scalar()
+        return float(lag or 0)
+    except Exception as e:
+        logger.warning(f"Read replica lag check failed: {str(e)}")
+        return float("inf")
+
+
+def _lag_check_due() -> bool:
+    return time.monotonic() - _replica["checked_at"] >= settings.READ_REPLICA_LAG_CHECK_INTERVAL
+
+
+def _check_replica():
+    lag = _replica_lag()
+    usable = lag <= settings.READ_REPLICA_MAX_LAG
+    if usable and not _replica["usable"]:
+        logger.info(f"Read replica in use (lag {lag:.1f}s)")
+    elif _replica["usable"] and not usable:
+        logger.warning(f"Read replica bypassed, lag {lag:.1f}s exceeds {settings.READ_REPLICA_MAX_LAG}s")
+    _replica.update(checked_at=time.monotonic(), usable=usable)
+
+
+def _wrote_recently(request: Request) -> bool:
+    try:
+        return float(request.headers.get(READ_PRIMARY_HEADER, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def read_primary_until() -> str:
+    """Value of READ_PRIMARY_HEADER for a response to a write"""
+    return f"{time.time() + settings.READ_YOUR_WRITES_WINDOW:.3f}"
+
+
+def _use_replica(request: Request) -> bool:
+    return replica_enabled() and not _wrote_recently(request) and _replica["usable"]
+
+
+# Dependency for read-only routes: the replica unless it lags or the client just wrote
+def get_read_db(request: Request):
+    if replica_enabled() and _lag_check_due():
+        _check_replica()
+    db = ReadSessionLocal() if _use_replica(request) else SessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+# Async variant of get_read_db
+async def get_async_read_db(request: Request):
+    if replica_enabled() and _lag_check_due():
+        await run_in_threadpool(_check_replica)
+    factory = AsyncReadSessionLocal if _use_replica(request) else AsyncSessionLocal
+    async with factory() as db:
+        yield db
+
+
+def pool_report() -> dict:
+    """Pool status of every engine this process uses"""
+    engines = {"primary": engine, "primary_async": async_engine}
+    if replica_enabled():
+        engines.update(replica=read_engine, replica_async=async_read_engine)
+    return {
+        "role": settings.DB_POOL_ROLE,
+        "pgbouncer": settings.DB_PGBOUNCER,
+        "engines": {name: pool_status(e) for name, e in engines.items()},
+    }
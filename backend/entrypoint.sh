@@ -15,5 +15,23 @@ fi
 
 echo "✅ Environment check passed!"
 echo ""
-echo "🔥 Starting uvicorn server on port ${PORT:-8000}..."
-exec uvicorn main:app --host 0.0.0.0 --port ${PORT:-8000}
+
+# One image, several Railway services: set SERVICE_ROLE on each
+case "${SERVICE_ROLE:-api}" in
+    worker)
+        echo "🔥 Starting Celery worker..."
+        exec celery -A tasks.celery_app worker -Q interactive,scheduler,voice,bulk --loglevel=info
+        ;;
+    beat)
+        echo "🔥 Starting Celery beat..."
+        exec celery -A tasks.celery_app beat --loglevel=info
+        ;;
+    outbox_relay)
+        echo "🔥 Starting outbox relay..."
+        exec python outbox_relay.py
+        ;;
+    *)
+        echo "🔥 Starting uvicorn server on port ${PORT:-8000}..."
+        exec uvicorn main:app --host 0.0.0.0 --port ${PORT:-8000}
+        ;;
+esac
@@ -0,0 +1,61 @@
+"""
+HTTP caching for list endpoints.
+Each cached table has a version counter in `table_versions`, bumped in the
+same transaction as every write. ETags are derived from the version and the
+request's query string, so If-None-Match is answered from one primary-key
+lookup without touching the rows.
+"""
+from fastapi import Request
+from fastapi.responses import Response
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from models import TableVersion
+from typing import Optional
+import hashlib
+import json
+
+CONTACTS = "contacts"
+REMINDERS = "scheduled_reminders"
+
+
+def bump_version(db: Session, table: str):
+    """Invalidate cached responses for `table`; commit with the write itself.
+    One upsert, so concurrent first writes to a table don't race to insert its row."""
+    dialect = postgresql if db.get_bind().dialect.name == "postgresql" else sqlite
+    db.execute(
+        dialect.insert(TableVersion).values(table_name=table, version=1).on_conflict_do_update(
+            index_elements=[TableVersion.table_name],
+            set_={"version": TableVersion.version + 1}
+        )
+    )
+
+
+def get_version(db: Session, table: str) -> int:
+    row = db.query(TableVersion.version).filter(TableVersion.table_name == table).first()
+    return row.version if row else 0
+
+
+def versioned_etag(request: Request, db: Session, table: str) -> str:
+    """Strong ETag for a list of `table` rows filtered by the query string"""
+    query = str(sorted(request.query_params.multi_items())).encode("utf-8")
+    digest = hashlib.sha1(query).hexdigest()[:12]
+    return f'"{table}.{get_version(db, table)}.{digest}"'
+
+
+def content_etag(payload) -> str:
+    """Strong ETag for an already-computed JSON payload"""
+    raw = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return f'"{hashlib.sha1(raw).hexdigest()[:16]}"'
+
+
+def not_modified(request: Request, etag: str) -> Optional[Response]:
+    """304 response if the client already holds `etag`, else None"""
+    candidates = [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
+
+
+def cache_headers(etag: str) -> dict:
+    # no-cache: browsers keep the body but revalidate on every navigation
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
@@ -1,24 +1,52 @@
 from fastapi import FastAPI, Depends, HTTPException, UploadFile, File, Form, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import Response
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import Response, JSONResponse
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select, insert
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
+from datetime import datetime, timezone
 import pandas as pd
 import io
 import logging
+import re
 
 from config import settings
-from database import engine, get_db, Base
+from database import (
+    engine, get_db, get_async_db, get_read_db, Base,
+    READ_PRIMARY_HEADER, replica_enabled, read_primary_until, pool_report
+)
 from models import Contact, Message, CallLog, ScheduledReminder, MessageStatus, ConversationHistory, Conversation
 from schemas import (
-    ContactCreate, ContactResponse, ContactUpdate,
+    ContactCreate, ContactResponse, ContactUpdate, ContactSearchResponse,
     MessageCreate, MessageResponse,
     ScheduledReminderCreate, ScheduledReminderResponse,
     CallLogResponse, VoiceCallRequest, StatisticsResponse
 )
 from services.twilio_service import twilio_service
 from services.llm_service import llm_service
-from tasks import send_sms_task, make_call_task
+from services.contact_search import contact_search
+from services.contact_lookup import contact_lookup
+from services.segment_service import segment_service
+from services.campaign_service import campaign_service
+from services.delivery_status import delivery_status
+from services.statistics_service import statistics_service
+from services.conversation_window import conversation_window, turn
+from services.reminder_scheduler import next_run_for, as_utc
+from services.send_window import contact_timezone, release_time, is_valid_timezone
+from tasks import make_call_task, celery_app
+from outbox import enqueue_sends, publish_now
+from phones import normalize_phone
+from pool_metrics import worker_reports
+from pagination import NEXT_CURSOR_HEADER, encode_cursor, apply_cursor
+from row_reads import select_columns, fetch_rows, rows_response
+from http_cache import (
+    CONTACTS, REMINDERS, bump_version, versioned_etag, content_etag,
+    not_modified, cache_headers
+)
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -51,6 +79,38 @@ except ImportError as e:
     WEBHOOK_ROUTES_AVAILABLE = False
     logger.warning(f"Webhook routes not available: {e}")
 
+# Import segment routes
+try:
+    from routes.segment_routes import router as segment_router
+    SEGMENT_ROUTES_AVAILABLE = True
+except ImportError as e:
+    SEGMENT_ROUTES_AVAILABLE = False
+    logger.warning(f"Segment routes not available: {e}")
+
+# Import campaign routes
+try:
+    from routes.campaign_routes import router as campaign_router
+    CAMPAIGN_ROUTES_AVAILABLE = True
+except ImportError as e:
+    CAMPAIGN_ROUTES_AVAILABLE = False
+    logger.warning(f"Campaign routes not available: {e}")
+
+# Import dead-letter admin routes
+try:
+    from routes.dead_letter_routes import router as dead_letter_router
+    DEAD_LETTER_ROUTES_AVAILABLE = True
+except ImportError as e:
+    DEAD_LETTER_ROUTES_AVAILABLE = False
+    logger.warning(f"Dead-letter routes not available: {e}")
+
+# Import analytics routes
+try:
+    from routes.analytics_routes import router as analytics_router
+    ANALYTICS_ROUTES_AVAILABLE = True
+except ImportError as e:
+    ANALYTICS_ROUTES_AVAILABLE = False
+    logger.warning(f"Analytics routes not available: {e}")
+
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
@@ -68,8 +128,22 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER, READ_PRIMARY_HEADER],
 )
 
+# Compress list responses (1,000 contacts is ~250KB of JSON)
+app.add_middleware(GZipMiddleware, minimum_size=1000)
+
+
+@app.middleware("http")
+async def pin_reads_after_writes(request: Request, call_next):
+    """Tell clients to read from the primary for a while after they write,
+    so a replica that hasn't caught up can't hide their own changes"""
+    response = await call_next(request)
+    if replica_enabled() and request.method not in ("GET", "HEAD", "OPTIONS") and response.status_code < 400:
+        response.headers[READ_PRIMARY_HEADER] = read_primary_until()
+    return response
+
 # Include authentication routes if available
 if AUTH_AVAILABLE:
     app.include_router(auth_router)
@@ -85,6 +159,26 @@ if WEBHOOK_ROUTES_AVAILABLE:
     app.include_router(webhook_router)
     logger.info("✅ Twilio webhook routes enabled")
 
+# Include segment routes if available
+if SEGMENT_ROUTES_AVAILABLE:
+    app.include_router(segment_router)
+    logger.info("✅ Contact segment routes enabled")
+
+# Include campaign routes if available
+if CAMPAIGN_ROUTES_AVAILABLE:
+    app.include_router(campaign_router)
+    logger.info("✅ Campaign routes enabled")
+
+# Include dead-letter admin routes if available
+if DEAD_LETTER_ROUTES_AVAILABLE:
+    app.include_router(dead_letter_router)
+    logger.info("✅ Dead-letter admin routes enabled")
+
+# Include analytics routes if available
+if ANALYTICS_ROUTES_AVAILABLE:
+    app.include_router(analytics_router)
+    logger.info("✅ Analytics routes enabled")
+
 
 # ==================== Health Check ====================
 
@@ -102,44 +196,133 @@ def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/health/db")
+def database_pool_health():
+    """Connection pool usage: checked out, overflow, checkout waits and timeouts,
+    for this API process and each recently active Celery worker process"""
+    return {"api": pool_report(), "workers": worker_reports()}
+
+
 # ==================== Contact Management ====================
 
+def ensure_phone_available(db: Session, phone: str, contact_id: Optional[int] = None):
+    """409 if another active contact already has this number (in any formatting)"""
+    normalized = normalize_phone(phone)
+    if normalized is None:
+        raise HTTPException(status_code=400, detail="Phone number has no digits")
+    query = db.query(Contact.id).filter(Contact.phone_normalized == normalized, Contact.active == True)
+    if contact_id is not None:
+        query = query.filter(Contact.id != contact_id)
+    if query.first():
+        raise HTTPException(status_code=409, detail=f"Another contact already has phone {normalized}")
+
+
+def violated_contact_column(error: IntegrityError) -> Optional[str]:
+    """The contacts column whose unique index `error` violated, if known"""
+    constraint = getattr(getattr(error.orig, "diag", None), "constraint_name", None)
+    if constraint:  # PostgreSQL names the index
+        for index in Contact.__table__.indexes:
+            if index.name == constraint:
+                return next(iter(index.columns)).name
+        return None
+    match = re.search(r"contacts\.(\w+)", str(error.orig))  # SQLite names the column
+    return match.group(1) if match else None
+
+
+def contact_conflict(error: IntegrityError) -> HTTPException:
+    """409 when the number is taken (retrying may help), 400 naming the field otherwise"""
+    column = violated_contact_column(error)
+    if column == "phone_normalized":
+        return HTTPException(status_code=409, detail="Another contact already has this phone number")
+    return HTTPException(status_code=400, detail=f"Duplicate or invalid {column or 'contact'} value")
+
+
+def flush_contact(db: Session):
+    """Flush a contact write; 409 if a concurrent write took the number after ensure_phone_available"""
+    try:
+        db.flush()
+    except IntegrityError as e:
+        db.rollback()
+        raise contact_conflict(e)
+
+
 @app.post("/api/contacts", response_model=ContactResponse)
 def create_contact(contact: ContactCreate, db: Session = Depends(get_db)):
     """Create a new contact"""
+    if contact.timezone and not is_valid_timezone(contact.timezone):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {contact.timezone}")
+    ensure_phone_available(db, contact.phone)
+    
     db_contact = Contact(**contact.dict())
     db.add(db_contact)
+    flush_contact(db)
+    segment_service.refresh_contact(db, db_contact)
+    bump_version(db, CONTACTS)
     db.commit()
     db.refresh(db_contact)
+    contact_search.invalidate()
+    contact_lookup.invalidate()
+    statistics_service.invalidate()
     return db_contact
 
 
 @app.get("/api/contacts", response_model=List[ContactResponse])
 def list_contacts(
+    request: Request,
     skip: int = 0,
     limit: int = 1000,
     active_only: bool = True,
     search: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    """List all contacts with optional filtering"""
-    query = db.query(Contact)
-    
-    if active_only:
-        query = query.filter(Contact.active == True)
+    """List all contacts with optional filtering.
+    Pass the X-Next-Cursor header back as `cursor` to fetch the next page."""
+    etag = versioned_etag(request, db, CONTACTS)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     
     if search:
-        query = query.filter(
-            (Contact.name.ilike(f"%{search}%")) |
-            (Contact.phone.ilike(f"%{search}%"))
-        )
+        # Ranked results are a single page; cursors don't apply
+        result = contact_search.search(db, search, limit=limit, active_only=active_only)
+        response = rows_response([ContactResponse.model_validate(c).model_dump() for c in result["contacts"]])
+    else:
+        query = select_columns(Contact, ContactResponse)
+        
+        if active_only:
+            query = query.filter(Contact.active == True)
+        
+        query = apply_cursor(query, Contact, cursor)
+        if not cursor:
+            query = query.offset(skip)
+        
+        contacts = fetch_rows(db, query.limit(limit))
+        next_cursor = encode_cursor(contacts[-1]["id"]) if len(contacts) == limit else None
+        response = rows_response(contacts, next_cursor)
     
-    contacts = query.offset(skip).limit(limit).all()
-    return contacts
+    response.headers.update(cache_headers(etag))
+    return response
+
+
+@app.get("/api/contacts/search", response_model=ContactSearchResponse)
+def search_contacts(
+    q: str,
+    limit: int = 50,
+    active_only: bool = True,
+    db: Session = Depends(get_read_db)
+):
+    """Ranked substring search on name and phone digits"""
+    result = contact_search.search(db, q, limit=limit, active_only=active_only)
+    return {
+        "results": result["contacts"],
+        "took_ms": result["took_ms"],
+        "truncated": result["truncated"]
+    }
 
 
 @app.get("/api/contacts/{contact_id}", response_model=ContactResponse)
-def get_contact(contact_id: int, db: Session = Depends(get_db)):
+def get_contact(contact_id: int, db: Session = Depends(get_read_db)):
     """Get a specific contact"""
     contact = db.query(Contact).filter(Contact.id == contact_id).first()
     if not contact:
@@ -153,12 +336,27 @@ def update_contact(contact_id: int, contact_update: ContactUpdate, db: Session =
     contact = db.query(Contact).filter(Contact.id == contact_id).first()
     if not contact:
         raise HTTPException(status_code=404, detail="Contact not found")
+    if contact_update.timezone and not is_valid_timezone(contact_update.timezone):
+        raise HTTPException(status_code=400, detail=f"Unknown timezone: {contact_update.timezone}")
+    # Numbers are unique among active contacts, so reactivating checks too
+    reactivating = contact_update.active and not contact.active
+    if contact_update.phone is not None or reactivating:
+        active = contact.active if contact_update.active is None else contact_update.active
+        phone = contact.phone if contact_update.phone is None else contact_update.phone
+        if active:
+            ensure_phone_available(db, phone, contact_id)
     
     for key, value in contact_update.dict(exclude_unset=True).items():
         setattr(contact, key, value)
+    flush_contact(db)
     
+    segment_service.refresh_contact(db, contact)
+    bump_version(db, CONTACTS)
     db.commit()
     db.refresh(contact)
+    contact_search.invalidate()
+    contact_lookup.invalidate()
+    statistics_service.invalidate()
     return contact
 
 
@@ -170,31 +368,28 @@ def delete_contact(contact_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Contact not found")
     
     contact.active = False
+    segment_service.refresh_contact(db, contact)
+    bump_version(db, CONTACTS)
     db.commit()
+    contact_search.invalidate()
+    contact_lookup.invalidate()
+    statistics_service.invalidate()
     return {"message": "Contact deactivated successfully"}
 
 
 @app.post("/api/contacts/import")
 async def import_contacts(file: UploadFile = File(...), db: Session = Depends(get_db)):
     """Import contacts from CSV file"""
-    import re
-    
-    def clean_phone(phone):
-        """Convert phone to E.164 format"""
-        digits = re.sub(r'\D', '', str(phone))
-        if len(digits) == 10:
-            return f"+1{digits}"
-        elif len(digits) == 11 and digits[0] == '1':
-            return f"+{digits}"
-        elif len(digits) == 7:
-            return f"+1909{digits}"  # Add 909 area code for 7-digit numbers
-        return f"+{digits}"
-    
     try:
         contents = await file.read()
         df = pd.read_csv(io.StringIO(contents.decode('utf-8')))
         
         imported_count = 0
+        known_phones = {
+            phone for (phone,) in db.query(Contact.phone_normalized).filter(
+                Contact.phone_normalized.isnot(None), Contact.active == True
+            )
+        }
         errors = []
         
         # Detect CSV format based on column names
@@ -259,13 +454,20 @@ async def import_contacts(file: UploadFile = File(...), db: Session = Depends(ge
                         address=row.get('Address', '').strip() if not pd.isna(row.get('Address')) else None,
                         city=row.get('City', '').strip() if not pd.isna(row.get('City')) else None,
                         state_zip=row.get('StateZip', '').strip() if not pd.isna(row.get('StateZip')) else None,
-                        phone=clean_phone(row[phone_col]),
+                        phone=normalize_phone(row[phone_col]),
                         preferred_language='bengali',
                         active=True
                     )
                 else:
                     raise ValueError("Unsupported CSV format. Please ensure CSV has either 'Phone_E164' or 'Tel.Nos.' column")
                 
+                # One contact per number, across the file and the existing contacts
+                if contact.phone_normalized is None:
+                    raise ValueError(f"Phone number has no digits: {row[phone_col]}")
+                if contact.phone_normalized in known_phones:
+                    raise ValueError(f"Duplicate phone number {contact.phone_normalized}")
+                known_phones.add(contact.phone_normalized)
+                
                 db.add(contact)
                 imported_count += 1
                 
@@ -274,7 +476,13 @@ async def import_contacts(file: UploadFile = File(...), db: Session = Depends(ge
                 errors.append(error_msg)
                 logger.error(error_msg)
         
+        db.flush()
+        segment_service.rebuild_all(db)
+        bump_version(db, CONTACTS)
         db.commit()
+        contact_search.invalidate()
+        contact_lookup.invalidate()
+        statistics_service.invalidate()
         
         logger.info(f"Import complete: {imported_count} contacts imported, {len(errors)} errors")
         
@@ -284,6 +492,14 @@ async def import_contacts(file: UploadFile = File(...), db: Session = Depends(ge
             "errors": errors if errors else None
         }
         
+    except IntegrityError as e:
+        db.rollback()
+        conflict = contact_conflict(e)
+        if conflict.status_code == 409:
+            conflict.detail = "A contact with one of these phone numbers was added meanwhile; retry the import"
+        else:
+            conflict.detail = f"Import failed: {conflict.detail}; check that column in the file"
+        raise conflict
     except Exception as e:
         logger.error(f"Import error: {str(e)}")
         raise HTTPException(status_code=400, detail=f"Import failed: {str(e)}")
@@ -297,9 +513,30 @@ async def send_message(message: MessageCreate, db: Session = Depends(get_db)):
     try:
         sent_results = []
         
+        # Future-dated messages are stored PENDING and released by release_scheduled_messages
+        deliver_later = (
+            message.scheduled_at is not None
+            and as_utc(message.scheduled_at) > datetime.now(timezone.utc)
+        )
+        if deliver_later and message.phone_numbers:
+            raise HTTPException(
+                status_code=400,
+                detail="Scheduled sends need contact_ids, contact_id, segment_id or send_to_all"
+            )
+        
         # Handle phone_numbers from Google Sheets (via Node.js)
         if message.phone_numbers:
             logger.info(f"Sending to {len(message.phone_numbers)} contacts from Google Sheets")
+            
+            # Contacts behind the listed numbers, in one query
+            listed = {normalize_phone(c.get('phone')) for c in message.phone_numbers} - {None}
+            # Active contacts last, so they win over deactivated ones with the same number
+            contact_by_phone = dict(
+                db.query(Contact.phone_normalized, Contact.id).filter(
+                    Contact.phone_normalized.in_(listed)
+                ).order_by(Contact.active, Contact.id)
+            ) if listed else {}
+            new_conversations = []
             for contact_data in message.phone_numbers:
                 phone = contact_data.get('phone')
                 name = contact_data.get('name', 'Unknown')
@@ -346,18 +583,14 @@ Return only the personalized message, no explanations.
                     })
                     
                     # Store in conversation history if successful
-                    if result.get("success"):
-                        # Try to find or create contact
-                        contact = db.query(Contact).filter(Contact.phone == phone).first()
-                        if contact:
-                            from models import Conversation
-                            conv = Conversation(
-                                contact_id=contact.id,
-                                direction="outbound",
-                                message=final_content,
-                                language=language
-                            )
-                            db.add(conv)
+                    contact_id = contact_by_phone.get(normalize_phone(phone))
+                    if result.get("success") and contact_id:
+                        new_conversations.append({
+                            "contact_id": contact_id,
+                            "direction": "outbound",
+                            "message": final_content,
+                            "language": language
+                        })
                     
                     logger.info(f"SMS to {name} ({phone}): {result}")
                 else:
@@ -371,7 +604,11 @@ Return only the personalized message, no explanations.
                     })
                     logger.info(f"Call to {name} ({phone}): {result}")
             
+            if new_conversations:
+                db.execute(insert(Conversation), new_conversations)
             db.commit()
+            for row in new_conversations:
+                conversation_window.append(row["contact_id"], [turn(Conversation(**row))])
             
             successful = sum(1 for r in sent_results if r.get("success"))
             failed = len(sent_results) - successful
@@ -386,51 +623,94 @@ Return only the personalized message, no explanations.
             }
         
         # Handle contact_ids from local database (legacy)
-        contact_ids = []
+        # Recipients as (id, timezone, state_zip) rows, in one query
+        recipient_columns = (Contact.id, Contact.timezone, Contact.state_zip)
         
         if message.send_to_all:
-            contacts = db.query(Contact).filter(Contact.active == True).all()
-            contact_ids = [c.id for c in contacts]
-        elif message.contact_ids:
-            contact_ids = message.contact_ids
-        elif message.contact_id:
-            contact_ids = [message.contact_id]
+            recipients = db.query(*recipient_columns).filter(Contact.active == True).order_by(Contact.id).all()
+        elif message.segment_id:
+            if not segment_service.get(db, message.segment_id):
+                raise HTTPException(status_code=404, detail="Segment not found")
+            recipients = db.execute(segment_service.recipient_rows(message.segment_id)).all()
+        elif message.contact_ids or message.contact_id:
+            contact_ids = message.contact_ids or [message.contact_id]
+            found = {row[0]: row for row in db.query(*recipient_columns).filter(Contact.id.in_(set(contact_ids)))}
+            # Requested order; unknown ids are skipped
+            recipients = [found[contact_id] for contact_id in contact_ids if contact_id in found]
         else:
             raise HTTPException(status_code=400, detail="No contacts specified")
         
-        sent_messages = []
+        # Bulk sends get a campaign that tracks their progress
+        campaign = None
+        if message.send_to_all or message.segment_id or message.contact_ids:
+            campaign = campaign_service.create(
+                db,
+                message.campaign_name or message.content[:50],
+                message.message_type,
+                message.content,
+                segment_id=message.segment_id
+            )
         
-        for contact_id in contact_ids:
-            contact = db.query(Contact).filter(Contact.id == contact_id).first()
-            if not contact:
-                continue
+        scheduled_for = as_utc(message.scheduled_at) if deliver_later else None
+        # Quiet hours apply to bulk sends; a one-off send goes out now unless asked
+        windowed = message.respect_send_window
+        if windowed is None:
+            windowed = campaign is not None
+        
+        new_messages = []
+        for contact_id, contact_tz, state_zip in recipients:
+            # Hold the message until the recipient's local send window opens
+            send_at = scheduled_for
+            if windowed:
+                tz_name = contact_timezone(contact_tz, state_zip)
+                send_at = release_time(contact_id, tz_name, now=scheduled_for) or send_at
                 
-            msg = Message(
-                contact_id=contact_id,
-                message_type=message.message_type,
-                content=message.content,
-                status=MessageStatus.QUEUED,
-                scheduled_at=message.scheduled_at
-            )
-            db.add(msg)
-            db.flush()
-            
-            # Queue message for sending
-            if message.message_type.value == "sms":
-                send_sms_task.delay(msg.id)
-            else:
-                make_call_task.delay(contact_id, message.content)
-            
-            sent_messages.append(msg.id)
+            new_messages.append({
+                "contact_id": contact_id,
+                "campaign_id": campaign.id if campaign else None,
+                "message_type": message.message_type,
+                "content": message.content,
+                "status": MessageStatus.PENDING if send_at else MessageStatus.QUEUED,
+                "scheduled_at": send_at or message.scheduled_at
+            })
+        
+        # Batched INSERT ... RETURNING; unordered RETURNING keeps it batched on every dialect
+        inserted = db.execute(
+            insert(Message).returning(Message.id, Message.contact_id, Message.message_type, Message.status),
+            new_messages
+        ).all() if new_messages else []
+        sent_messages = [row.id for row in inserted]
+        # Held messages wait for their release tick
+        to_queue = [row for row in inserted if row.status == MessageStatus.QUEUED]
+        deferred = len(inserted) - len(to_queue)
         
+        if campaign:
+            campaign_service.add_messages(db, campaign.id, len(sent_messages))
+            campaign_service.finish_fanout(db, campaign.id)
+        # Tasks go through the outbox, committed with the messages themselves;
+        # sends outside a campaign skip the bulk queue
+        events = enqueue_sends(db, to_queue, interactive=campaign is None)
         db.commit()
+        # Publish now rather than wait for the relay, which still covers failures
+        await run_in_threadpool(publish_now, db, celery_app, events)
+        
+        if deliver_later:
+            summary = f"Scheduled {len(sent_messages)} messages for {scheduled_for.isoformat()}"
+        elif deferred:
+            summary = f"Queued {len(sent_messages) - deferred} messages, {deferred} held for recipients' send window"
+        else:
+            summary = f"Queued {len(sent_messages)} messages"
         
         return {
             "success": True,
-            "message": f"Queued {len(sent_messages)} messages",
-            "message_ids": sent_messages
+            "message": summary,
+            "message_ids": sent_messages,
+            "deferred": deferred,
+            "campaign_id": campaign.id if campaign else None
         }
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Send message error: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -441,16 +721,45 @@ def list_messages(
     skip: int = 0,
     limit: int = 100,
     contact_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    campaign_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    """List messages with optional filtering"""
-    query = db.query(Message)
+    """List messages with optional filtering.
+    Pass the X-Next-Cursor header back as `cursor` to fetch the next page."""
+    query = select_columns(Message, MessageResponse)
     
     if contact_id:
         query = query.filter(Message.contact_id == contact_id)
+    if campaign_id:
+        query = query.filter(Message.campaign_id == campaign_id)
+    
+    query = apply_cursor(query, Message, cursor, newest_first=True)
+    if not cursor:
+        query = query.offset(skip)
+    
+    messages = fetch_rows(db, query.limit(limit))
+    next_cursor = encode_cursor(messages[-1]["id"]) if len(messages) == limit else None
+    return rows_response(messages, next_cursor)
+
+
+@app.post("/api/messages/{message_id}/cancel")
+def cancel_scheduled_message(message_id: int, db: Session = Depends(get_db)):
+    """Cancel a scheduled message that has not been released yet"""
+    existing = db.query(Message.campaign_id).filter(Message.id == message_id).first()
+    if not existing:
+        raise HTTPException(status_code=404, detail="Message not found")
+    
+    cancelled = db.query(Message).filter(
+        Message.id == message_id,
+        Message.status == MessageStatus.PENDING
+    ).update({Message.status: MessageStatus.CANCELLED}, synchronize_session=False)
+    if not cancelled:
+        raise HTTPException(status_code=409, detail="Message is no longer scheduled")
     
-    messages = query.order_by(Message.created_at.desc()).offset(skip).limit(limit).all()
-    return messages
+    campaign_service.record(db, existing.campaign_id, MessageStatus.PENDING, MessageStatus.CANCELLED)
+    db.commit()
+    return {"message": "Scheduled message cancelled"}
 
 
 # ==================== Voice Calls ====================
@@ -493,11 +802,18 @@ def make_voice_call(call_request: VoiceCallRequest, db: Session = Depends(get_db
 def list_call_logs(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
 ):
-    """List call logs"""
-    call_logs = db.query(CallLog).order_by(CallLog.created_at.desc()).offset(skip).limit(limit).all()
-    return call_logs
+    """List call logs.
+    Pass the X-Next-Cursor header back as `cursor` to fetch the next page."""
+    query = apply_cursor(select_columns(CallLog, CallLogResponse), CallLog, cursor, newest_first=True)
+    if not cursor:
+        query = query.offset(skip)
+    
+    call_logs = fetch_rows(db, query.limit(limit))
+    next_cursor = encode_cursor(call_logs[-1]["id"]) if len(call_logs) == limit else None
+    return rows_response(call_logs, next_cursor)
 
 
 # ==================== Scheduled Reminders ====================
@@ -505,28 +821,47 @@ def list_call_logs(
 @app.post("/api/reminders", response_model=ScheduledReminderResponse)
 def create_reminder(reminder: ScheduledReminderCreate, db: Session = Depends(get_db)):
     """Create a scheduled reminder"""
+    if reminder.segment_id and not segment_service.get(db, reminder.segment_id):
+        raise HTTPException(status_code=404, detail="Segment not found")
+    
     db_reminder = ScheduledReminder(**reminder.dict())
+    try:
+        db_reminder.next_run_at = next_run_for(db_reminder)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if db_reminder.next_run_at is None:
+        raise HTTPException(status_code=400, detail="One-time reminder is scheduled in the past")
+    
     db.add(db_reminder)
+    bump_version(db, REMINDERS)
     db.commit()
+    statistics_service.invalidate()
     db.refresh(db_reminder)
     return db_reminder
 
 
 @app.get("/api/reminders", response_model=List[ScheduledReminderResponse])
 def list_reminders(
+    request: Request,
     skip: int = 0,
     limit: int = 100,
     active_only: bool = True,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """List scheduled reminders"""
-    query = db.query(ScheduledReminder)
+    etag = versioned_etag(request, db, REMINDERS)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    query = select_columns(ScheduledReminder, ScheduledReminderResponse)
     
     if active_only:
         query = query.filter(ScheduledReminder.active == True)
     
-    reminders = query.offset(skip).limit(limit).all()
-    return reminders
+    response = rows_response(fetch_rows(db, query.offset(skip).limit(limit)))
+    response.headers.update(cache_headers(etag))
+    return response
 
 
 @app.delete("/api/reminders/{reminder_id}")
@@ -537,34 +872,31 @@ def delete_reminder(reminder_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Reminder not found")
     
     reminder.active = False
+    bump_version(db, REMINDERS)
     db.commit()
+    statistics_service.invalidate()
     return {"message": "Reminder deactivated successfully"}
 
 
 # ==================== Statistics ====================
 
 @app.get("/api/statistics", response_model=StatisticsResponse)
-def get_statistics(db: Session = Depends(get_db)):
+def get_statistics(request: Request, db: Session = Depends(get_read_db)):
     """Get system statistics"""
-    total_contacts = db.query(Contact).count()
-    active_contacts = db.query(Contact).filter(Contact.active == True).count()
-    total_messages = db.query(Message).filter(Message.status == MessageStatus.SENT).count()
-    total_calls = db.query(CallLog).count()
-    scheduled_reminders = db.query(ScheduledReminder).filter(ScheduledReminder.active == True).count()
+    stats = statistics_service.get(db)
     
-    return {
-        "total_contacts": total_contacts,
-        "active_contacts": active_contacts,
-        "total_messages_sent": total_messages,
-        "total_calls_made": total_calls,
-        "scheduled_reminders": scheduled_reminders
-    }
+    # Message and call counts move with every send, so hash the payload
+    etag = content_etag(stats)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    return JSONResponse(content=stats, headers=cache_headers(etag))
 
 
 # ==================== Twilio Webhooks ====================
 
 @app.post("/api/webhooks/twilio/voice-inbound")
-async def handle_inbound_call(request: Request, db: Session = Depends(get_db)):
+async def handle_inbound_call(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Handle inbound voice calls"""
     form_data = await request.form()
     caller_phone = form_data.get("From")
@@ -577,7 +909,7 @@ async def handle_inbound_call(request: Request, db: Session = Depends(get_db)):
         twilio_call_sid=call_sid
     )
     db.add(call_log)
-    db.commit()
+    await db.commit()
     
     # Generate greeting TwiML
     twiml = twilio_service.generate_greeting_twiml()
@@ -593,7 +925,7 @@ async def handle_outbound_call(request: Request):
 
 
 @app.post("/api/webhooks/twilio/voice-response")
-async def handle_voice_response(request: Request, db: Session = Depends(get_db)):
+async def handle_voice_response(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Handle voice conversation responses"""
     form_data = await request.form()
     speech_result = form_data.get("SpeechResult", "")
@@ -607,18 +939,22 @@ async def handle_voice_response(request: Request, db: Session = Depends(get_db))
         return Response(content=twiml, media_type="application/xml")
     
     # Get call log
-    call_log = db.query(CallLog).filter(CallLog.twilio_call_sid == call_sid).first()
+    call_log = (await db.execute(
+        select(CallLog).where(CallLog.twilio_call_sid == call_sid)
+    )).scalars().first()
     
     # Get conversation history
     conversation_history = []
     if call_log:
-        history = db.query(ConversationHistory).filter(
-            ConversationHistory.call_log_id == call_log.id
-        ).all()
+        history = (await db.execute(
+            select(ConversationHistory).where(
+                ConversationHistory.call_log_id == call_log.id
+            ).order_by(ConversationHistory.id)
+        )).scalars().all()
         conversation_history = [{"role": h.role, "content": h.content} for h in history]
     
     # Get LLM response
-    llm_response = llm_service.get_response(speech_result, conversation_history)
+    llm_response = await llm_service.get_response(speech_result, conversation_history)
     
     # Save conversation
     if call_log:
@@ -632,7 +968,7 @@ async def handle_voice_response(request: Request, db: Session = Depends(get_db))
             role="assistant",
             content=llm_response
         ))
-        db.commit()
+        await db.commit()
     
     # Generate response TwiML
     twiml = twilio_service.generate_response_twiml(llm_response, continue_conversation=True)
@@ -641,34 +977,51 @@ async def handle_voice_response(request: Request, db: Session = Depends(get_db))
 
 
 @app.post("/api/webhooks/twilio/call-status")
-async def handle_call_status(request: Request, db: Session = Depends(get_db)):
+async def handle_call_status(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Handle call status updates"""
     form_data = await request.form()
     call_sid = form_data.get("CallSid")
     call_status = form_data.get("CallStatus")
     call_duration = form_data.get("CallDuration", 0)
     
-    call_log = db.query(CallLog).filter(CallLog.twilio_call_sid == call_sid).first()
+    call_log = (await db.execute(
+        select(CallLog).where(CallLog.twilio_call_sid == call_sid)
+    )).scalars().first()
     
     if call_log:
         call_log.duration = int(call_duration)
         
         # Generate conversation summary if call completed
         if call_status == "completed":
-            history = db.query(ConversationHistory).filter(
-                ConversationHistory.call_log_id == call_log.id
-            ).all()
+            history = (await db.execute(
+                select(ConversationHistory).where(
+                    ConversationHistory.call_log_id == call_log.id
+                ).order_by(ConversationHistory.id)
+            )).scalars().all()
             
             if history:
                 conversation_history = [{"role": h.role, "content": h.content} for h in history]
-                summary = llm_service.summarize_conversation(conversation_history)
+                summary = await llm_service.summarize_conversation(conversation_history)
                 call_log.conversation_summary = summary
         
-        db.commit()
+        await db.commit()
     
     return {"status": "ok"}
 
 
+@app.post("/api/webhooks/twilio/sms-status")
+async def handle_sms_status(request: Request):
+    """Buffer SMS status callbacks; apply_sms_statuses writes them in bulk"""
+    form_data = await request.form()
+    await run_in_threadpool(
+        delivery_status.record,
+        form_data.get("MessageSid"),
+        form_data.get("MessageStatus"),
+        form_data.get("ErrorCode")
+    )
+    return {"status": "ok"}
+
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
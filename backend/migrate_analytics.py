@@ -0,0 +1,41 @@
+"""
+Database migration script for analytics rollups.
+Creates analytics_hourly, analytics_daily and rollup_watermarks, and the
+time indexes the rollup task reads recent activity through. The first
+rollup_analytics runs backfill history ANALYTICS_MAX_HOURS_PER_RUN hours
+at a time.
+"""
+
+from database import engine
+from models import AnalyticsHourly, AnalyticsDaily, RollupWatermark, Message, Conversation, CallLog
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TIME_INDEXES = {
+    Message: ("ix_messages_sent_at", "ix_messages_created_at"),
+    Conversation: ("ix_conversations_timestamp",),
+    CallLog: ("ix_call_logs_created_at",),
+}
+
+
+def migrate():
+    """Create the rollup tables and time indexes"""
+    try:
+        for model in (AnalyticsHourly, AnalyticsDaily, RollupWatermark):
+            logger.info(f"Creating {model.__tablename__} table...")
+            model.__table__.create(bind=engine, checkfirst=True)
+        for model, names in TIME_INDEXES.items():
+            for index in model.__table__.indexes:
+                if index.name in names:
+                    logger.info(f"Creating index {index.name}...")
+                    index.create(bind=engine, checkfirst=True)
+        logger.info("✅ Analytics migration complete!")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,39 @@
+"""
+Database migration script for campaigns.
+Creates the campaigns table and adds messages.campaign_id with its index.
+Messages sent before this migration have no campaign.
+"""
+
+from sqlalchemy import inspect, text
+from database import engine
+from models import Campaign
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrate():
+    """Create campaigns and link messages to them"""
+    try:
+        logger.info("Creating campaigns table...")
+        Campaign.__table__.create(bind=engine, checkfirst=True)
+        
+        columns = {c["name"] for c in inspect(engine).get_columns("messages")}
+        if "campaign_id" not in columns:
+            logger.info("Adding messages.campaign_id...")
+            with engine.begin() as conn:
+                conn.execute(text("ALTER TABLE messages ADD COLUMN campaign_id INTEGER REFERENCES campaigns(id)"))
+        
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE INDEX IF NOT EXISTS ix_messages_campaign_id_id ON messages (campaign_id, id)"
+            ))
+        logger.info("✅ Campaign migration complete!")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,40 @@
+"""
+Database migration script to add trigram search indexes for contacts.
+PostgreSQL only: installs pg_trgm and GIN indexes on name and phone digits.
+Other databases use the in-process index in services/contact_search.py.
+"""
+
+from sqlalchemy import text
+from database import engine
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+STATEMENTS = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_contacts_name_trgm "
+    "ON contacts USING gin (name gin_trgm_ops)",
+    "CREATE INDEX IF NOT EXISTS ix_contacts_phone_digits_trgm "
+    "ON contacts USING gin ((regexp_replace(phone, '\\D', '', 'g')) gin_trgm_ops)",
+]
+
+
+def migrate():
+    """Create pg_trgm GIN indexes on contacts"""
+    if engine.dialect.name != "postgresql":
+        logger.info("Not PostgreSQL - contact search uses the in-process index, nothing to do.")
+        return
+    try:
+        with engine.begin() as conn:
+            for statement in STATEMENTS:
+                logger.info(statement)
+                conn.execute(text(statement))
+        logger.info("✅ Contact search indexes created successfully!")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate()
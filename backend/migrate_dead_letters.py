@@ -0,0 +1,26 @@
+"""
+Database migration script for send retries.
+Creates the dead_letters table for messages that failed after every retry.
+"""
+
+from database import engine
+from models import DeadLetter
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrate():
+    """Create dead_letters"""
+    try:
+        logger.info("Creating dead_letters table...")
+        DeadLetter.__table__.create(bind=engine, checkfirst=True)
+        logger.info("✅ Dead-letter migration complete!")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate()
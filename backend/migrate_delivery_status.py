@@ -0,0 +1,27 @@
+"""
+Database migration script for SMS delivery status callbacks.
+Adds the messages.twilio_sid index used to apply buffered callbacks.
+"""
+
+from sqlalchemy import text
+from database import engine
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrate():
+    """Index messages by Twilio sid"""
+    try:
+        logger.info("Creating ix_messages_twilio_sid...")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_messages_twilio_sid ON messages (twilio_sid)"))
+        logger.info("✅ Delivery status migration complete!")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,54 @@
+"""
+Database migration script for the hot lookup indexes.
+Adds the indexes behind conversation-history and call-sid lookups:
+  conversations (contact_id, timestamp)          inbound SMS, /api/llm/*
+  conversation_history (call_log_id, id)         voice webhooks
+  call_logs (twilio_call_sid)                    voice webhooks
+Messages by contact_id and by twilio_sid are already served by
+ix_messages_contact_id_id and ix_messages_twilio_sid.
+On PostgreSQL the indexes are built CONCURRENTLY so webhooks keep writing
+while they build. Benchmark with benchmark_lookups.py.
+"""
+
+from sqlalchemy.schema import CreateIndex
+from database import engine
+from models import Conversation, ConversationHistory, CallLog
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDEXES = {
+    Conversation: "ix_conversations_contact_id_timestamp",
+    ConversationHistory: "ix_conversation_history_call_log_id_id",
+    CallLog: "ix_call_logs_twilio_call_sid",
+}
+
+
+def _index(model, name):
+    return next(index for index in model.__table__.indexes if index.name == name)
+
+
+def migrate():
+    """Create the lookup indexes"""
+    try:
+        if engine.dialect.name == "postgresql":
+            # CONCURRENTLY can't run inside a transaction block. An interrupted
+            # build leaves an INVALID index: drop it and run this again.
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                for model, name in INDEXES.items():
+                    logger.info(f"Creating index {name} concurrently...")
+                    ddl = str(CreateIndex(_index(model, name), if_not_exists=True).compile(dialect=engine.dialect))
+                    conn.exec_driver_sql(ddl.replace("CREATE INDEX", "CREATE INDEX CONCURRENTLY", 1))
+        else:
+            for model, name in INDEXES.items():
+                logger.info(f"Creating index {name}...")
+                _index(model, name).create(bind=engine, checkfirst=True)
+        logger.info("✅ Lookup indexes created successfully!")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,26 @@
+"""
+Database migration script for the transactional outbox.
+Creates the outbox_events table that send paths write Celery tasks to.
+"""
+
+from database import engine
+from models import OutboxEvent
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrate():
+    """Create outbox_events"""
+    try:
+        logger.info("Creating outbox_events table...")
+        OutboxEvent.__table__.create(bind=engine, checkfirst=True)
+        logger.info("✅ Outbox migration complete!")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate()
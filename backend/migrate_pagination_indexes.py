@@ -0,0 +1,28 @@
+"""
+Database migration script to add the keyset pagination indexes.
+Run this once on existing databases; new databases get them from create_all.
+"""
+
+from database import engine
+from models import Contact, Message
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrate():
+    """Create composite indexes used by cursor pagination"""
+    try:
+        for model in (Contact, Message):
+            for index in model.__table__.indexes:
+                logger.info(f"Creating index {index.name}...")
+                index.create(bind=engine, checkfirst=True)
+        logger.info("✅ Pagination indexes created successfully!")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate()
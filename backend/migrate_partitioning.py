@@ -0,0 +1,91 @@
+"""
+Database migration script for monthly partitioning of the history tables.
+PostgreSQL only: rebuilds messages, conversations and conversation_history
+as tables range-partitioned by month on created_at / timestamp (see
+partitions.py). Each table is copied in its own transaction and is locked
+while it is copied, so run it in a quiet window. Their primary keys become
+(id, <timestamp>), and dead_letters loses its foreign key to messages,
+which a partitioned table can't be referenced by; the archiver deletes dead
+letters along with their messages instead. If statistics counters are
+installed, their triggers are reinstalled on the new messages table.
+Other databases keep plain tables, nothing to do.
+"""
+
+from sqlalchemy import text
+from sqlalchemy.schema import AddConstraint, CreateIndex
+from database import engine
+from models import Message, Conversation, ConversationHistory
+from partitions import PARTITIONED, is_partitioned, create_partition, months, month_start, add_months
+from config import settings
+from datetime import datetime, timezone
+import migrate_statistics_counters
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MODELS = (Message, Conversation, ConversationHistory)
+
+
+def _partition(conn, model):
+    table = model.__tablename__
+    column = PARTITIONED[table].name
+    legacy = f"{table}_unpartitioned"
+
+    conn.execute(text(f"ALTER TABLE {table} RENAME TO {legacy}"))
+    # The partition key can't be NULL
+    conn.execute(text(f"UPDATE {legacy} SET {column} = now() WHERE {column} IS NULL"))
+    conn.execute(text(
+        f"CREATE TABLE {table} (LIKE {legacy} INCLUDING DEFAULTS) PARTITION BY RANGE ({column})"
+    ))
+    conn.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+    current = month_start(datetime.now(timezone.utc))
+    oldest = conn.execute(text(f"SELECT min({column}) FROM {legacy}")).scalar()
+    for month, _ in months(oldest or current, add_months(current, settings.PARTITION_MONTHS_AHEAD + 1)):
+        create_partition(conn, table, month)
+
+    logger.info(f"Copying {table}...")
+    copied = conn.execute(text(f"INSERT INTO {table} SELECT * FROM {legacy}")).rowcount
+    logger.info(f"Copied {copied} rows")
+
+    # Keep the id sequence when the old table goes
+    sequence = conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"), {"table": legacy}).scalar()
+    if sequence:
+        conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY {table}.id"))
+    conn.execute(text(f"DROP TABLE {legacy} CASCADE"))
+
+    conn.execute(text(f"ALTER TABLE {table} ADD PRIMARY KEY (id, {column})"))
+    for index in model.__table__.indexes:
+        conn.execute(CreateIndex(index))
+    for constraint in model.__table__.foreign_key_constraints:
+        conn.execute(AddConstraint(constraint))
+
+
+def migrate():
+    """Partition the history tables by month"""
+    if engine.dialect.name != "postgresql":
+        logger.info("Not PostgreSQL - history tables stay unpartitioned, nothing to do.")
+        return
+    try:
+        for model in MODELS:
+            table = model.__tablename__
+            with engine.begin() as conn:
+                if is_partitioned(conn, table):
+                    logger.info(f"{table} is already partitioned")
+                    continue
+                logger.info(f"Partitioning {table} by month...")
+                _partition(conn, model)
+
+        with engine.connect() as conn:
+            counters = conn.execute(text("SELECT to_regclass('statistics_counters') IS NOT NULL")).scalar()
+        if counters:
+            # Its triggers went with the old messages table
+            migrate_statistics_counters.migrate()
+        logger.info("✅ Partitioning migration complete!")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,75 @@
+"""
+Database migration script for normalized contact phone numbers.
+Adds contacts.phone_normalized (E.164, see phones.py), backfills it and
+indexes it, unique among active contacts. When several active contacts share
+a number, the oldest keeps it and the others are left NULL and logged for
+review; webhooks only match contacts by phone_normalized. Deactivated
+contacts always keep theirs. Replaces the earlier index that was unique
+across all contacts.
+"""
+
+from sqlalchemy import inspect, text
+from database import engine
+from models import Contact
+from phones import normalize_phone
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+INDEX_NAMES = ("ix_contacts_phone_normalized", "ux_contacts_phone_normalized_active")
+
+
+def migrate():
+    """Add, backfill and index contacts.phone_normalized"""
+    try:
+        inspector = inspect(engine)
+        columns = {c["name"] for c in inspector.get_columns("contacts")}
+        if "phone_normalized" not in columns:
+            logger.info("Adding contacts.phone_normalized...")
+            with engine.begin() as conn:
+                conn.execute(text("ALTER TABLE contacts ADD COLUMN phone_normalized VARCHAR"))
+        else:
+            unique_everywhere = any(
+                index["name"] == INDEX_NAMES[0] and index["unique"]
+                for index in inspector.get_indexes("contacts")
+            )
+            if unique_everywhere:
+                logger.info(f"Dropping {INDEX_NAMES[0]}, unique across deactivated contacts too...")
+                with engine.begin() as conn:
+                    conn.execute(text(f"DROP INDEX {INDEX_NAMES[0]}"))
+
+        with engine.begin() as conn:
+            rows = conn.execute(text("SELECT id, name, phone, active FROM contacts ORDER BY id")).all()
+            owners = {}
+            updates = []
+            for contact_id, name, phone, active in rows:
+                normalized = normalize_phone(phone)
+                if active and normalized in owners:
+                    logger.warning(
+                        f"Contact {contact_id} ({name}) shares {normalized} with contact "
+                        f"{owners[normalized]}; leaving its phone_normalized empty"
+                    )
+                    normalized = None
+                elif active and normalized:
+                    owners[normalized] = contact_id
+                updates.append({"id": contact_id, "phone_normalized": normalized})
+            logger.info(f"Backfilling phone_normalized for {len(updates)} contacts...")
+            if updates:
+                conn.execute(
+                    text("UPDATE contacts SET phone_normalized = :phone_normalized WHERE id = :id"),
+                    updates
+                )
+
+        for index in Contact.__table__.indexes:
+            if index.name in INDEX_NAMES:
+                logger.info(f"Creating index {index.name}...")
+                index.create(bind=engine, checkfirst=True)
+        logger.info("✅ Phone normalization migration complete!")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,50 @@
+"""
+Database migration script to add next-fire-time scheduling to reminders.
+Adds scheduled_reminders.next_run_at / last_run_at with their index and
+backfills next_run_at for active reminders.
+"""
+
+from sqlalchemy import inspect, text
+from database import engine, SessionLocal
+from models import ScheduledReminder
+from services.reminder_scheduler import next_run_for
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrate():
+    """Add reminder scheduling columns and compute next runs"""
+    try:
+        columns = {c["name"] for c in inspect(engine).get_columns("scheduled_reminders")}
+        column_type = "TIMESTAMP WITH TIME ZONE" if engine.dialect.name == "postgresql" else "DATETIME"
+        with engine.begin() as conn:
+            for column in ("next_run_at", "last_run_at"):
+                if column not in columns:
+                    logger.info(f"Adding scheduled_reminders.{column}...")
+                    conn.execute(text(f"ALTER TABLE scheduled_reminders ADD COLUMN {column} {column_type}"))
+        for index in ScheduledReminder.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+        
+        db = SessionLocal()
+        try:
+            for reminder in db.query(ScheduledReminder).filter(ScheduledReminder.active == True):
+                try:
+                    reminder.next_run_at = next_run_for(reminder)
+                except ValueError as e:
+                    logger.warning(f"Reminder {reminder.id} has an invalid schedule, deactivating: {e}")
+                    reminder.active = False
+                if reminder.next_run_at is None:
+                    reminder.active = False
+            db.commit()
+        finally:
+            db.close()
+        logger.info("✅ Reminder schedule migration complete!")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate()
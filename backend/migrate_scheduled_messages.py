@@ -0,0 +1,33 @@
+"""
+Database migration script for deferred message delivery.
+Adds the CANCELLED message status (PostgreSQL enum) and the
+(status, scheduled_at) index used by the release tick.
+"""
+
+from sqlalchemy import text
+from database import engine
+from models import Message
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrate():
+    """Add the cancelled status and the scheduled release index"""
+    try:
+        if engine.dialect.name == "postgresql":
+            logger.info("Adding CANCELLED to messagestatus enum...")
+            with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+                conn.execute(text("ALTER TYPE messagestatus ADD VALUE IF NOT EXISTS 'CANCELLED'"))
+        
+        for index in Message.__table__.indexes:
+            index.create(bind=engine, checkfirst=True)
+        logger.info("✅ Scheduled message migration complete!")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,37 @@
+"""
+Database migration script to add contact segments.
+Creates the segments and segment_members tables and adds
+scheduled_reminders.segment_id to existing databases.
+"""
+
+from sqlalchemy import inspect, text
+from database import engine, Base
+from models import Segment, SegmentMember
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrate():
+    """Create segment tables and the reminder segment column"""
+    try:
+        logger.info("Creating segments tables...")
+        Base.metadata.create_all(bind=engine, tables=[Segment.__table__, SegmentMember.__table__])
+        
+        columns = {c["name"] for c in inspect(engine).get_columns("scheduled_reminders")}
+        if "segment_id" not in columns:
+            logger.info("Adding scheduled_reminders.segment_id...")
+            with engine.begin() as conn:
+                conn.execute(text(
+                    "ALTER TABLE scheduled_reminders "
+                    "ADD COLUMN segment_id INTEGER REFERENCES segments(id)"
+                ))
+        logger.info("✅ Segments migration complete!")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate()
@@ -0,0 +1,30 @@
+"""
+Database migration script to add per-contact timezones for send windows.
+Adds contacts.timezone to existing databases; contacts without one fall
+back to the state in state_zip, then CHURCH_TIMEZONE.
+"""
+
+from sqlalchemy import inspect, text
+from database import engine
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def migrate():
+    """Add contacts.timezone"""
+    try:
+        columns = {c["name"] for c in inspect(engine).get_columns("contacts")}
+        if "timezone" not in columns:
+            logger.info("Adding contacts.timezone...")
+            with engine.begin() as conn:
+                conn.execute(text("ALTER TABLE contacts ADD COLUMN timezone VARCHAR"))
+        logger.info("✅ Send window migration complete!")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate()
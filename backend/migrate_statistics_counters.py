@@ -0,0 +1,121 @@
+"""
+Database migration script for maintained dashboard statistics.
+PostgreSQL only: creates statistics_counters, statement-level triggers that
+keep it current on contacts, messages, call_logs and scheduled_reminders,
+and backfills it. Writes to those tables are blocked while it runs.
+Other databases compute statistics with one aggregate query instead.
+"""
+
+from sqlalchemy import text
+from database import engine
+from models import StatisticsCounter
+import logging
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# A row counts toward each counter when its condition holds; triggers add
+# the matching rows of a statement's new rows and subtract its old ones
+COUNTED = {
+    "contacts": {
+        "total_contacts": "true",
+        "active_contacts": "active",
+    },
+    "messages": {
+        "total_messages_sent": "status::text IN ('SENT', 'DELIVERED')",
+    },
+    "call_logs": {
+        "total_calls_made": "true",
+    },
+    "scheduled_reminders": {
+        "scheduled_reminders": "active",
+    },
+}
+
+BUMP_FUNCTION = """
+CREATE OR REPLACE FUNCTION statistics_bump(counter text, delta bigint) RETURNS void AS $$
+BEGIN
+    IF delta <> 0 THEN
+        UPDATE statistics_counters SET value = value + delta WHERE name = counter;
+    END IF;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def _trigger_function(table: str, counters: dict) -> str:
+    """One function per table; a statement moves each counter once, however many rows it touched"""
+    counts = ", ".join(f"count(*) FILTER (WHERE {cond})" for cond in counters.values())
+    names = list(counters)
+    targets = ", ".join(f"n{i}" for i in range(len(names)))
+    declares = " ".join(f"n{i} bigint := 0; o{i} bigint := 0;" for i in range(len(names)))
+    old_targets = ", ".join(f"o{i}" for i in range(len(names)))
+    bumps = "\n    ".join(
+        f"PERFORM statistics_bump('{name}', n{i} - o{i});" for i, name in enumerate(names)
+    )
+    return f"""
+CREATE OR REPLACE FUNCTION statistics_{table}() RETURNS trigger AS $$
+DECLARE {declares}
+BEGIN
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        SELECT {counts} INTO {targets} FROM new_rows;
+    END IF;
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        SELECT {counts} INTO {old_targets} FROM old_rows;
+    END IF;
+    {bumps}
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+"""
+
+
+def _triggers(table: str) -> list:
+    # Transition tables allow a single event per trigger
+    statements = []
+    for event, referencing in (
+        ("INSERT", "NEW TABLE AS new_rows"),
+        ("UPDATE", "OLD TABLE AS old_rows NEW TABLE AS new_rows"),
+        ("DELETE", "OLD TABLE AS old_rows"),
+    ):
+        name = f"statistics_{table}_{event.lower()}"
+        statements.append(f"DROP TRIGGER IF EXISTS {name} ON {table}")
+        statements.append(
+            f"CREATE TRIGGER {name} AFTER {event} ON {table} "
+            f"REFERENCING {referencing} FOR EACH STATEMENT EXECUTE FUNCTION statistics_{table}()"
+        )
+    return statements
+
+
+def migrate():
+    """Create statistics_counters, its triggers and backfill it"""
+    if engine.dialect.name != "postgresql":
+        logger.info("Not PostgreSQL - statistics use an aggregate query, nothing to do.")
+        return
+    try:
+        StatisticsCounter.__table__.create(bind=engine, checkfirst=True)
+        with engine.begin() as conn:
+            # Hold writes until the backfill and the triggers commit together
+            conn.execute(text(
+                f"LOCK TABLE {', '.join(COUNTED)} IN SHARE ROW EXCLUSIVE MODE"
+            ))
+            conn.execute(text(BUMP_FUNCTION))
+            for table, counters in COUNTED.items():
+                logger.info(f"Installing statistics triggers on {table}...")
+                conn.execute(text(_trigger_function(table, counters)))
+                for statement in _triggers(table):
+                    conn.execute(text(statement))
+                for name, cond in counters.items():
+                    conn.execute(text(
+                        "INSERT INTO statistics_counters (name, value) "
+                        f"SELECT :name, count(*) FROM {table} WHERE {cond} "
+                        "ON CONFLICT (name) DO UPDATE SET value = EXCLUDED.value"
+                    ), {"name": name})
+        logger.info("✅ Statistics counters migration complete!")
+    except Exception as e:
+        logger.error(f"❌ Migration failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    migrate()
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, Enum, ForeignKey
-from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy import Column, Integer, BigInteger, String, Date, DateTime, Text, Boolean, Enum, ForeignKey, Index, JSON
+from sqlalchemy.orm import relationship, validates
+from sqlalchemy.sql import func, text
 from database import Base
+from phones import normalize_phone
 import enum
 
 
@@ -11,6 +12,7 @@ class MessageStatus(str, enum.Enum):
     DELIVERED = "delivered"
     FAILED = "failed"
     QUEUED = "queued"
+    CANCELLED = "cancelled"
 
 
 class MessageType(str, enum.Enum):
@@ -28,7 +30,9 @@ class Contact(Base):
     city = Column(String)
     state_zip = Column(String)
     phone = Column(String, nullable=False, index=True)
+    phone_normalized = Column(String, nullable=True, index=True)  # E.164, set from phone
     preferred_language = Column(String, default="english")
+    timezone = Column(String, nullable=True)  # IANA name; derived from state_zip when NULL
     active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -36,6 +40,21 @@ class Contact(Base):
     # Relationships
     messages = relationship("Message", back_populates="contact")
     call_logs = relationship("CallLog", back_populates="contact")
+    
+    __table_args__ = (
+        # Keyset pagination over active contacts
+        Index("ix_contacts_active_id", "active", "id"),
+        # One active contact per number; deactivated contacts keep theirs
+        Index(
+            "ux_contacts_phone_normalized_active", "phone_normalized", unique=True,
+            postgresql_where=text("active"), sqlite_where=text("active")
+        ),
+    )
+    
+    @validates("phone")
+    def _normalize_phone(self, key, value):
+        self.phone_normalized = normalize_phone(value)
+        return value
 
 
 class Message(Base):
@@ -43,17 +62,30 @@ class Message(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     contact_id = Column(Integer, ForeignKey("contacts.id"), nullable=False)
+    campaign_id = Column(Integer, ForeignKey("campaigns.id"), nullable=True)  # set for bulk sends
     message_type = Column(Enum(MessageType), nullable=False)
     content = Column(Text, nullable=False)
     status = Column(Enum(MessageStatus), default=MessageStatus.PENDING)
     scheduled_at = Column(DateTime(timezone=True), nullable=True)
     sent_at = Column(DateTime(timezone=True), nullable=True)
-    twilio_sid = Column(String, nullable=True)
+    twilio_sid = Column(String, nullable=True, index=True)  # status callbacks look messages up by sid
     error_message = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     contact = relationship("Contact", back_populates="messages")
+    
+    __table_args__ = (
+        # Keyset pagination of a contact's messages, newest first
+        Index("ix_messages_contact_id_id", "contact_id", "id"),
+        # Deferred delivery: pending messages whose scheduled_at has passed
+        Index("ix_messages_status_scheduled_at", "status", "scheduled_at"),
+        # A campaign's messages, for cancellation and per-campaign listing
+        Index("ix_messages_campaign_id_id", "campaign_id", "id"),
+        # Analytics rollups re-read recent hours by send and creation time
+        Index("ix_messages_sent_at", "sent_at"),
+        Index("ix_messages_created_at", "created_at"),
+    )
 
 
 class CallLog(Base):
@@ -65,10 +97,10 @@ class CallLog(Base):
     caller_name = Column(String, nullable=True)
     direction = Column(String, nullable=False)  # inbound or outbound
     duration = Column(Integer, default=0)  # in seconds
-    twilio_call_sid = Column(String, nullable=True)
+    twilio_call_sid = Column(String, nullable=True, index=True)  # voice webhooks look calls up by sid
     conversation_summary = Column(Text, nullable=True)
     language_detected = Column(String, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # analytics rollups
     
     # Relationships
     contact = relationship("Contact", back_populates="call_logs")
@@ -87,8 +119,67 @@ class ScheduledReminder(Base):
     schedule_date = Column(DateTime(timezone=True), nullable=True)  # for one-time
     active = Column(Boolean, default=True)
     send_to_all = Column(Boolean, default=True)
+    segment_id = Column(Integer, ForeignKey("segments.id"), nullable=True)  # used when send_to_all is False
+    next_run_at = Column(DateTime(timezone=True), nullable=True)  # UTC; NULL once nothing is left to fire
+    last_run_at = Column(DateTime(timezone=True), nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    __table_args__ = (
+        # Beat tick: active reminders with next_run_at <= now
+        Index("ix_scheduled_reminders_active_next_run_at", "active", "next_run_at"),
+    )
+
+
+class Segment(Base):
+    __tablename__ = "segments"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False, unique=True)
+    description = Column(Text, nullable=True)
+    kind = Column(String, nullable=False, default="group")  # group (hand-picked) or rule
+    # Rule filters; NULL means "any". Only used when kind == "rule"
+    rule_language = Column(String, nullable=True)
+    rule_city = Column(String, nullable=True)
+    rule_active = Column(Boolean, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+
+class SegmentMember(Base):
+    """Materialized segment membership; the composite primary key serves segment -> contacts"""
+    __tablename__ = "segment_members"
+    
+    segment_id = Column(Integer, ForeignKey("segments.id", ondelete="CASCADE"), primary_key=True)
+    contact_id = Column(Integer, ForeignKey("contacts.id", ondelete="CASCADE"), primary_key=True)
+    
+    __table_args__ = (
+        # contact -> segments, for incremental refresh and prompt context
+        Index("ix_segment_members_contact_id", "contact_id"),
+    )
+
+
+class Campaign(Base):
+    """One bulk send. Counters are denormalized and moved in the same
+    transaction as each message's status, so progress is a primary-key read."""
+    __tablename__ = "campaigns"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, nullable=False)
+    message_type = Column(Enum(MessageType), nullable=False)
+    content = Column(Text, nullable=False)
+    status = Column(String, nullable=False, default="running")  # running, completed, cancelled, failed
+    reminder_id = Column(Integer, ForeignKey("scheduled_reminders.id", ondelete="SET NULL"), nullable=True)
+    segment_id = Column(Integer, ForeignKey("segments.id", ondelete="SET NULL"), nullable=True)
+    fanout_complete = Column(Boolean, nullable=False, default=False)  # every message row exists
+    total = Column(Integer, nullable=False, default=0)
+    queued = Column(Integer, nullable=False, default=0)  # pending or queued, not yet attempted
+    sent = Column(Integer, nullable=False, default=0)
+    delivered = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    cancelled = Column(Integer, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
 
 
 class Conversation(Base):
@@ -101,7 +192,12 @@ class Conversation(Base):
     intent = Column(String, nullable=True)  # prayer_request, question, greeting, etc.
     language = Column(String, nullable=True)
     needs_pastoral_care = Column(Boolean, default=False)
-    timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    timestamp = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # analytics rollups
+    
+    __table_args__ = (
+        # A contact's latest turns, for prompts and summaries (scanned backwards for DESC)
+        Index("ix_conversations_contact_id_timestamp", "contact_id", "timestamp"),
+    )
 
 
 class ConversationHistory(Base):
@@ -112,3 +208,78 @@ class ConversationHistory(Base):
     role = Column(String, nullable=False)  # user or assistant
     content = Column(Text, nullable=False)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    
+    __table_args__ = (
+        # A call's turns in order, on every voice-response and call-status webhook
+        Index("ix_conversation_history_call_log_id_id", "call_log_id", "id"),
+    )
+
+
+class TableVersion(Base):
+    __tablename__ = "table_versions"
+    
+    table_name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)  # bumped on every write, drives ETags
+
+
+class StatisticsCounter(Base):
+    """Dashboard total maintained by PostgreSQL triggers (see migrate_statistics_counters.py)"""
+    __tablename__ = "statistics_counters"
+    
+    name = Column(String, primary_key=True)
+    value = Column(BigInteger, nullable=False, default=0)
+
+
+class RollupMetrics:
+    """Counters shared by the hourly and daily analytics rollups"""
+    sent = Column(Integer, nullable=False, default=0)
+    delivered = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    inbound_sms = Column(Integer, nullable=False, default=0)
+    prayer_requests = Column(Integer, nullable=False, default=0)
+    calls = Column(Integer, nullable=False, default=0)
+
+
+class AnalyticsHourly(RollupMetrics, Base):
+    """Messaging activity per UTC hour, rebuilt by the rollup_analytics task"""
+    __tablename__ = "analytics_hourly"
+    
+    bucket_start = Column(DateTime(timezone=True), primary_key=True)
+
+
+class AnalyticsDaily(RollupMetrics, Base):
+    """Messaging activity per day in CHURCH_TIMEZONE, summed from analytics_hourly"""
+    __tablename__ = "analytics_daily"
+    
+    day = Column(Date, primary_key=True)
+
+
+class RollupWatermark(Base):
+    """Earliest bucket a rollup still has to (re)compute"""
+    __tablename__ = "rollup_watermarks"
+    
+    name = Column(String, primary_key=True)
+    value = Column(DateTime(timezone=True), nullable=False)
+
+
+class OutboxEvent(Base):
+    """Celery task waiting to be published; written in the same transaction
+    as the rows it refers to and deleted once the relay has published it"""
+    __tablename__ = "outbox_events"
+    
+    id = Column(Integer, primary_key=True)
+    task_name = Column(String, nullable=False)
+    args = Column(JSON, nullable=False, default=list)
+    kwargs = Column(JSON, nullable=False, default=dict)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class DeadLetter(Base):
+    """A message whose send failed after every retry, kept for inspection and requeue"""
+    __tablename__ = "dead_letters"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    message_id = Column(Integer, ForeignKey("messages.id", ondelete="CASCADE"), nullable=False, unique=True)
+    error = Column(Text, nullable=True)
+    attempts = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
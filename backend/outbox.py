@@ -0,0 +1,88 @@
+"""
+Transactional outbox for Celery tasks.
+Code that creates messages calls `enqueue` instead of `task.delay`, so the
+task is recorded in the same transaction as the rows it refers to: nothing is
+published for a rolled-back write, and no worker can run before the commit.
+`publish_batch` moves committed events to the broker over one connection.
+Callers that can, pass the events they enqueued to `publish_now` right after
+committing; the relay and the relay_outbox task publish whatever that misses
+(a crash, or a broker error).
+"""
+from sqlalchemy import inspect
+from sqlalchemy.orm import Session
+from config import settings
+from models import OutboxEvent, MessageType
+from typing import List
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue(db: Session, task_name: str, *args, **kwargs) -> OutboxEvent:
+    """Record a task to publish once the caller's transaction commits"""
+    event = OutboxEvent(task_name=task_name, args=list(args), kwargs=kwargs)
+    db.add(event)
+    return event
+
+
+def enqueue_chunks(db: Session, task_name: str, ids: List[int], chunk_size: int) -> List[OutboxEvent]:
+    """One event per `chunk_size` ids, e.g. for send_sms_batch_task"""
+    return [enqueue(db, task_name, ids[i:i + chunk_size]) for i in range(0, len(ids), chunk_size)]
+
+
+def enqueue_sends(db: Session, messages, interactive: bool = False) -> List[OutboxEvent]:
+    """Events for queued messages (rows with id, contact_id and message_type):
+    SMS in SEND_CHUNK_SIZE batches on the bulk queue, or one send_sms_task
+    each on the interactive queue; one event per call"""
+    sms_ids = [row.id for row in messages if row.message_type == MessageType.SMS]
+    if interactive:
+        events = [enqueue(db, "send_sms_task", message_id) for message_id in sms_ids]
+    else:
+        events = enqueue_chunks(db, "send_sms_batch_task", sms_ids, settings.SEND_CHUNK_SIZE)
+    for row in messages:
+        if row.message_type != MessageType.SMS:
+            events.append(enqueue(db, "make_call_task", row.contact_id, message_id=row.id))
+    return events
+
+
+def publish_batch(db: Session, celery_app, limit: int) -> int:
+    """Publish up to `limit` events and delete them. Events are claimed with
+    FOR UPDATE SKIP LOCKED so several relays can run side by side. Delivery
+    is at-least-once: if the commit after publishing fails, the events are
+    published again and the tasks skip messages that are no longer queued."""
+    return _publish(db, celery_app, db.query(OutboxEvent).order_by(OutboxEvent.id).limit(limit))
+
+
+def publish_now(db: Session, celery_app, events: List[OutboxEvent]) -> int:
+    """Publish events the caller has just committed, without waiting for the
+    relay. Never raises: events it can't publish stay for the relay."""
+    # identity survives the commit's expiry without reloading the rows
+    ids = [identity[0] for identity in (inspect(event).identity for event in events) if identity]
+    if not ids:
+        return 0
+    try:
+        return _publish(db, celery_app, db.query(OutboxEvent).filter(OutboxEvent.id.in_(ids)).order_by(OutboxEvent.id))
+    except Exception as e:
+        db.rollback()
+        logger.warning(f"Outbox fast path failed, leaving {len(ids)} events to the relay: {str(e)}")
+        return 0
+
+
+def _publish(db: Session, celery_app, query) -> int:
+    events = query.with_for_update(skip_locked=True).all()
+    if not events:
+        return 0
+
+    published = []
+    try:
+        with celery_app.producer_or_acquire() as producer:
+            for event in events:
+                celery_app.send_task(event.task_name, args=event.args, kwargs=event.kwargs, producer=producer)
+                published.append(event.id)
+    except Exception as e:
+        logger.error(f"Outbox publish failed after {len(published)} of {len(events)} events: {str(e)}")
+    finally:
+        if published:
+            db.query(OutboxEvent).filter(OutboxEvent.id.in_(published)).delete(synchronize_session=False)
+        db.commit()
+    return len(published)
@@ -0,0 +1,44 @@
+"""
+Outbox relay: publishes committed outbox_events to Celery.
+Run one or more alongside the workers:
+
+    python outbox_relay.py
+
+Each pass claims up to OUTBOX_RELAY_BATCH events with SKIP LOCKED, publishes
+them over one broker connection and deletes them. When the outbox is empty
+the relay sleeps OUTBOX_POLL_INTERVAL seconds. The relay_outbox beat task
+sweeps the outbox too, in case no relay process is running.
+"""
+
+from config import settings
+from database import SessionLocal
+from outbox import publish_batch
+from tasks import celery_app
+import logging
+import time
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def run():
+    logger.info("✅ Outbox relay started")
+    while True:
+        db = SessionLocal()
+        try:
+            published = publish_batch(db, celery_app, settings.OUTBOX_RELAY_BATCH)
+            if published:
+                logger.info(f"Published {published} outbox events")
+        except Exception as e:
+            db.rollback()
+            published = 0
+            logger.error(f"❌ Outbox relay error: {e}")
+        finally:
+            db.close()
+        
+        if published < settings.OUTBOX_RELAY_BATCH:
+            time.sleep(settings.OUTBOX_POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    run()
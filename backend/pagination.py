@@ -0,0 +1,39 @@
+"""
+Keyset (cursor) pagination helpers.
+Cursors are opaque URL-safe tokens that encode the id of the last row on a
+page, so the next page is a primary-key range scan instead of OFFSET.
+"""
+from fastapi import HTTPException
+from typing import Optional
+import base64
+import json
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(row_id: int) -> str:
+    """Encode the id of the last row on a page as an opaque token"""
+    raw = json.dumps({"id": row_id}, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """Decode a cursor token, raising 400 if it was tampered with"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))["id"])
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+
+def apply_cursor(query, model, cursor: Optional[str], newest_first: bool = False):
+    """Order `query` by id and resume after the row encoded in `cursor`.
+    Ids are assigned at insert time, so newest_first matches created_at order."""
+    if newest_first:
+        if cursor:
+            query = query.filter(model.id < decode_cursor(cursor))
+        return query.order_by(model.id.desc())
+
+    if cursor:
+        query = query.filter(model.id > decode_cursor(cursor))
+    return query.order_by(model.id.asc())
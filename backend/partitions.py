@@ -0,0 +1,93 @@
+"""
+Monthly range partitions for the append-only history tables.
+On PostgreSQL, migrate_partitioning.py turns messages, conversations and
+conversation_history into tables partitioned by month on their timestamp
+column, named like `messages_p2026_10`, plus a `<table>_default` partition
+for stray rows. The maintain_partitions task keeps PARTITION_MONTHS_AHEAD
+months created in advance. Other databases keep plain tables; the archiver
+deletes rows from them by range instead of dropping partitions.
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from datetime import datetime, timezone
+from typing import Iterator, Optional, Tuple
+from config import settings
+from models import Message, Conversation, ConversationHistory
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Partitioned table -> the timestamp column it is partitioned on
+PARTITIONED = {
+    Message.__tablename__: Message.created_at,
+    Conversation.__tablename__: Conversation.timestamp,
+    ConversationHistory.__tablename__: ConversationHistory.timestamp,
+}
+
+
+def month_start(moment: datetime) -> datetime:
+    """First instant of `moment`'s UTC month"""
+    moment = moment.astimezone(timezone.utc) if moment.tzinfo else moment.replace(tzinfo=timezone.utc)
+    return moment.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def months(first: datetime, stop: datetime) -> Iterator[Tuple[datetime, datetime]]:
+    """(start, end) of every month from `first`'s up to, not including, `stop`'s"""
+    month = month_start(first)
+    while month < stop:
+        following = add_months(month, 1)
+        yield month, following
+        month = following
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month.year:04d}_{month.month:02d}"
+
+
+def is_partitioned(conn: Connection, table: str) -> bool:
+    if conn.dialect.name != "postgresql":
+        return False
+    return bool(conn.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+        {"table": table}
+    ).scalar())
+
+
+def partition_exists(conn: Connection, table: str, month: datetime) -> bool:
+    return conn.execute(
+        text("SELECT to_regclass(:name) IS NOT NULL"), {"name": partition_name(table, month)}
+    ).scalar()
+
+
+def create_partition(conn: Connection, table: str, month: datetime):
+    """Create `table`'s partition for `month` unless it exists. Fails if the
+    default partition already holds rows for that month."""
+    if partition_exists(conn, table, month):
+        return
+    start, end = month, add_months(month, 1)
+    conn.execute(text(
+        f"CREATE TABLE {partition_name(table, month)} PARTITION OF {table} "
+        f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+    logger.info(f"Created partition {partition_name(table, month)}")
+
+
+def ensure_partitions(conn: Connection, first: Optional[datetime] = None, now: Optional[datetime] = None) -> int:
+    """Create every partitioned table's months from `first` (default: this
+    month) through PARTITION_MONTHS_AHEAD months from now; returns how many
+    tables were partitioned"""
+    current = month_start(now or datetime.now(timezone.utc))
+    stop = add_months(current, settings.PARTITION_MONTHS_AHEAD + 1)
+    partitioned = 0
+    for table in PARTITIONED:
+        if not is_partitioned(conn, table):
+            continue
+        partitioned += 1
+        for month, _ in months(first or current, stop):
+            create_partition(conn, table, month)
+    return partitioned
@@ -0,0 +1,23 @@
+"""
+Phone number normalization.
+Contacts are matched on `contacts.phone_normalized`, the E.164 form of the
+stored number, so a Twilio `From` of "+19097630454" finds a contact imported
+as "(909) 763-0454". North American numbers get +1; 7-digit numbers are
+local to the church's 909 area code.
+"""
+import re
+from typing import Optional
+
+
+def normalize_phone(value: Optional[str]) -> Optional[str]:
+    """E.164 form of `value`, or None if it has no digits"""
+    digits = re.sub(r"\D", "", str(value or ""))
+    if not digits:
+        return None
+    if len(digits) == 10:
+        return f"+1{digits}"
+    if len(digits) == 11 and digits[0] == "1":
+        return f"+{digits}"
+    if len(digits) == 7:
+        return f"+1909{digits}"
+    return f"+{digits}"
@@ -0,0 +1,122 @@
+"""
+Connection pool instrumentation.
+Engines are built on these pool classes so each process can report how its
+pool is used: connections checked out, overflow in use, how long checkouts
+wait and how many time out. /health/db shows the API process's pools and
+the latest report from every Celery worker process, which publish theirs to
+Redis after tasks (at most every POOL_REPORT_INTERVAL seconds).
+"""
+from sqlalchemy import exc
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+from config import settings
+import json
+import logging
+import threading
+import time
+import redis
+
+logger = logging.getLogger(__name__)
+
+WORKER_REPORTS_KEY = "db_pool_worker_reports"
+POOL_REPORT_INTERVAL = 30  # seconds between reports from one worker process
+
+
+class _InstrumentedPool:
+    """Times every checkout, including waits for a free connection, and counts timeouts"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.stats = {
+            "checkouts": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "timeouts": 0,
+        }
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            connection = super().connect()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.stats["timeouts"] += 1
+            raise
+        waited = time.perf_counter() - started
+        with self._stats_lock:
+            self.stats["checkouts"] += 1
+            self.stats["wait_seconds_total"] += waited
+            self.stats["wait_seconds_max"] = max(self.stats["wait_seconds_max"], waited)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPool, QueuePool):
+    pass
+
+
+class InstrumentedAsyncPool(_InstrumentedPool, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(engine) -> dict:
+    """Current usage and lifetime checkout statistics of an engine's pool"""
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if not isinstance(pool, QueuePool):
+        return status  # NullPool/StaticPool: nothing is held between requests
+
+    status.update({
+        "size": pool.size(),
+        "max_overflow": pool._max_overflow,
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+        "timeout_seconds": pool.timeout(),
+    })
+    stats = getattr(pool, "stats", None)
+    if stats:
+        with pool._stats_lock:
+            status.update(stats)
+        status["wait_ms_avg"] = (
+            status["wait_seconds_total"] * 1000 / status["checkouts"] if status["checkouts"] else 0.0
+        )
+    return status
+
+
+_redis = None
+
+
+def _get_redis():
+    global _redis
+    if _redis is None:
+        _redis = redis.Redis.from_url(settings.REDIS_URL)
+    return _redis
+
+
+def publish_worker_report(worker: str, report: dict):
+    """Store one worker process's pool report for /health/db"""
+    try:
+        _get_redis().hset(WORKER_REPORTS_KEY, worker, json.dumps({**report, "reported_at": time.time()}))
+    except redis.RedisError as e:
+        logger.debug(f"Could not publish pool report: {str(e)}")
+
+
+def worker_reports() -> dict:
+    """Recent pool reports by worker process; stale ones (exited processes) are dropped"""
+    try:
+        raw = _get_redis().hgetall(WORKER_REPORTS_KEY)
+    except redis.RedisError as e:
+        logger.warning(f"Could not read worker pool reports: {str(e)}")
+        return {}
+
+    cutoff = time.time() - POOL_REPORT_INTERVAL * 10
+    reports, stale = {}, []
+    for worker, value in raw.items():
+        report = json.loads(value)
+        if report["reported_at"] < cutoff:
+            stale.append(worker)
+        else:
+            reports[worker.decode()] = report
+    if stale:
+        _get_redis().hdel(WORKER_REPORTS_KEY, *stale)
+    return reports
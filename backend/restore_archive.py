@@ -0,0 +1,48 @@
+"""
+Restore archived history rows.
+Loads gzip NDJSON files written by the archive_history task back into
+messages, conversations or conversation_history, creating any partitions
+they need. Rows that are already present are skipped, so a file can be
+restored twice. Raise or clear ARCHIVE_AFTER_MONTHS first, or the next
+archive run moves the restored months out again.
+
+Usage: python restore_archive.py archive/messages/messages_2024_01.ndjson.gz [more files or directories]
+"""
+
+from services.archive_service import archive_service, FILE_PATTERN
+import argparse
+import logging
+import os
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def archive_files(paths):
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                yield from sorted(os.path.join(root, name) for name in names if FILE_PATTERN.match(name))
+        else:
+            yield path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("paths", nargs="+", help="archive files, or directories to restore every file in")
+    args = parser.parse_args()
+
+    try:
+        total = 0
+        for path in archive_files(args.paths):
+            restored = archive_service.restore(path)
+            logger.info(f"Restored {restored} rows from {path}")
+            total += restored
+        logger.info(f"✅ Restore complete: {total} rows")
+    except Exception as e:
+        logger.error(f"❌ Restore failed: {e}")
+        raise
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.orm import Session
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from config import settings
+from database import get_read_db
+from schemas import AnalyticsTimeseriesResponse
+from services.analytics_service import analytics_service, METRICS, GRANULARITIES
+from services.reminder_scheduler import as_utc
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/analytics", tags=["Analytics"])
+
+# Window served when the request gives no start
+DEFAULT_SPAN = {"hour": timedelta(hours=48), "day": timedelta(days=30)}
+BUCKET_SIZE = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+
+
+@router.get("/timeseries", response_model=AnalyticsTimeseriesResponse)
+def get_timeseries(
+    granularity: str = "day",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    metrics: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """Messaging activity per hour or day for dashboard charts, read from the
+    rollup tables. `metrics` is a comma-separated subset of the defaults."""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(status_code=400, detail=f"granularity must be one of {', '.join(GRANULARITIES)}")
+
+    selected = [m.strip() for m in metrics.split(",") if m.strip()] if metrics else list(METRICS)
+    unknown = [m for m in selected if m not in METRICS]
+    if unknown or not selected:
+        raise HTTPException(status_code=400, detail=f"metrics must be among {', '.join(METRICS)}")
+
+    end = as_utc(end) if end else datetime.now(timezone.utc)
+    start = as_utc(start) if start else end - DEFAULT_SPAN[granularity]
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    if (end - start) / BUCKET_SIZE[granularity] > settings.ANALYTICS_MAX_BUCKETS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"At most {settings.ANALYTICS_MAX_BUCKETS} buckets per request; use a coarser granularity"
+        )
+
+    return {
+        "granularity": granularity,
+        "timezone": "UTC" if granularity == "hour" else settings.CHURCH_TIMEZONE,
+        "metrics": selected,
+        "buckets": analytics_service.timeseries(db, granularity, start, end, selected),
+    }
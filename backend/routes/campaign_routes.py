@@ -0,0 +1,57 @@
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from database import get_db, get_read_db
+from models import Campaign
+from schemas import CampaignResponse
+from services.campaign_service import campaign_service
+from pagination import encode_cursor, apply_cursor
+from row_reads import select_columns, fetch_rows, rows_response
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/campaigns", tags=["Campaigns"])
+
+
+@router.get("", response_model=List[CampaignResponse])
+def list_campaigns(
+    limit: int = 50,
+    status: Optional[str] = None,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """List campaigns, newest first.
+    Pass the X-Next-Cursor header back as `cursor` to fetch the next page."""
+    query = select_columns(Campaign, CampaignResponse)
+    if status:
+        query = query.filter(Campaign.status == status)
+
+    query = apply_cursor(query, Campaign, cursor, newest_first=True)
+    campaigns = fetch_rows(db, query.limit(limit))
+    next_cursor = encode_cursor(campaigns[-1]["id"]) if len(campaigns) == limit else None
+    return rows_response(campaigns, next_cursor)
+
+
+@router.get("/{campaign_id}", response_model=CampaignResponse)
+def get_campaign(campaign_id: int, db: Session = Depends(get_read_db)):
+    """Campaign progress; counters are read from the campaign row, not its messages"""
+    campaign = campaign_service.get(db, campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    return campaign
+
+
+@router.post("/{campaign_id}/cancel", response_model=CampaignResponse)
+def cancel_campaign(campaign_id: int, db: Session = Depends(get_db)):
+    """Cancel a running or failed campaign; messages not yet sent are skipped"""
+    campaign = campaign_service.get(db, campaign_id)
+    if not campaign:
+        raise HTTPException(status_code=404, detail="Campaign not found")
+    if campaign.status not in ("running", "failed"):
+        raise HTTPException(status_code=409, detail=f"Campaign is already {campaign.status}")
+
+    campaign_service.cancel(db, campaign)
+    db.commit()
+    db.refresh(campaign)
+    return campaign
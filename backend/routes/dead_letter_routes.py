@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from database import get_db, get_read_db
+from models import DeadLetter, Message
+from schemas import DeadLetterResponse, DeadLetterRequeue
+from services.dead_letter_service import dead_letter_service
+from auth_routes import get_current_admin
+from auth_models import User
+from pagination import encode_cursor, apply_cursor
+from row_reads import fetch_rows, rows_response
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/dead-letters", tags=["Dead Letters"])
+
+
+@router.get("", response_model=List[DeadLetterResponse])
+def list_dead_letters(
+    limit: int = 100,
+    campaign_id: Optional[int] = None,
+    cursor: Optional[str] = None,
+    db: Session = Depends(get_read_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Messages that failed after every retry, oldest first (Admin only)"""
+    query = select(
+        DeadLetter.id,
+        DeadLetter.message_id,
+        Message.contact_id,
+        Message.campaign_id,
+        Message.message_type,
+        DeadLetter.error,
+        DeadLetter.attempts,
+        DeadLetter.created_at
+    ).join(Message, Message.id == DeadLetter.message_id)
+    if campaign_id:
+        query = query.where(Message.campaign_id == campaign_id)
+    query = apply_cursor(query, DeadLetter, cursor)
+
+    entries = fetch_rows(db, query.limit(limit))
+    next_cursor = encode_cursor(entries[-1]["id"]) if len(entries) == limit else None
+    return rows_response(entries, next_cursor)
+
+
+@router.post("/requeue")
+def requeue_dead_letters(
+    request: DeadLetterRequeue,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_admin)
+):
+    """Send dead-lettered messages again (Admin only)"""
+    requeued = dead_letter_service.requeue(db, request.ids, limit=request.limit)
+    db.commit()
+    logger.info(f"{current_user.email} requeued {requeued} dead-lettered messages")
+    return {"success": True, "requeued": requeued}
@@ -2,9 +2,12 @@ from fastapi import APIRouter, HTTPException, Depends
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 from services.llm_service import llm_service
+from services.segment_service import segment_service
+from services.conversation_window import conversation_window, as_history
 from models import Conversation, Contact
-from database import get_db
-from sqlalchemy.orm import Session
+from database import get_async_db, get_async_read_db
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 import logging
 
@@ -48,7 +51,7 @@ class TranslateRequest(BaseModel):
 @router.post("/interpret", response_model=MessageInterpretResponse)
 async def interpret_message(
     request: MessageInterpretRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Interpret a message using LLM to detect intent, language, and generate appropriate reply.
@@ -58,17 +61,7 @@ async def interpret_message(
         # Get conversation history if contact_id provided
         conversation_history = []
         if request.contact_id:
-            conversations = db.query(Conversation).filter(
-                Conversation.contact_id == request.contact_id
-            ).order_by(Conversation.timestamp.desc()).limit(10).all()
-            
-            conversation_history = [
-                {
-                    "role": "user" if conv.direction == "inbound" else "assistant",
-                    "content": conv.message
-                }
-                for conv in reversed(conversations)
-            ]
+            conversation_history = as_history(await conversation_window.recent(db, request.contact_id))
         
         # Detect language
         detected_language = await llm_service.detect_language(request.message)
@@ -140,7 +133,7 @@ Keep it concise (under 160 characters for SMS compatibility).
 @router.post("/reply", response_model=GenerateReplyResponse)
 async def generate_reply(
     request: GenerateReplyRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Generate an intelligent, context-aware reply for a contact's message.
@@ -148,36 +141,29 @@ async def generate_reply(
     """
     try:
         # Get contact details
-        contact = db.query(Contact).filter(Contact.id == request.contact_id).first()
+        contact = await db.get(Contact, request.contact_id)
         if not contact:
             raise HTTPException(status_code=404, detail="Contact not found")
         
         # Get conversation history
         conversation_history = []
         if request.include_context:
-            conversations = db.query(Conversation).filter(
-                Conversation.contact_id == request.contact_id
-            ).order_by(Conversation.timestamp.desc()).limit(10).all()
-            
-            conversation_history = [
-                {
-                    "role": "user" if conv.direction == "inbound" else "assistant",
-                    "content": conv.message,
-                    "timestamp": conv.timestamp.isoformat()
-                }
-                for conv in reversed(conversations)
-            ]
+            conversation_history = as_history(
+                await conversation_window.recent(db, request.contact_id), with_timestamps=True
+            )
+        
+        groups = ", ".join(await db.run_sync(segment_service.names_for, contact.id)) or "General"
         
         # Enhance system prompt with contact context
         enhanced_prompt = f"""You are responding to {contact.name}, a member of our church community.
 
 Contact Information:
 - Name: {contact.name}
-- Preferred Language: {contact.language}
-- Group: {contact.group if hasattr(contact, 'group') else 'General'}
+- Preferred Language: {contact.preferred_language}
+- Group: {groups}
 - Previous conversations: {len(conversation_history)}
 
-Respond in a warm, pastoral manner in their preferred language ({contact.language}).
+Respond in a warm, pastoral manner in their preferred language ({contact.preferred_language}).
 Reference previous conversations when relevant to show you remember them.
 Keep responses concise and appropriate for SMS/text messaging.
 """
@@ -242,29 +228,31 @@ Return only the translation, no explanations.
 async def personalize_message(
     template: str,
     contact_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Personalize a message template for a specific contact.
     Useful for bulk messaging with personal touches.
     """
     try:
-        contact = db.query(Contact).filter(Contact.id == contact_id).first()
+        contact = await db.get(Contact, contact_id)
         if not contact:
             raise HTTPException(status_code=404, detail="Contact not found")
         
+        groups = ", ".join(await db.run_sync(segment_service.names_for, contact.id)) or "General"
+        
         personalization_prompt = f"""Personalize this message template for {contact.name}.
 
 Template: {template}
 
 Contact details:
 - Name: {contact.name}
-- Language: {contact.language}
-- Group: {contact.group if hasattr(contact, 'group') else 'General'}
+- Language: {contact.preferred_language}
+- Group: {groups}
 
 Instructions:
 1. Replace generic greetings with their name
-2. Translate to {contact.language} if needed
+2. Translate to {contact.preferred_language} if needed
 3. Add culturally appropriate touches
 4. Keep the core message the same
 5. Keep it concise (under 160 characters if possible)
@@ -278,7 +266,7 @@ Return only the personalized message.
             "original_template": template,
             "personalized_message": personalized,
             "contact_name": contact.name,
-            "language": contact.language
+            "language": contact.preferred_language
         }
         
     except HTTPException:
@@ -291,20 +279,22 @@ Return only the personalized message.
 @router.get("/conversation/{contact_id}")
 async def get_conversation_summary(
     contact_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Get an AI-generated summary of conversations with a contact.
     Useful for pastoral review and context understanding.
     """
     try:
-        contact = db.query(Contact).filter(Contact.id == contact_id).first()
+        contact = await db.get(Contact, contact_id)
         if not contact:
             raise HTTPException(status_code=404, detail="Contact not found")
         
-        conversations = db.query(Conversation).filter(
-            Conversation.contact_id == contact_id
-        ).order_by(Conversation.timestamp.desc()).limit(50).all()
+        conversations = (await db.execute(
+            select(Conversation).where(
+                Conversation.contact_id == contact_id
+            ).order_by(Conversation.timestamp.desc()).limit(50)
+        )).scalars().all()
         
         if not conversations:
             return {
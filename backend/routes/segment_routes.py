@@ -0,0 +1,126 @@
+from fastapi import APIRouter, HTTPException, Depends
+from sqlalchemy.orm import Session
+from typing import List
+from database import get_db, get_read_db
+from models import Segment, SegmentMember, ScheduledReminder
+from schemas import SegmentCreate, SegmentResponse, SegmentMembersUpdate, ContactResponse
+from services.segment_service import segment_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/segments", tags=["Segments"])
+
+SEGMENT_KINDS = ("group", "rule")
+
+
+def _get_segment_or_404(db: Session, segment_id: int) -> Segment:
+    segment = segment_service.get(db, segment_id)
+    if not segment:
+        raise HTTPException(status_code=404, detail="Segment not found")
+    return segment
+
+
+def _to_response(segment: Segment, member_count: int) -> SegmentResponse:
+    response = SegmentResponse.model_validate(segment)
+    response.member_count = member_count
+    return response
+
+
+@router.post("", response_model=SegmentResponse)
+def create_segment(segment: SegmentCreate, db: Session = Depends(get_db)):
+    """Create a hand-picked group or a rule-based segment"""
+    if segment.kind not in SEGMENT_KINDS:
+        raise HTTPException(status_code=400, detail=f"kind must be one of {', '.join(SEGMENT_KINDS)}")
+    if db.query(Segment).filter(Segment.name == segment.name).first():
+        raise HTTPException(status_code=409, detail="Segment name already exists")
+
+    db_segment = Segment(**segment.dict(exclude={"contact_ids"}))
+    db.add(db_segment)
+    db.flush()
+
+    if db_segment.kind == "rule":
+        segment_service.rebuild(db, db_segment)
+    elif segment.contact_ids:
+        segment_service.add_members(db, db_segment, segment.contact_ids)
+
+    db.commit()
+    db.refresh(db_segment)
+    return _to_response(db_segment, segment_service.member_counts(db).get(db_segment.id, 0))
+
+
+@router.get("", response_model=List[SegmentResponse])
+def list_segments(db: Session = Depends(get_read_db)):
+    """List segments with their member counts"""
+    counts = segment_service.member_counts(db)
+    segments = db.query(Segment).order_by(Segment.name).all()
+    return [_to_response(s, counts.get(s.id, 0)) for s in segments]
+
+
+@router.get("/{segment_id}/members", response_model=List[ContactResponse])
+def list_segment_members(
+    segment_id: int,
+    active_only: bool = True,
+    db: Session = Depends(get_read_db)
+):
+    """Contacts in a segment"""
+    _get_segment_or_404(db, segment_id)
+    return segment_service.recipients(db, segment_id, active_only=active_only).all()
+
+
+@router.post("/{segment_id}/members")
+def add_segment_members(
+    segment_id: int,
+    update: SegmentMembersUpdate,
+    db: Session = Depends(get_db)
+):
+    """Add contacts to a group"""
+    segment = _get_segment_or_404(db, segment_id)
+    if segment.kind != "group":
+        raise HTTPException(status_code=400, detail="Rule segment membership is computed from its rules")
+
+    added = segment_service.add_members(db, segment, update.contact_ids)
+    db.commit()
+    return {"success": True, "added": added}
+
+
+@router.delete("/{segment_id}/members/{contact_id}")
+def remove_segment_member(segment_id: int, contact_id: int, db: Session = Depends(get_db)):
+    """Remove a contact from a group"""
+    segment = _get_segment_or_404(db, segment_id)
+    if segment.kind != "group":
+        raise HTTPException(status_code=400, detail="Rule segment membership is computed from its rules")
+
+    if not segment_service.remove_member(db, segment, contact_id):
+        raise HTTPException(status_code=404, detail="Contact is not in this segment")
+    db.commit()
+    return {"message": "Contact removed from segment"}
+
+
+@router.post("/{segment_id}/refresh", response_model=SegmentResponse)
+def refresh_segment(segment_id: int, db: Session = Depends(get_db)):
+    """Recompute a rule segment from scratch"""
+    segment = _get_segment_or_404(db, segment_id)
+    segment_service.rebuild(db, segment)
+    db.commit()
+    return _to_response(segment, segment_service.member_counts(db).get(segment.id, 0))
+
+
+@router.delete("/{segment_id}")
+def delete_segment(segment_id: int, db: Session = Depends(get_db)):
+    """Delete a segment and its memberships"""
+    segment = _get_segment_or_404(db, segment_id)
+    in_use = db.query(ScheduledReminder).filter(
+        ScheduledReminder.segment_id == segment.id,
+        ScheduledReminder.active == True
+    ).first()
+    if in_use:
+        raise HTTPException(status_code=409, detail=f"Segment is used by reminder '{in_use.name}'")
+    
+    db.query(ScheduledReminder).filter(ScheduledReminder.segment_id == segment.id).update(
+        {ScheduledReminder.segment_id: None}, synchronize_session=False
+    )
+    db.query(SegmentMember).filter(SegmentMember.segment_id == segment.id).delete(synchronize_session=False)
+    db.delete(segment)
+    db.commit()
+    return {"message": "Segment deleted successfully"}
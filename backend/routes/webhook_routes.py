@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Request, Form, Response
 from fastapi.responses import PlainTextResponse
-from sqlalchemy.orm import Session
-from database import get_db
-from models import Contact, Conversation
+from database import AsyncSessionLocal
+from models import Conversation
+from services.contact_lookup import contact_lookup
 from services.llm_service import llm_service
 from services.twilio_service import twilio_service
+from services.conversation_window import conversation_window, turn, as_history
 from typing import Optional
 import logging
 
@@ -25,17 +26,12 @@ async def handle_incoming_sms(
     Uses LLM to generate intelligent responses to member messages.
     """
     try:
-        from database import SessionLocal
-        db = SessionLocal()
-        
-        try:
+        async with AsyncSessionLocal() as db:
             logger.info(f"Incoming SMS from {From}: {Body}")
             
-            # Normalize phone number
+            # Find contact by phone (normalized to E.164)
             sender_phone = From.strip()
-            
-            # Find contact by phone
-            contact = db.query(Contact).filter(Contact.phone == sender_phone).first()
+            contact = await contact_lookup.by_phone_async(db, sender_phone)
             
             if not contact:
                 # Unknown number - log and send generic response
@@ -50,7 +46,7 @@ async def handle_incoming_sms(
                     language="en"
                 )
                 db.add(conv)
-                db.commit()
+                await db.commit()
                 
                 # Return TwiML response
                 return f"""<?xml version="1.0" encoding="UTF-8"?>
@@ -58,6 +54,9 @@ async def handle_incoming_sms(
     <Message>{response_text}</Message>
 </Response>"""
             
+            # Get conversation history (recent turns, before this message)
+            conversation_history = as_history(await conversation_window.recent(db, contact.id))
+            
             # Store incoming message
             incoming_conv = Conversation(
                 contact_id=contact.id,
@@ -66,20 +65,6 @@ async def handle_incoming_sms(
                 language=contact.preferred_language
             )
             db.add(incoming_conv)
-            db.flush()
-            
-            # Get conversation history (last 10 messages)
-            conversations = db.query(Conversation).filter(
-                Conversation.contact_id == contact.id
-            ).order_by(Conversation.timestamp.desc()).limit(10).all()
-            
-            conversation_history = [
-                {
-                    "role": "user" if conv.direction == "inbound" else "assistant",
-                    "content": conv.message
-                }
-                for conv in reversed(conversations[1:])  # Exclude the one we just added
-            ]
             
             # Detect language
             detected_language = await llm_service.detect_language(Body)
@@ -165,7 +150,9 @@ If this is a prayer request, acknowledge it with compassion and assure them of p
                     except Exception as e:
                         logger.error(f"Failed to alert pastor {pastor_phone}: {e}")
             
-            db.commit()
+            new_turns = [turn(incoming_conv), turn(outgoing_conv)]
+            await db.commit()
+            await conversation_window.append_async(contact.id, new_turns)
             
             # Return TwiML response with AI-generated message
             return f"""<?xml version="1.0" encoding="UTF-8"?>
@@ -173,9 +160,6 @@ If this is a prayer request, acknowledge it with compassion and assure them of p
     <Message>{ai_response}</Message>
 </Response>"""
             
-        finally:
-            db.close()
-            
     except Exception as e:
         logger.error(f"Error handling incoming SMS: {str(e)}", exc_info=True)
         
@@ -227,12 +211,9 @@ async def handle_transcription(
     try:
         logger.info(f"Transcription received from {From}: {TranscriptionText}")
         
-        from database import SessionLocal
-        db = SessionLocal()
-        
-        try:
+        async with AsyncSessionLocal() as db:
             # Find contact
-            contact = db.query(Contact).filter(Contact.phone == From).first()
+            contact = await contact_lookup.by_phone_async(db, From)
             
             if contact:
                 # Store as conversation
@@ -259,13 +240,12 @@ async def handle_transcription(
                         except Exception as e:
                             logger.error(f"Failed to alert pastor: {e}")
                 
-                db.commit()
+                new_turns = [turn(conv)]
+                await db.commit()
+                await conversation_window.append_async(contact.id, new_turns)
             
             return {"success": True, "message": "Transcription processed"}
             
-        finally:
-            db.close()
-            
     except Exception as e:
         logger.error(f"Error processing transcription: {str(e)}", exc_info=True)
         return {"success": False, "error": str(e)}
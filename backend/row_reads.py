@@ -0,0 +1,44 @@
+"""
+Lightweight read path for list endpoints.
+Selects only the response columns with a Core select() and serializes the
+row mappings straight to JSON, skipping ORM identity-map bookkeeping and
+Pydantic's from_attributes re-reads.
+"""
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from typing import List, Optional
+from pagination import NEXT_CURSOR_HEADER
+
+try:
+    import orjson
+    from fastapi.responses import ORJSONResponse as RowsResponse
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+    RowsResponse = JSONResponse
+
+
+def response_columns(model, schema) -> list:
+    """Model columns named by the fields of a response schema"""
+    return [getattr(model, field) for field in schema.model_fields]
+
+
+def select_columns(model, schema):
+    """Core select() of just the columns `schema` serializes"""
+    return select(*response_columns(model, schema))
+
+
+def fetch_rows(db: Session, statement) -> List[dict]:
+    """Execute a Core select and return plain row mappings"""
+    return [dict(row) for row in db.execute(statement).mappings()]
+
+
+def rows_response(rows: List[dict], next_cursor: Optional[str] = None):
+    """Serialize rows without Pydantic; datetimes and enums encode natively"""
+    if orjson is None:
+        from fastapi.encoders import jsonable_encoder
+        rows = jsonable_encoder(rows)
+    response = RowsResponse(content=rows)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return response
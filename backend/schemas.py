@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from datetime import datetime
 from models import MessageStatus, MessageType
 
@@ -12,6 +12,7 @@ class ContactBase(BaseModel):
     state_zip: Optional[str] = None
     phone: str
     preferred_language: str = "english"
+    timezone: Optional[str] = None  # IANA name, e.g. America/New_York
     active: bool = True
 
 
@@ -26,6 +27,7 @@ class ContactUpdate(BaseModel):
     state_zip: Optional[str] = None
     phone: Optional[str] = None
     preferred_language: Optional[str] = None
+    timezone: Optional[str] = None
     active: Optional[bool] = None
 
 
@@ -39,6 +41,12 @@ class ContactResponse(ContactBase):
         from_attributes = True
 
 
+class ContactSearchResponse(BaseModel):
+    results: List[ContactResponse]
+    took_ms: float
+    truncated: bool  # latency budget ran out before all candidates were ranked
+
+
 # Message Schemas
 class MessageBase(BaseModel):
     content: str
@@ -49,13 +57,17 @@ class MessageCreate(MessageBase):
     contact_id: Optional[int] = None
     contact_ids: Optional[List[int]] = None
     phone_numbers: Optional[List[dict]] = None  # [{id, name, phone}, ...]
+    segment_id: Optional[int] = None
     send_to_all: bool = False
     scheduled_at: Optional[datetime] = None
+    respect_send_window: Optional[bool] = None  # default: bulk sends only; False for urgent ones
+    campaign_name: Optional[str] = None  # bulk sends; defaults to the start of the content
 
 
 class MessageResponse(MessageBase):
     id: int
     contact_id: int
+    campaign_id: Optional[int] = None
     status: MessageStatus
     scheduled_at: Optional[datetime]
     sent_at: Optional[datetime]
@@ -77,11 +89,14 @@ class ScheduledReminderCreate(BaseModel):
     schedule_time: str
     schedule_date: Optional[datetime] = None
     send_to_all: bool = True
+    segment_id: Optional[int] = None  # recipients when send_to_all is False
 
 
 class ScheduledReminderResponse(ScheduledReminderCreate):
     id: int
     active: bool
+    next_run_at: Optional[datetime] = None
+    last_run_at: Optional[datetime] = None
     created_at: datetime
     updated_at: Optional[datetime]
     
@@ -89,6 +104,76 @@ class ScheduledReminderResponse(ScheduledReminderCreate):
         from_attributes = True
 
 
+# Segment Schemas
+class SegmentCreate(BaseModel):
+    name: str
+    description: Optional[str] = None
+    kind: str = "group"  # group or rule
+    rule_language: Optional[str] = None
+    rule_city: Optional[str] = None
+    rule_active: Optional[bool] = None
+    contact_ids: Optional[List[int]] = None  # initial members of a group
+
+
+class SegmentResponse(BaseModel):
+    id: int
+    name: str
+    description: Optional[str]
+    kind: str
+    rule_language: Optional[str]
+    rule_city: Optional[str]
+    rule_active: Optional[bool]
+    member_count: int = 0
+    created_at: datetime
+    
+    class Config:
+        from_attributes = True
+
+
+class SegmentMembersUpdate(BaseModel):
+    contact_ids: List[int]
+
+
+# Campaign Schemas
+class CampaignResponse(BaseModel):
+    id: int
+    name: str
+    message_type: MessageType
+    content: str
+    status: str  # running, completed, cancelled, failed
+    reminder_id: Optional[int]
+    segment_id: Optional[int]
+    fanout_complete: bool
+    total: int
+    queued: int
+    sent: int
+    delivered: int
+    failed: int
+    cancelled: int
+    created_at: datetime
+    completed_at: Optional[datetime]
+    
+    class Config:
+        from_attributes = True
+
+
+# Dead Letter Schemas
+class DeadLetterResponse(BaseModel):
+    id: int
+    message_id: int
+    contact_id: int
+    campaign_id: Optional[int]
+    message_type: MessageType
+    error: Optional[str]
+    attempts: int
+    created_at: datetime
+
+
+class DeadLetterRequeue(BaseModel):
+    ids: Optional[List[int]] = None  # omit to requeue the oldest entries
+    limit: int = 1000
+
+
 # Call Log Schemas
 class CallLogResponse(BaseModel):
     id: int
@@ -125,3 +210,10 @@ class StatisticsResponse(BaseModel):
     total_messages_sent: int
     total_calls_made: int
     scheduled_reminders: int
+
+
+class AnalyticsTimeseriesResponse(BaseModel):
+    granularity: str  # hour (UTC) or day (church timezone)
+    timezone: str
+    metrics: List[str]
+    buckets: List[Dict[str, Any]]  # {"start": ..., <metric>: count, ...}
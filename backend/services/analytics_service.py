@@ -0,0 +1,198 @@
+"""
+Messaging analytics rollups.
+analytics_hourly holds per-UTC-hour counters computed from messages,
+conversations and call_logs; analytics_daily sums those hours per day in
+CHURCH_TIMEZONE. The rollup_analytics task recomputes hours from a
+watermark onward instead of rescanning history. Delivery callbacks keep
+changing recent messages, so the watermark trails the current hour by
+ANALYTICS_SETTLE_HOURS and those hours are recomputed on every run.
+Charts read only the rollup tables, so a request costs O(buckets).
+"""
+from sqlalchemy import select, func, delete
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from datetime import datetime, date, time, timedelta, timezone
+from zoneinfo import ZoneInfo
+from typing import Dict, List, Optional, Tuple
+from config import settings
+from models import (
+    Message, Conversation, CallLog, MessageStatus,
+    AnalyticsHourly, AnalyticsDaily, RollupWatermark
+)
+from services.reminder_scheduler import as_utc
+import logging
+
+logger = logging.getLogger(__name__)
+
+METRICS = ("sent", "delivered", "failed", "inbound_sms", "prayer_requests", "calls")
+GRANULARITIES = ("hour", "day")
+WATERMARK = "analytics_hourly"
+HOUR = timedelta(hours=1)
+
+
+def floor_hour(moment: datetime) -> datetime:
+    return as_utc(moment).replace(minute=0, second=0, microsecond=0)
+
+
+def _hour_of(db: Session, column):
+    """`column` truncated to its UTC hour"""
+    if db.get_bind().dialect.name == "postgresql":
+        return func.date_trunc("hour", func.timezone("UTC", column))
+    return func.strftime("%Y-%m-%d %H:00:00", column)
+
+
+def _as_hour(value) -> datetime:
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return as_utc(value)
+
+
+def _local_day_bounds(day: date) -> Tuple[datetime, datetime]:
+    """UTC start and end of a CHURCH_TIMEZONE calendar day"""
+    zone = ZoneInfo(settings.CHURCH_TIMEZONE)
+    start = datetime.combine(day, time.min, tzinfo=zone)
+    end = datetime.combine(day + timedelta(days=1), time.min, tzinfo=zone)
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+
+class AnalyticsService:
+    @staticmethod
+    def _count_by_hour(db: Session, column, start: datetime, end: datetime, *conditions) -> Dict[datetime, int]:
+        bucket = _hour_of(db, column)
+        rows = db.execute(
+            select(bucket, func.count()).where(column >= start, column < end, *conditions).group_by(bucket)
+        ).all()
+        return {_as_hour(hour): count for hour, count in rows}
+
+    def _hourly_counts(self, db: Session, start: datetime, end: datetime) -> Dict[datetime, Dict[str, int]]:
+        """Every metric per hour in [start, end), one grouped query per metric"""
+        sent_statuses = [MessageStatus.SENT, MessageStatus.DELIVERED, MessageStatus.FAILED]
+        per_metric = {
+            "sent": self._count_by_hour(
+                db, Message.sent_at, start, end, Message.status.in_(sent_statuses)
+            ),
+            "delivered": self._count_by_hour(
+                db, Message.sent_at, start, end, Message.status == MessageStatus.DELIVERED
+            ),
+            "inbound_sms": self._count_by_hour(
+                db, Conversation.timestamp, start, end,
+                Conversation.direction == "inbound", ~Conversation.message.startswith("[Voicemail]")
+            ),
+            "prayer_requests": self._count_by_hour(
+                db, Conversation.timestamp, start, end, Conversation.intent == "prayer_request"
+            ),
+            "calls": self._count_by_hour(db, CallLog.created_at, start, end),
+        }
+        # Failures after sending count at the send; failures before it at creation
+        failed = self._count_by_hour(
+            db, Message.sent_at, start, end, Message.status == MessageStatus.FAILED
+        )
+        for hour, count in self._count_by_hour(
+            db, Message.created_at, start, end,
+            Message.status == MessageStatus.FAILED, Message.sent_at.is_(None)
+        ).items():
+            failed[hour] = failed.get(hour, 0) + count
+        per_metric["failed"] = failed
+
+        hours = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+        for metric, counts in per_metric.items():
+            for hour, count in counts.items():
+                hours[hour][metric] = count
+        return hours
+
+    def _earliest_activity(self, db: Session) -> Optional[datetime]:
+        candidates = [
+            db.query(func.min(Message.created_at)).scalar(),
+            db.query(func.min(Conversation.timestamp)).scalar(),
+            db.query(func.min(CallLog.created_at)).scalar(),
+        ]
+        candidates = [as_utc(c) for c in candidates if c]
+        return floor_hour(min(candidates)) if candidates else None
+
+    def rollup(self, db: Session, now: Optional[datetime] = None) -> int:
+        """Recompute hours from the watermark up to now and the local days they
+        touch; returns the number of hours written. Caller commits."""
+        current_hour = floor_hour(now or datetime.now(timezone.utc))
+        watermark = db.query(RollupWatermark).filter(RollupWatermark.name == WATERMARK).with_for_update().first()
+        start = as_utc(watermark.value) if watermark else self._earliest_activity(db)
+        if start is None:
+            return 0  # nothing has happened yet
+        end = min(start + settings.ANALYTICS_MAX_HOURS_PER_RUN * HOUR, current_hour + HOUR)
+
+        hours = self._hourly_counts(db, start, end)
+        db.execute(delete(AnalyticsHourly).where(
+            AnalyticsHourly.bucket_start >= start, AnalyticsHourly.bucket_start < end
+        ))
+        db.add_all([AnalyticsHourly(bucket_start=hour, **counts) for hour, counts in hours.items()])
+        db.flush()
+        self._rollup_days(db, start, end)
+
+        next_start = min(end, current_hour - settings.ANALYTICS_SETTLE_HOURS * HOUR)
+        next_start = max(next_start, start)
+        if watermark:
+            watermark.value = next_start
+        else:
+            db.add(RollupWatermark(name=WATERMARK, value=next_start))
+        logger.info(f"Rolled up {len(hours)} active hours from {start.isoformat()} to {end.isoformat()}")
+        return len(hours)
+
+    @staticmethod
+    def _rollup_days(db: Session, start: datetime, end: datetime):
+        """Re-sum every local day overlapping [start, end) from its hours"""
+        zone = ZoneInfo(settings.CHURCH_TIMEZONE)
+        first_day = start.astimezone(zone).date()
+        last_day = (end - timedelta(microseconds=1)).astimezone(zone).date()
+        range_start, _ = _local_day_bounds(first_day)
+        _, range_end = _local_day_bounds(last_day)
+
+        days = defaultdict(lambda: dict.fromkeys(METRICS, 0))
+        rows = db.query(AnalyticsHourly).filter(
+            AnalyticsHourly.bucket_start >= range_start, AnalyticsHourly.bucket_start < range_end
+        ).all()
+        for row in rows:
+            totals = days[as_utc(row.bucket_start).astimezone(zone).date()]
+            for metric in METRICS:
+                totals[metric] += getattr(row, metric)
+
+        db.execute(delete(AnalyticsDaily).where(
+            AnalyticsDaily.day >= first_day, AnalyticsDaily.day <= last_day
+        ))
+        db.add_all([AnalyticsDaily(day=day, **totals) for day, totals in days.items()])
+
+    @staticmethod
+    def timeseries(
+        db: Session,
+        granularity: str,
+        start: datetime,
+        end: datetime,
+        metrics: List[str]
+    ) -> List[dict]:
+        """Zero-filled buckets overlapping [start, end) with the requested metrics.
+        Hours are UTC; days are CHURCH_TIMEZONE dates."""
+        if granularity == "hour":
+            model, key = AnalyticsHourly, AnalyticsHourly.bucket_start
+            first, stop, step = floor_hour(start), as_utc(end), HOUR
+        else:
+            model, key = AnalyticsDaily, AnalyticsDaily.day
+            zone = ZoneInfo(settings.CHURCH_TIMEZONE)
+            first = as_utc(start).astimezone(zone).date()
+            stop = (as_utc(end) - timedelta(microseconds=1)).astimezone(zone).date() + timedelta(days=1)
+            step = timedelta(days=1)
+
+        columns = [key] + [getattr(model, metric) for metric in metrics]
+        found = {}
+        for row in db.execute(select(*columns).where(key >= first, key < stop)).all():
+            bucket = _as_hour(row[0]) if granularity == "hour" else row[0]
+            found[bucket] = row[1:]
+
+        series = []
+        bucket = first
+        while bucket < stop:
+            values = found.get(bucket, (0,) * len(metrics))
+            series.append({"start": bucket.isoformat(), **dict(zip(metrics, values))})
+            bucket += step
+        return series
+
+
+# Create singleton instance
+analytics_service = AnalyticsService()
@@ -0,0 +1,287 @@
+"""
+Archival of old history rows.
+The archive_history task moves whole UTC months older than
+ARCHIVE_AFTER_MONTHS out of messages, conversations and conversation_history
+into gzip NDJSON files under ARCHIVE_DIR/<table>/, one row per line. Rows
+are only removed once their file is on disk. On PostgreSQL a month's
+partition is first detached from its parent, in its own short step, then
+exported and dropped without locking the parent. Plain tables, and the
+default partition, are exported and deleted in one transaction. Months
+that still hold messages waiting to be sent are skipped until they go out.
+restore_archive.py loads files back.
+"""
+from sqlalchemy import Enum, DateTime, select, delete, func, text, table as table_clause, column as column_clause
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import OperationalError
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional
+from config import settings
+from database import engine, Base
+from models import Message, DeadLetter, MessageStatus
+from partitions import (
+    PARTITIONED, month_start, add_months, months, partition_name,
+    is_partitioned, partition_exists, create_partition
+)
+import gzip
+import json
+import logging
+import os
+import re
+
+logger = logging.getLogger(__name__)
+
+# Messages counted by the total_messages_sent statistics counter
+SENT_STATUSES = (MessageStatus.SENT, MessageStatus.DELIVERED)
+# Messages still to be sent; a month holding any of them isn't archived
+UNSENT_STATUSES = (MessageStatus.PENDING, MessageStatus.QUEUED)
+
+FILE_PATTERN = re.compile(r"^(?P<table>[a-z_]+?)_(?P<year>\d{4})_(?P<month>\d{2})(-\d+)?\.ndjson\.gz$")
+
+
+def _archive_path(table: str, month: datetime) -> str:
+    """A new file for the month; later runs never overwrite an earlier one"""
+    directory = os.path.join(settings.ARCHIVE_DIR, table)
+    os.makedirs(directory, exist_ok=True)
+    base = f"{table}_{month.year:04d}_{month.month:02d}"
+    path = os.path.join(directory, f"{base}.ndjson.gz")
+    suffix = 1
+    while os.path.exists(path):
+        path = os.path.join(directory, f"{base}-{suffix}.ndjson.gz")
+        suffix += 1
+    return path
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Cannot archive {type(value).__name__}")
+
+
+def _decoder(table):
+    """Row dict from an archived line, with datetimes and enums restored"""
+    converters = {}
+    for column in table.columns:
+        if isinstance(column.type, DateTime):
+            converters[column.name] = datetime.fromisoformat
+        elif isinstance(column.type, Enum) and column.type.enum_class:
+            converters[column.name] = column.type.enum_class
+
+    def decode(line: str) -> dict:
+        row = json.loads(line)
+        for name, convert in converters.items():
+            if row.get(name) is not None:
+                row[name] = convert(row[name])
+        return row
+    return decode
+
+
+class ArchiveService:
+    @staticmethod
+    def _oldest_month(conn: Connection, table: str) -> Optional[datetime]:
+        """Earliest month with rows or, on PostgreSQL, with a partition"""
+        candidates = []
+        oldest_row = conn.execute(select(func.min(PARTITIONED[table]))).scalar()
+        if oldest_row is not None:
+            candidates.append(month_start(oldest_row))
+        if is_partitioned(conn, table):
+            # By name, so a partition a failed run left detached is found too
+            names = conn.execute(
+                text("SELECT relname FROM pg_class WHERE relname LIKE :prefix"), {"prefix": f"{table}_p%"}
+            ).scalars()
+            for name in names:
+                match = re.fullmatch(rf"{table}_p(\d{{4}})_(\d{{2}})", name)
+                if match:
+                    candidates.append(datetime(int(match[1]), int(match[2]), 1, tzinfo=timezone.utc))
+        return min(candidates) if candidates else None
+
+    @staticmethod
+    def _export(conn: Connection, table: str, source, start: datetime, end: datetime) -> int:
+        """Write the month's rows of `source` (the table or one of its detached
+        partitions) to a new archive file; returns the row count"""
+        column = source.c[PARTITIONED[table].name]
+        rows = conn.execute(
+            select(source).where(column >= start, column < end).order_by(source.c.id)
+            .execution_options(yield_per=settings.ARCHIVE_BATCH_SIZE)
+        ).mappings()
+
+        path = _archive_path(table, start)
+        partial = f"{path}.partial"
+        count = 0
+        with open(partial, "wb") as raw:
+            with gzip.open(raw, "wt", encoding="utf-8") as out:
+                for row in rows:
+                    out.write(json.dumps(dict(row), default=_encode))
+                    out.write("\n")
+                    count += 1
+            raw.flush()
+            os.fsync(raw.fileno())
+        if count:
+            os.replace(partial, path)
+            logger.info(f"Archived {count} {table} rows to {path}")
+        else:
+            os.remove(partial)
+        return count
+
+    def _archive_month(self, conn: Connection, table: str, start: datetime, end: datetime) -> int:
+        """Export and delete the month's rows outside a monthly partition: plain
+        tables and the default partition"""
+        source = Base.metadata.tables[table]
+        column = source.c[PARTITIONED[table].name]
+        count = self._export(conn, table, source, start, end)
+        if table == Message.__tablename__:
+            # dead_letters can't keep a foreign key to a partitioned messages table
+            conn.execute(delete(DeadLetter).where(DeadLetter.message_id.in_(
+                select(Message.id).where(Message.created_at >= start, Message.created_at < end)
+            )))
+        # Under REPEATABLE READ this deletes exactly the rows exported
+        conn.execute(delete(source).where(column >= start, column < end))
+        return count
+
+    @staticmethod
+    def _detach(table: str, partition: str) -> bool:
+        """Detach the month's partition from its parent, outside any long
+        transaction. DETACH ... CONCURRENTLY needs no lock that blocks the
+        parent, but PostgreSQL refuses it while a default partition exists; the
+        plain DETACH then gives up after ARCHIVE_LOCK_TIMEOUT rather than queue
+        every query on the parent behind it. False if the lock wasn't granted."""
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            attached = conn.execute(
+                text("SELECT inhdetachpending FROM pg_inherits WHERE inhrelid = to_regclass(:name)"),
+                {"name": partition}
+            ).first()
+            if attached is None:
+                return True  # detached by an earlier run that failed to export it
+            if attached.inhdetachpending:
+                mode = "FINALIZE"  # an interrupted concurrent detach
+            elif conn.execute(
+                text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table) AND partdefid <> 0"),
+                {"table": table}
+            ).first():
+                mode = ""
+            else:
+                mode = "CONCURRENTLY"
+            conn.execute(text(f"SET lock_timeout = '{int(settings.ARCHIVE_LOCK_TIMEOUT * 1000)}ms'"))
+            try:
+                conn.execute(text(f"ALTER TABLE {table} DETACH PARTITION {partition} {mode}"))
+            except OperationalError as e:
+                logger.warning(f"Could not detach {partition}, will retry next run: {str(e)}")
+                return False
+            finally:
+                conn.execute(text("RESET lock_timeout"))
+        logger.info(f"Detached partition {partition}")
+        return True
+
+    def _archive_partition(self, table: str, start: datetime, end: datetime) -> Optional[int]:
+        """Detach, export and drop the month's partition; None if it couldn't be detached"""
+        partition = partition_name(table, start)
+        if not self._detach(table, partition):
+            return None
+        # Detached, nothing writes to it any more
+        source = Base.metadata.tables[table]
+        detached = table_clause(partition, *[column_clause(c.name, c.type) for c in source.columns])
+        with engine.begin() as conn:
+            count = self._export(conn, table, detached, start, end)
+            if table == Message.__tablename__:
+                conn.execute(delete(DeadLetter).where(DeadLetter.message_id.in_(select(detached.c.id))))
+                self._uncount_sent(conn, partition)
+            conn.execute(text(f"DROP TABLE {partition}"))
+        logger.info(f"Dropped partition {partition}")
+        return count
+
+    @staticmethod
+    def _has_unsent(conn: Connection, start: datetime, end: datetime) -> bool:
+        return conn.execute(
+            select(Message.id).where(
+                Message.created_at >= start, Message.created_at < end,
+                Message.status.in_(UNSENT_STATUSES)
+            ).limit(1)
+        ).first() is not None
+
+    @staticmethod
+    def _uncount_sent(conn: Connection, partition: str):
+        """Dropping a partition fires no DELETE triggers; move the counter by hand"""
+        if not conn.execute(text("SELECT to_regclass('statistics_counters') IS NOT NULL")).scalar():
+            return
+        sent = conn.execute(
+            text(f"SELECT count(*) FROM {partition} WHERE status::text = ANY(:statuses)"),
+            {"statuses": [status.name for status in SENT_STATUSES]}
+        ).scalar()
+        if sent:
+            conn.execute(text("SELECT statistics_bump('total_messages_sent', :delta)"), {"delta": -sent})
+
+    @staticmethod
+    def _snapshot() -> Connection:
+        if engine.dialect.name == "postgresql":
+            return engine.connect().execution_options(isolation_level="REPEATABLE READ")
+        return engine.connect()
+
+    def archive(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Archive every month before the horizon; returns rows archived per table"""
+        if settings.ARCHIVE_AFTER_MONTHS <= 0:
+            return {}
+        cutoff = add_months(month_start(now or datetime.now(timezone.utc)), -settings.ARCHIVE_AFTER_MONTHS)
+        archived = {}
+        for table in PARTITIONED:
+            with engine.connect() as conn:
+                oldest = self._oldest_month(conn, table)
+                partitioned = is_partitioned(conn, table)
+            if oldest is None:
+                continue
+            archived[table] = 0
+            for start, end in months(oldest, cutoff):
+                with engine.connect() as conn:
+                    if table == Message.__tablename__ and self._has_unsent(conn, start, end):
+                        # Scheduled for later or still queued; archiving would drop them unsent
+                        logger.warning(f"Skipping {table} for {start:%Y-%m}: it still has unsent messages")
+                        continue
+                    whole_partition = partitioned and partition_exists(conn, table, start)
+                if whole_partition:
+                    count = self._archive_partition(table, start, end)
+                    if count is None:
+                        continue
+                    archived[table] += count
+                # One transaction per month: its file is written before its rows go
+                with self._snapshot() as conn, conn.begin():
+                    archived[table] += self._archive_month(conn, table, start, end)
+        return archived
+
+    @staticmethod
+    def read(path: str) -> Iterator[str]:
+        with gzip.open(path, "rt", encoding="utf-8") as lines:
+            for line in lines:
+                if line.strip():
+                    yield line
+
+    def restore(self, path: str) -> int:
+        """Insert an archive file's rows back; rows already present are skipped"""
+        match = FILE_PATTERN.match(os.path.basename(path))
+        if not match or match["table"] not in PARTITIONED:
+            raise ValueError(f"Not an archive file: {path}")
+        table = Base.metadata.tables[match["table"]]
+        decode = _decoder(table)
+        restored = 0
+        batch: List[dict] = []
+        for line in self.read(path):
+            batch.append(decode(line))
+            if len(batch) == settings.ARCHIVE_BATCH_SIZE:
+                restored += self._insert(table, batch)
+                batch = []
+        if batch:
+            restored += self._insert(table, batch)
+        return restored
+
+    @staticmethod
+    def _insert(table, rows: List[dict]) -> int:
+        column = PARTITIONED[table.name].name
+        with engine.begin() as conn:
+            if is_partitioned(conn, table.name):
+                for month in {month_start(row[column]) for row in rows if row.get(column)}:
+                    create_partition(conn, table.name, month)
+            dialect = postgresql if conn.dialect.name == "postgresql" else sqlite
+            result = conn.execute(dialect.insert(table).on_conflict_do_nothing(), rows)
+            return max(result.rowcount, 0)
+
+
+# Create singleton instance
+archive_service = ArchiveService()
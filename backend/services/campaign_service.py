@@ -0,0 +1,139 @@
+"""
+Campaigns: bulk sends with live progress.
+A campaign owns its Message rows and keeps one counter per outcome. Every
+status change moves a counter with a single UPDATE in the same transaction,
+so reading progress is a primary-key lookup however many recipients there are.
+"""
+from sqlalchemy import update, func
+from sqlalchemy.orm import Session
+from typing import Optional
+from models import Campaign, Message, MessageStatus, MessageType
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Counter column for each message status
+COUNTERS = {
+    MessageStatus.PENDING: "queued",
+    MessageStatus.QUEUED: "queued",
+    MessageStatus.SENT: "sent",
+    MessageStatus.DELIVERED: "delivered",
+    MessageStatus.FAILED: "failed",
+    MessageStatus.CANCELLED: "cancelled",
+}
+
+
+class CampaignService:
+    @staticmethod
+    def create(
+        db: Session,
+        name: str,
+        message_type: MessageType,
+        content: str,
+        reminder_id: Optional[int] = None,
+        segment_id: Optional[int] = None
+    ) -> Campaign:
+        campaign = Campaign(
+            name=name,
+            message_type=message_type,
+            content=content,
+            reminder_id=reminder_id,
+            segment_id=segment_id
+        )
+        db.add(campaign)
+        db.flush()
+        return campaign
+
+    @staticmethod
+    def add_messages(db: Session, campaign_id: int, count: int) -> bool:
+        """Count `count` newly created messages; False if the campaign was cancelled"""
+        updated = db.execute(
+            update(Campaign).where(
+                Campaign.id == campaign_id,
+                Campaign.status == "running"
+            ).values(total=Campaign.total + count, queued=Campaign.queued + count)
+        ).rowcount
+        return bool(updated)
+
+    def finish_fanout(self, db: Session, campaign_id: int):
+        """Mark every message as created; the campaign completes once they are all attempted"""
+        db.execute(update(Campaign).where(Campaign.id == campaign_id).values(fanout_complete=True))
+        self._complete_if_done(db, campaign_id)
+
+    @staticmethod
+    def fail_fanout(db: Session, campaign_id: int):
+        """The fan-out stopped before creating every message; messages already
+        queued still go out and keep their counters moving"""
+        db.execute(
+            update(Campaign).where(
+                Campaign.id == campaign_id,
+                Campaign.status == "running"
+            ).values(status="failed", completed_at=func.now())
+        )
+
+    def record(self, db: Session, campaign_id: Optional[int], old_status, new_status, count: int = 1):
+        """Move `count` messages from old_status's counter to new_status's"""
+        if not campaign_id or not count:
+            return
+        old, new = COUNTERS[MessageStatus(old_status)], COUNTERS[MessageStatus(new_status)]
+        if old == new:
+            return
+        db.execute(
+            update(Campaign).where(Campaign.id == campaign_id).values({
+                old: getattr(Campaign, old) - count,
+                new: getattr(Campaign, new) + count,
+            })
+        )
+        if old == "queued":
+            self._complete_if_done(db, campaign_id)
+
+    @staticmethod
+    def _complete_if_done(db: Session, campaign_id: int):
+        db.execute(
+            update(Campaign).where(
+                Campaign.id == campaign_id,
+                Campaign.status == "running",
+                Campaign.fanout_complete == True,
+                Campaign.queued <= 0
+            ).values(status="completed", completed_at=func.now())
+        )
+
+    @staticmethod
+    def reopen(db: Session, campaign_ids: list):
+        """Back to running after completed messages were requeued"""
+        if not campaign_ids:
+            return
+        db.execute(
+            update(Campaign).where(
+                Campaign.id.in_(campaign_ids),
+                Campaign.status == "completed"
+            ).values(status="running", completed_at=None)
+        )
+
+    @staticmethod
+    def cancel(db: Session, campaign: Campaign) -> int:
+        """Cancel every message not yet attempted. Tasks already queued find
+        their message cancelled and skip it; a fan-out still in progress stops
+        at its next batch. Returns the number of messages cancelled."""
+        cancelled = db.query(Message).filter(
+            Message.campaign_id == campaign.id,
+            Message.status.in_([MessageStatus.PENDING, MessageStatus.QUEUED])
+        ).update({Message.status: MessageStatus.CANCELLED}, synchronize_session=False)
+        db.execute(
+            update(Campaign).where(Campaign.id == campaign.id).values(
+                status="cancelled",
+                completed_at=func.now(),
+                queued=Campaign.queued - cancelled,
+                cancelled=Campaign.cancelled + cancelled
+            )
+        )
+        logger.info(f"Cancelled campaign {campaign.id}: {cancelled} messages")
+        return cancelled
+
+    @staticmethod
+    def get(db: Session, campaign_id: int) -> Optional[Campaign]:
+        return db.query(Campaign).filter(Campaign.id == campaign_id).first()
+
+
+# Create singleton instance
+campaign_service = CampaignService()
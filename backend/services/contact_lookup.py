@@ -0,0 +1,85 @@
+"""
+Phone -> contact lookups for webhooks and sends.
+Numbers are matched on `contacts.phone_normalized` (see phones.py),
+preferring the active contact over deactivated ones with the same number; the
+result, including "no such contact", is kept in a per-process LRU of
+CONTACT_LOOKUP_CACHE_SIZE numbers. Contact writes in this process clear it;
+entries expire after CONTACT_LOOKUP_TTL so other workers' writes show up.
+"""
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+from config import settings
+from models import Contact
+from phones import normalize_phone
+import threading
+import time
+
+
+class ContactSummary(NamedTuple):
+    id: int
+    name: str
+    preferred_language: Optional[str]
+
+
+_MISSING = object()
+
+
+class ContactLookupService:
+    def __init__(self):
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Forget every cached number; call after contact writes"""
+        with self._lock:
+            self._entries.clear()
+
+    def _cached(self, phone: str):
+        with self._lock:
+            entry = self._entries.get(phone)
+            if entry is None or time.monotonic() - entry[1] > settings.CONTACT_LOOKUP_TTL:
+                return _MISSING
+            self._entries.move_to_end(phone)
+            return entry[0]
+
+    def _store(self, phone: str, summary: Optional[ContactSummary]):
+        with self._lock:
+            self._entries[phone] = (summary, time.monotonic())
+            self._entries.move_to_end(phone)
+            while len(self._entries) > settings.CONTACT_LOOKUP_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    @staticmethod
+    def _query(phone: str):
+        return select(Contact.id, Contact.name, Contact.preferred_language).where(
+            Contact.phone_normalized == phone
+        ).order_by(Contact.active.desc(), Contact.id.desc()).limit(1)
+
+    def by_phone(self, db: Session, raw_phone: str) -> Optional[ContactSummary]:
+        phone = normalize_phone(raw_phone)
+        if phone is None:
+            return None
+        summary = self._cached(phone)
+        if summary is _MISSING:
+            row = db.execute(self._query(phone)).first()
+            summary = ContactSummary(*row) if row else None
+            self._store(phone, summary)
+        return summary
+
+    async def by_phone_async(self, db: AsyncSession, raw_phone: str) -> Optional[ContactSummary]:
+        phone = normalize_phone(raw_phone)
+        if phone is None:
+            return None
+        summary = self._cached(phone)
+        if summary is _MISSING:
+            row = (await db.execute(self._query(phone))).first()
+            summary = ContactSummary(*row) if row else None
+            self._store(phone, summary)
+        return summary
+
+
+# Create singleton instance
+contact_lookup = ContactLookupService()
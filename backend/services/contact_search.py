@@ -0,0 +1,200 @@
+"""
+Contact search service.
+Substring search over contact names and phone digits with ranked results.
+PostgreSQL is served by pg_trgm GIN indexes (see migrate_contact_search.py);
+other databases use an in-process trigram index rebuilt after contact writes.
+"""
+from sqlalchemy import func, case, text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from typing import Dict, Optional, Set
+from config import settings
+from models import Contact
+import logging
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Rebuild the in-process index at least this often so other workers' writes show up
+INDEX_TTL_SECONDS = 300
+
+
+def phone_digits(value: Optional[str]) -> str:
+    """Strip everything but digits so "909 763" matches "+19097630454" """
+    return re.sub(r"\D", "", value or "")
+
+
+def _trigrams(value: str) -> Set[str]:
+    return {value[i:i + 3] for i in range(len(value) - 2)}
+
+
+def _escape_like(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class _TrigramIndex:
+    """Posting lists from name/phone trigrams to contact ids"""
+
+    def __init__(self, rows):
+        self.docs = {}
+        self.name_postings = defaultdict(set)
+        self.phone_postings = defaultdict(set)
+        for contact_id, name, phone, active in rows:
+            name = (name or "").lower()
+            digits = phone_digits(phone)
+            self.docs[contact_id] = (name, digits, bool(active))
+            for gram in _trigrams(name):
+                self.name_postings[gram].add(contact_id)
+            for gram in _trigrams(digits):
+                self.phone_postings[gram].add(contact_id)
+        self.built_at = time.monotonic()
+
+    def candidates(self, needle: str, postings) -> Set[int]:
+        """Ids that contain every trigram of `needle` (superset of real matches)"""
+        if len(needle) < 3:
+            return set(self.docs)
+        grams = sorted(_trigrams(needle), key=lambda g: len(postings.get(g, ())))
+        result = set(postings.get(grams[0], ()))
+        for gram in grams[1:]:
+            if not result:
+                break
+            result &= postings.get(gram, set())
+        return result
+
+
+class ContactSearchService:
+    def __init__(self):
+        self._index: Optional[_TrigramIndex] = None
+        self._lock = threading.Lock()
+        self._has_pg_trgm: Optional[bool] = None
+
+    def invalidate(self):
+        """Drop the in-process index; call after any contact write"""
+        self._index = None
+
+    def search(
+        self,
+        db: Session,
+        term: str,
+        limit: int = 50,
+        active_only: bool = True,
+        budget_ms: Optional[int] = None
+    ) -> Dict:
+        """Return contacts matching `term`, best matches first"""
+        started = time.perf_counter()
+        budget_ms = budget_ms or settings.CONTACT_SEARCH_BUDGET_MS
+        term = term.strip()
+        if not term:
+            return {"contacts": [], "took_ms": 0.0, "truncated": False}
+
+        if db.bind.dialect.name == "postgresql":
+            contacts, truncated = self._search_postgres(db, term, limit, active_only, budget_ms)
+        else:
+            contacts, truncated = self._search_in_process(db, term, limit, active_only, started, budget_ms)
+
+        took_ms = round((time.perf_counter() - started) * 1000, 2)
+        if truncated:
+            logger.warning(f"Contact search for {term!r} exceeded {budget_ms}ms budget")
+        return {"contacts": contacts, "took_ms": took_ms, "truncated": truncated}
+
+    # ==================== PostgreSQL ====================
+
+    def _pg_trgm_available(self, db: Session) -> bool:
+        if self._has_pg_trgm is None:
+            self._has_pg_trgm = db.execute(
+                text("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+            ).first() is not None
+            if not self._has_pg_trgm:
+                logger.warning("pg_trgm not installed; run migrate_contact_search.py")
+        return self._has_pg_trgm
+
+    def _search_postgres(self, db: Session, term: str, limit: int, active_only: bool, budget_ms: int):
+        digits = phone_digits(term)
+        name_pattern = f"%{_escape_like(term)}%"
+        contact_digits = func.regexp_replace(Contact.phone, r"\D", "", "g")
+
+        conditions = Contact.name.ilike(name_pattern, escape="\\")
+        phone_match = None
+        if len(digits) >= 3:
+            phone_match = contact_digits.like(f"%{digits}%")
+            conditions = conditions | phone_match
+
+        rank = case((Contact.name.ilike(f"{_escape_like(term)}%", escape="\\"), 1.0), else_=0.0)
+        if phone_match is not None:
+            rank = rank + case((phone_match, 1.0), else_=0.0)
+        if self._pg_trgm_available(db):
+            rank = rank + func.similarity(Contact.name, term)
+
+        query = db.query(Contact).filter(conditions)
+        if active_only:
+            query = query.filter(Contact.active == True)
+
+        # Bound the query server-side; SET LOCAL ends with the request's transaction
+        db.execute(text(f"SET LOCAL statement_timeout = {int(budget_ms)}"))
+        try:
+            return query.order_by(rank.desc(), Contact.name).limit(limit).all(), False
+        except OperationalError as e:
+            logger.error(f"Contact search cancelled: {e}")
+            db.rollback()
+            return [], True
+
+    # ==================== In-process fallback ====================
+
+    def _get_index(self, db: Session) -> _TrigramIndex:
+        index = self._index
+        if index is None or time.monotonic() - index.built_at > INDEX_TTL_SECONDS:
+            with self._lock:
+                index = self._index
+                if index is None or time.monotonic() - index.built_at > INDEX_TTL_SECONDS:
+                    rows = db.query(Contact.id, Contact.name, Contact.phone, Contact.active).all()
+                    index = self._index = _TrigramIndex(rows)
+                    logger.info(f"Built contact search index over {len(rows)} contacts")
+        return index
+
+    def _search_in_process(self, db: Session, term: str, limit: int, active_only: bool, started: float, budget_ms: int):
+        index = self._get_index(db)
+        needle = term.lower()
+        digits = phone_digits(term)
+        if len(digits) < 3:
+            digits = ""
+
+        candidate_ids = index.candidates(needle, index.name_postings)
+        if digits:
+            candidate_ids |= index.candidates(digits, index.phone_postings)
+
+        deadline = started + budget_ms / 1000
+        truncated = False
+        scored = []
+        for n, contact_id in enumerate(candidate_ids):
+            if n % 256 == 0 and time.perf_counter() > deadline:
+                truncated = True
+                break
+            name, contact_digits, active = index.docs[contact_id]
+            if active_only and not active:
+                continue
+
+            score = 0.0
+            position = name.find(needle)
+            if position == 0:
+                score += 3.0
+            elif position > 0:
+                score += 2.0 if name[position - 1] == " " else 1.0
+            if digits and digits in contact_digits:
+                score += 2.0
+            if score:
+                scored.append((-score, name, contact_id))
+
+        scored.sort()
+        ids = [contact_id for _, _, contact_id in scored[:limit]]
+        if not ids:
+            return [], truncated
+
+        by_id = {c.id: c for c in db.query(Contact).filter(Contact.id.in_(ids)).all()}
+        return [by_id[i] for i in ids if i in by_id], truncated
+
+
+# Create singleton instance
+contact_search = ContactSearchService()
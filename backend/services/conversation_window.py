@@ -0,0 +1,187 @@
+"""
+Per-contact conversation window.
+The last CONVERSATION_WINDOW_SIZE turns of each contact are kept in a capped
+Redis list, oldest first, so building a prompt doesn't query `conversations`.
+Writers build entries with `turn` before committing their Conversation
+rows and append them once the commit succeeds (write-through); appends only
+extend an existing window, and a missing window is rebuilt from the
+database on the next read. Every append also bumps the contact's version
+key; a rebuild only lands if the version is unchanged since the read that
+missed, so a turn committed while the database was being read is never
+lost. If Redis is unavailable, reads fall back to the database and appends
+are skipped.
+"""
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import datetime, timezone
+from typing import List
+from config import settings
+from models import Conversation
+import json
+import logging
+import redis
+import redis.asyncio
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "conversation_window:"
+
+
+def _key(contact_id: int) -> str:
+    return f"{KEY_PREFIX}{contact_id}"
+
+
+def _version_key(contact_id: int) -> str:
+    return f"{KEY_PREFIX}{contact_id}:version"
+
+
+def _client_options() -> dict:
+    # Fail fast: a slow Redis must not hold up webhooks that can use the database
+    return dict(
+        socket_timeout=settings.CONVERSATION_WINDOW_REDIS_TIMEOUT,
+        socket_connect_timeout=settings.CONVERSATION_WINDOW_REDIS_TIMEOUT,
+    )
+
+
+def turn(conv: Conversation) -> dict:
+    """A Conversation row as a window entry; rows not flushed yet are stamped now"""
+    moment = conv.timestamp or datetime.now(timezone.utc)
+    return {
+        "direction": conv.direction,
+        "message": conv.message,
+        "timestamp": moment.isoformat(),
+    }
+
+
+def as_history(turns: List[dict], with_timestamps: bool = False) -> List[dict]:
+    """Window entries as LLM chat messages"""
+    history = []
+    for entry in turns:
+        message = {
+            "role": "user" if entry["direction"] == "inbound" else "assistant",
+            "content": entry["message"]
+        }
+        if with_timestamps:
+            message["timestamp"] = entry["timestamp"]
+        history.append(message)
+    return history
+
+
+class ConversationWindowService:
+    def __init__(self):
+        self._redis = None
+        self._async_redis = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(settings.REDIS_URL, **_client_options())
+        return self._redis
+
+    @property
+    def async_redis(self):
+        if self._async_redis is None:
+            self._async_redis = redis.asyncio.Redis.from_url(settings.REDIS_URL, **_client_options())
+        return self._async_redis
+
+    @staticmethod
+    def _append_pipeline(pipe, contact_id: int, turns: List[dict]):
+        key, version_key = _key(contact_id), _version_key(contact_id)
+        # Invalidates any rebuild that read the database before this commit
+        pipe.incr(version_key)
+        pipe.expire(version_key, settings.CONVERSATION_WINDOW_TTL)
+        # RPUSHX: never start a window from a partial tail
+        pipe.rpushx(key, *[json.dumps(t) for t in turns])
+        pipe.ltrim(key, -settings.CONVERSATION_WINDOW_SIZE, -1)
+        pipe.expire(key, settings.CONVERSATION_WINDOW_TTL)
+
+    @staticmethod
+    def _forget_pipeline(pipe, contact_id: int):
+        """A window missing a turn must not outlive a failed append"""
+        pipe.delete(_key(contact_id))
+        pipe.incr(_version_key(contact_id))
+        pipe.expire(_version_key(contact_id), settings.CONVERSATION_WINDOW_TTL)
+
+    def append(self, contact_id: int, turns: List[dict]):
+        """Add committed turns to the contact's window (sync callers)"""
+        if not turns:
+            return
+        try:
+            pipe = self.redis.pipeline()
+            self._append_pipeline(pipe, contact_id, turns)
+            pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Conversation window append failed for contact {contact_id}: {str(e)}")
+            try:
+                pipe = self.redis.pipeline()
+                self._forget_pipeline(pipe, contact_id)
+                pipe.execute()
+            except redis.RedisError:
+                pass
+
+    async def append_async(self, contact_id: int, turns: List[dict]):
+        """Add committed turns to the contact's window"""
+        if not turns:
+            return
+        try:
+            pipe = self.async_redis.pipeline()
+            self._append_pipeline(pipe, contact_id, turns)
+            await pipe.execute()
+        except redis.RedisError as e:
+            logger.warning(f"Conversation window append failed for contact {contact_id}: {str(e)}")
+            try:
+                pipe = self.async_redis.pipeline()
+                self._forget_pipeline(pipe, contact_id)
+                await pipe.execute()
+            except redis.RedisError:
+                pass
+
+    async def recent(self, db: AsyncSession, contact_id: int) -> List[dict]:
+        """The contact's latest turns, oldest first"""
+        key, version_key = _key(contact_id), _version_key(contact_id)
+        try:
+            pipe = self.async_redis.pipeline()
+            pipe.lrange(key, 0, -1)
+            pipe.get(version_key)
+            cached, version = await pipe.execute()
+            if cached:
+                return [json.loads(entry) for entry in cached]
+        except redis.RedisError as e:
+            logger.warning(f"Conversation window unavailable, reading contact {contact_id} from the database: {str(e)}")
+            return await self._load(db, contact_id)
+
+        turns = await self._load(db, contact_id)
+        if turns:
+            await self._fill(contact_id, turns, version)
+        return turns
+
+    async def _fill(self, contact_id: int, turns: List[dict], version):
+        """Store a rebuilt window unless an append landed since `version` was read"""
+        key, version_key = _key(contact_id), _version_key(contact_id)
+        try:
+            async with self.async_redis.pipeline() as pipe:
+                await pipe.watch(version_key)
+                if await pipe.get(version_key) != version:
+                    return
+                pipe.multi()
+                pipe.delete(key)
+                pipe.rpush(key, *[json.dumps(t) for t in turns])
+                pipe.expire(key, settings.CONVERSATION_WINDOW_TTL)
+                await pipe.execute()
+        except redis.WatchError:
+            pass  # the next read rebuilds it, with the new turn
+        except redis.RedisError as e:
+            logger.warning(f"Could not fill conversation window for contact {contact_id}: {str(e)}")
+
+    @staticmethod
+    async def _load(db: AsyncSession, contact_id: int) -> List[dict]:
+        conversations = (await db.execute(
+            select(Conversation).where(
+                Conversation.contact_id == contact_id
+            ).order_by(Conversation.timestamp.desc()).limit(settings.CONVERSATION_WINDOW_SIZE)
+        )).scalars().all()
+        return [turn(conv) for conv in reversed(conversations)]
+
+
+# Create singleton instance
+conversation_window = ConversationWindowService()
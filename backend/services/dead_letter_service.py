@@ -0,0 +1,64 @@
+"""
+Dead-lettered sends.
+A message whose transient failures outlast every retry is marked FAILED and
+recorded here. Requeuing puts it back to QUEUED through the outbox, so a
+provider outage can be replayed once it is over.
+"""
+from sqlalchemy.orm import Session
+from collections import Counter
+from typing import List, Optional
+from models import DeadLetter, Message, MessageStatus
+from services.campaign_service import campaign_service
+from outbox import enqueue_sends
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class DeadLetterService:
+    @staticmethod
+    def record(db: Session, message: Message, error: str, attempts: int):
+        """Dead-letter a message the caller has just marked FAILED"""
+        existing = db.query(DeadLetter).filter(DeadLetter.message_id == message.id).first()
+        if existing:
+            existing.error = error
+            existing.attempts += attempts
+        else:
+            db.add(DeadLetter(message_id=message.id, error=error, attempts=attempts))
+        logger.warning(f"Message {message.id} dead-lettered after {attempts} attempts: {error}")
+
+    @staticmethod
+    def requeue(db: Session, dead_letter_ids: Optional[List[int]] = None, limit: int = 1000) -> int:
+        """Put dead-lettered messages back in the queue and drop their entries.
+        Requeues the given ids, or the oldest `limit` entries when none are given."""
+        query = db.query(DeadLetter.id, DeadLetter.message_id)
+        if dead_letter_ids:
+            query = query.filter(DeadLetter.id.in_(dead_letter_ids))
+        entries = query.order_by(DeadLetter.id).limit(limit).with_for_update(skip_locked=True).all()
+        if not entries:
+            return 0
+
+        messages = db.query(Message.id, Message.contact_id, Message.campaign_id, Message.message_type).filter(
+            Message.id.in_([entry.message_id for entry in entries]),
+            Message.status == MessageStatus.FAILED
+        ).all()
+        if messages:
+            db.query(Message).filter(Message.id.in_([m.id for m in messages])).update(
+                {Message.status: MessageStatus.QUEUED, Message.error_message: None},
+                synchronize_session=False
+            )
+            per_campaign = Counter(m.campaign_id for m in messages if m.campaign_id)
+            for campaign_id, count in per_campaign.items():
+                campaign_service.record(db, campaign_id, MessageStatus.FAILED, MessageStatus.QUEUED, count=count)
+            campaign_service.reopen(db, list(per_campaign))
+            enqueue_sends(db, messages)
+
+        db.query(DeadLetter).filter(DeadLetter.id.in_([entry.id for entry in entries])).delete(
+            synchronize_session=False
+        )
+        logger.info(f"Requeued {len(messages)} dead-lettered messages")
+        return len(messages)
+
+
+# Create singleton instance
+dead_letter_service = DeadLetterService()
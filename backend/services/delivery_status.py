@@ -0,0 +1,133 @@
+"""
+SMS delivery status ingestion.
+Twilio posts several status callbacks per message. The webhook only appends
+them to a Redis list; `flush` (the apply_sms_statuses beat task) drains the
+list, keeps the final status per sid and applies them with a handful of bulk
+UPDATEs, moving campaign counters in the same transaction.
+"""
+from sqlalchemy.orm import Session
+from collections import defaultdict
+from typing import Dict, Optional, Tuple
+from config import settings
+from database import SessionLocal
+from models import Message, MessageStatus
+from services.campaign_service import campaign_service
+import json
+import logging
+import time
+import redis
+
+logger = logging.getLogger(__name__)
+
+BUFFER_KEY = "sms_status_callbacks"
+
+# Final Twilio statuses; intermediate ones (queued, sending, sent) are ignored
+TWILIO_STATUSES = {
+    "delivered": MessageStatus.DELIVERED,
+    "read": MessageStatus.DELIVERED,
+    "undelivered": MessageStatus.FAILED,
+    "failed": MessageStatus.FAILED,
+}
+
+
+class DeliveryStatusService:
+    def __init__(self):
+        self._redis = None
+
+    @property
+    def redis(self):
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(settings.REDIS_URL)
+        return self._redis
+
+    def record(self, sid: str, twilio_status: str, error_code: Optional[str] = None):
+        """Buffer one callback; applied directly if Redis is unavailable"""
+        status = TWILIO_STATUSES.get((twilio_status or "").lower())
+        if not sid or not status:
+            return
+        entry = {"sid": sid, "status": status.value, "error": error_code, "at": time.time()}
+        try:
+            self.redis.rpush(BUFFER_KEY, json.dumps(entry))
+        except redis.RedisError as e:
+            logger.warning(f"Status buffer unavailable, applying {sid} directly: {str(e)}")
+            db = SessionLocal()
+            try:
+                self.apply(db, {sid: (status, error_code)})
+                db.commit()
+            finally:
+                db.close()
+
+    def _drain(self, limit: int) -> list:
+        """Pop up to `limit` buffered callbacks atomically"""
+        pipe = self.redis.pipeline()
+        pipe.lrange(BUFFER_KEY, 0, limit - 1)
+        pipe.ltrim(BUFFER_KEY, limit, -1)
+        raw, _ = pipe.execute()
+        return [json.loads(item) for item in raw]
+
+    def flush(self, db: Session) -> int:
+        """Apply buffered callbacks; returns the number of messages updated"""
+        entries = self._drain(settings.STATUS_FLUSH_BATCH)
+        if not entries:
+            return 0
+
+        # Several callbacks per sid: FAILED wins over DELIVERED, else the last one
+        final: Dict[str, Tuple[MessageStatus, Optional[str]]] = {}
+        first_seen: Dict[str, float] = {}
+        for entry in entries:
+            status = MessageStatus(entry["status"])
+            current = final.get(entry["sid"])
+            if current is None or current[0] != MessageStatus.FAILED:
+                final[entry["sid"]] = (status, entry.get("error"))
+            first_seen.setdefault(entry["sid"], entry["at"])
+
+        try:
+            applied, unmatched = self.apply(db, final)
+            db.commit()
+        except Exception:
+            db.rollback()
+            self.redis.rpush(BUFFER_KEY, *[json.dumps(entry) for entry in entries])
+            raise
+
+        # A callback can beat the sender's commit of twilio_sid; retry those for a while
+        cutoff = time.time() - settings.STATUS_UNMATCHED_TTL
+        retry = [sid for sid in unmatched if first_seen[sid] > cutoff]
+        if retry:
+            self.redis.rpush(BUFFER_KEY, *[
+                json.dumps({"sid": sid, "status": final[sid][0].value, "error": final[sid][1], "at": first_seen[sid]})
+                for sid in retry
+            ])
+        logger.info(f"Applied {applied} delivery statuses from {len(entries)} callbacks, {len(retry)} deferred")
+        return applied
+
+    @staticmethod
+    def apply(db: Session, final: Dict[str, Tuple[MessageStatus, Optional[str]]]):
+        """Move SENT messages to their final status with one UPDATE per
+        (status, error) group. Returns (messages updated, sids not found)."""
+        rows = db.query(Message.id, Message.twilio_sid, Message.campaign_id, Message.status).filter(
+            Message.twilio_sid.in_(list(final))
+        ).with_for_update().all()
+        found = {row.twilio_sid for row in rows}
+
+        groups = defaultdict(list)
+        moves = defaultdict(int)
+        for row in rows:
+            status, error = final[row.twilio_sid]
+            if row.status != MessageStatus.SENT:
+                continue  # already final, or cancelled/failed locally
+            groups[(status, error)].append(row.id)
+            moves[(row.campaign_id, status)] += 1
+
+        for (status, error), ids in groups.items():
+            values = {Message.status: status}
+            if status == MessageStatus.FAILED:
+                values[Message.error_message] = f"Twilio error {error}" if error else "Undelivered"
+            db.query(Message).filter(Message.id.in_(ids)).update(values, synchronize_session=False)
+        for (campaign_id, status), count in moves.items():
+            campaign_service.record(db, campaign_id, MessageStatus.SENT, status, count=count)
+
+        return sum(len(ids) for ids in groups.values()), [sid for sid in final if sid not in found]
+
+
+# Create singleton instance
+delivery_status = DeliveryStatusService()
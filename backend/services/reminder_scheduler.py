@@ -0,0 +1,111 @@
+"""
+Reminder schedule arithmetic.
+Reminder times are wall-clock times in the church's timezone; next_run_at is
+stored in UTC so the beat tick can select due reminders with one indexed
+range query.
+"""
+from datetime import datetime, date, time, timedelta, timezone
+from calendar import monthrange
+from zoneinfo import ZoneInfo
+from typing import Optional
+from config import settings
+import logging
+
+logger = logging.getLogger(__name__)
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+SCHEDULE_TYPES = ("weekly", "monthly", "once")
+
+
+def church_timezone() -> ZoneInfo:
+    return ZoneInfo(settings.CHURCH_TIMEZONE)
+
+
+def parse_time(value: str) -> time:
+    """Parse an HH:MM schedule_time"""
+    try:
+        hour, minute = (int(part) for part in value.strip().split(":"))
+        return time(hour, minute)
+    except (ValueError, AttributeError):
+        raise ValueError(f"schedule_time must be HH:MM, got {value!r}")
+
+
+def _local(day: date, at: time) -> datetime:
+    return datetime.combine(day, at, tzinfo=church_timezone())
+
+
+def as_utc(value: datetime) -> datetime:
+    # SQLite hands back naive datetimes; everything is stored in UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _local_date(value: datetime) -> date:
+    # A naive schedule_date is a calendar date as the church sees it
+    if value.tzinfo is None:
+        return value.date()
+    return value.astimezone(church_timezone()).date()
+
+
+def _monthly_day(schedule_day: Optional[str], schedule_date: Optional[datetime]) -> int:
+    if schedule_day and schedule_day.strip().isdigit() and 1 <= int(schedule_day) <= 31:
+        return int(schedule_day)
+    if schedule_date:
+        return _local_date(schedule_date).day
+    raise ValueError("monthly reminders need schedule_day as a day of month (1-31) or schedule_date")
+
+
+def compute_next_run(
+    schedule_type: str,
+    schedule_time: str,
+    schedule_day: Optional[str] = None,
+    schedule_date: Optional[datetime] = None,
+    after: Optional[datetime] = None
+) -> Optional[datetime]:
+    """First fire time strictly after `after` (default: now), in UTC.
+    Returns None when a one-time reminder has nothing left to fire."""
+    after = as_utc(after or datetime.now(timezone.utc))
+    local_after = after.astimezone(church_timezone())
+    at = parse_time(schedule_time)
+
+    if schedule_type == "weekly":
+        if not schedule_day or schedule_day.strip().lower() not in WEEKDAYS:
+            raise ValueError("weekly reminders need schedule_day set to a weekday name")
+        target = WEEKDAYS.index(schedule_day.strip().lower())
+        day = local_after.date() + timedelta(days=(target - local_after.weekday()) % 7)
+        candidate = _local(day, at)
+        if candidate <= local_after:
+            candidate = _local(day + timedelta(days=7), at)
+        return candidate.astimezone(timezone.utc)
+
+    if schedule_type == "monthly":
+        day_of_month = _monthly_day(schedule_day, schedule_date)
+        year, month = local_after.year, local_after.month
+        for _ in range(2):
+            # Short months fire on their last day
+            day = date(year, month, min(day_of_month, monthrange(year, month)[1]))
+            candidate = _local(day, at)
+            if candidate > local_after:
+                return candidate.astimezone(timezone.utc)
+            year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+        raise AssertionError("unreachable")
+
+    if schedule_type == "once":
+        if not schedule_date:
+            raise ValueError("one-time reminders need schedule_date")
+        candidate = _local(_local_date(schedule_date), at)
+        return candidate.astimezone(timezone.utc) if candidate > local_after else None
+
+    raise ValueError(f"schedule_type must be one of {', '.join(SCHEDULE_TYPES)}")
+
+
+def next_run_for(reminder, after: Optional[datetime] = None) -> Optional[datetime]:
+    """compute_next_run for a ScheduledReminder row"""
+    return compute_next_run(
+        reminder.schedule_type,
+        reminder.schedule_time,
+        reminder.schedule_day,
+        reminder.schedule_date,
+        after=after
+    )
@@ -0,0 +1,138 @@
+"""
+Contact segments.
+Groups are hand-picked lists; rule segments match contacts on language,
+city and active flag. Membership for both lives in `segment_members` so
+sends and reminders resolve recipients with one indexed join.
+"""
+from sqlalchemy import func, select, and_, delete, insert, literal
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from models import Contact, Segment, SegmentMember
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class SegmentService:
+    @staticmethod
+    def rule_conditions(segment: Segment) -> list:
+        """SQL filters equivalent to `matches`"""
+        conditions = []
+        if segment.rule_language:
+            conditions.append(func.lower(Contact.preferred_language) == segment.rule_language.lower())
+        if segment.rule_city:
+            conditions.append(func.lower(Contact.city) == segment.rule_city.lower())
+        if segment.rule_active is not None:
+            conditions.append(Contact.active == segment.rule_active)
+        return conditions
+
+    @staticmethod
+    def matches(segment: Segment, contact: Contact) -> bool:
+        """Evaluate a rule segment against one contact in memory"""
+        if segment.rule_language and (contact.preferred_language or "").lower() != segment.rule_language.lower():
+            return False
+        if segment.rule_city and (contact.city or "").lower() != segment.rule_city.lower():
+            return False
+        if segment.rule_active is not None and bool(contact.active) != segment.rule_active:
+            return False
+        return True
+
+    def rebuild(self, db: Session, segment: Segment):
+        """Recompute a rule segment's membership with one INSERT ... SELECT"""
+        if segment.kind != "rule":
+            return
+        db.execute(delete(SegmentMember).where(SegmentMember.segment_id == segment.id))
+        matching = select(literal(segment.id), Contact.id)
+        conditions = self.rule_conditions(segment)
+        if conditions:
+            matching = matching.where(and_(*conditions))
+        db.execute(insert(SegmentMember).from_select(["segment_id", "contact_id"], matching))
+        logger.info(f"Rebuilt segment {segment.name}")
+
+    def rebuild_all(self, db: Session):
+        """Recompute every rule segment, e.g. after a bulk import"""
+        for segment in db.query(Segment).filter(Segment.kind == "rule").all():
+            self.rebuild(db, segment)
+
+    def refresh_contact(self, db: Session, contact: Contact):
+        """Incrementally update rule memberships after one contact changed.
+        The contact must be flushed so it has an id."""
+        current = {
+            row.segment_id for row in
+            db.query(SegmentMember.segment_id).filter(SegmentMember.contact_id == contact.id)
+        }
+        for segment in db.query(Segment).filter(Segment.kind == "rule").all():
+            should_belong = self.matches(segment, contact)
+            if should_belong and segment.id not in current:
+                db.add(SegmentMember(segment_id=segment.id, contact_id=contact.id))
+            elif not should_belong and segment.id in current:
+                db.query(SegmentMember).filter(
+                    SegmentMember.segment_id == segment.id,
+                    SegmentMember.contact_id == contact.id
+                ).delete(synchronize_session=False)
+
+    def add_members(self, db: Session, segment: Segment, contact_ids: List[int]) -> int:
+        """Add contacts to a group, ignoring ones already in it"""
+        existing = {
+            row.contact_id for row in
+            db.query(SegmentMember.contact_id).filter(
+                SegmentMember.segment_id == segment.id,
+                SegmentMember.contact_id.in_(contact_ids)
+            )
+        }
+        valid = {row.id for row in db.query(Contact.id).filter(Contact.id.in_(contact_ids))}
+        new_ids = sorted(valid - existing)
+        if new_ids:
+            db.execute(insert(SegmentMember), [
+                {"segment_id": segment.id, "contact_id": contact_id} for contact_id in new_ids
+            ])
+        return len(new_ids)
+
+    def remove_member(self, db: Session, segment: Segment, contact_id: int) -> bool:
+        removed = db.query(SegmentMember).filter(
+            SegmentMember.segment_id == segment.id,
+            SegmentMember.contact_id == contact_id
+        ).delete(synchronize_session=False)
+        return bool(removed)
+
+    @staticmethod
+    def recipients(db: Session, segment_id: int, active_only: bool = True):
+        """Query of the segment's contacts; a single join on the membership key"""
+        query = db.query(Contact).join(
+            SegmentMember, SegmentMember.contact_id == Contact.id
+        ).filter(SegmentMember.segment_id == segment_id)
+        if active_only:
+            query = query.filter(Contact.active == True)
+        return query.order_by(Contact.id)
+
+    @staticmethod
+    def recipient_rows(segment_id: int, active_only: bool = True):
+        """Select of (contact id, timezone, state_zip) for streaming fan-out"""
+        statement = select(SegmentMember.contact_id, Contact.timezone, Contact.state_zip).join(
+            Contact, Contact.id == SegmentMember.contact_id
+        ).where(SegmentMember.segment_id == segment_id)
+        if active_only:
+            statement = statement.where(Contact.active == True)
+        return statement.order_by(SegmentMember.contact_id)
+
+    @staticmethod
+    def names_for(db: Session, contact_id: int) -> List[str]:
+        """Segment names a contact belongs to, for LLM prompt context"""
+        rows = db.query(Segment.name).join(
+            SegmentMember, SegmentMember.segment_id == Segment.id
+        ).filter(SegmentMember.contact_id == contact_id).order_by(Segment.name)
+        return [row.name for row in rows]
+
+    @staticmethod
+    def member_counts(db: Session) -> Dict[int, int]:
+        """Members per segment in one grouped query"""
+        rows = db.query(SegmentMember.segment_id, func.count()).group_by(SegmentMember.segment_id)
+        return {segment_id: count for segment_id, count in rows}
+
+    @staticmethod
+    def get(db: Session, segment_id: int) -> Optional[Segment]:
+        return db.query(Segment).filter(Segment.id == segment_id).first()
+
+
+# Create singleton instance
+segment_service = SegmentService()
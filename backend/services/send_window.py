@@ -0,0 +1,98 @@
+"""
+Send-window (quiet hours) policy.
+Broadcast and reminder messages only go out between SEND_WINDOW_START and
+SEND_WINDOW_END in each recipient's local time. Recipients outside the
+window are deferred to its next opening (see release_scheduled_messages),
+spread over SEND_WINDOW_SPREAD_MINUTES so each timezone isn't one spike.
+"""
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+from typing import Optional
+from config import settings
+from services.reminder_scheduler import parse_time, as_utc
+import re
+
+# Primary timezone per US state, for contacts without an explicit timezone
+STATE_TIMEZONES = {
+    "AL": "America/Chicago", "AK": "America/Anchorage", "AZ": "America/Phoenix",
+    "AR": "America/Chicago", "CA": "America/Los_Angeles", "CO": "America/Denver",
+    "CT": "America/New_York", "DC": "America/New_York", "DE": "America/New_York",
+    "FL": "America/New_York", "GA": "America/New_York", "HI": "Pacific/Honolulu",
+    "ID": "America/Boise", "IL": "America/Chicago", "IN": "America/Indiana/Indianapolis",
+    "IA": "America/Chicago", "KS": "America/Chicago", "KY": "America/New_York",
+    "LA": "America/Chicago", "ME": "America/New_York", "MD": "America/New_York",
+    "MA": "America/New_York", "MI": "America/Detroit", "MN": "America/Chicago",
+    "MS": "America/Chicago", "MO": "America/Chicago", "MT": "America/Denver",
+    "NE": "America/Chicago", "NV": "America/Los_Angeles", "NH": "America/New_York",
+    "NJ": "America/New_York", "NM": "America/Denver", "NY": "America/New_York",
+    "NC": "America/New_York", "ND": "America/Chicago", "OH": "America/New_York",
+    "OK": "America/Chicago", "OR": "America/Los_Angeles", "PA": "America/New_York",
+    "RI": "America/New_York", "SC": "America/New_York", "SD": "America/Chicago",
+    "TN": "America/Chicago", "TX": "America/Chicago", "UT": "America/Denver",
+    "VT": "America/New_York", "VA": "America/New_York", "WA": "America/Los_Angeles",
+    "WV": "America/New_York", "WI": "America/Chicago", "WY": "America/Denver",
+    "PR": "America/Puerto_Rico",
+}
+
+_STATE_PATTERN = re.compile(r"\b([A-Z]{2})\b")
+
+
+def is_valid_timezone(name: str) -> bool:
+    try:
+        ZoneInfo(name)
+        return True
+    except (ZoneInfoNotFoundError, ValueError):
+        return False
+
+
+def contact_timezone(explicit: Optional[str], state_zip: Optional[str]) -> str:
+    """Explicit timezone, else one derived from the state in state_zip, else the church's"""
+    if explicit:
+        return explicit
+    for match in _STATE_PATTERN.finditer(state_zip or ""):
+        zone = STATE_TIMEZONES.get(match.group(1))
+        if zone:
+            return zone
+    return settings.CHURCH_TIMEZONE
+
+
+@lru_cache(maxsize=None)
+def _window():
+    return parse_time(settings.SEND_WINDOW_START), parse_time(settings.SEND_WINDOW_END)
+
+
+def next_window_open(tz_name: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """None if the send window is open in `tz_name`, else when it next opens (UTC)"""
+    start, end = _window()
+    local = as_utc(now or datetime.now(timezone.utc)).astimezone(ZoneInfo(tz_name))
+    current = local.time().replace(tzinfo=None)
+    if start <= end:
+        is_open = start <= current < end
+    else:  # window spans midnight
+        is_open = current >= start or current < end
+    if is_open:
+        return None
+
+    opens = local.replace(hour=start.hour, minute=start.minute, second=0, microsecond=0)
+    if opens <= local:
+        opens += timedelta(days=1)
+    return opens.astimezone(timezone.utc)
+
+
+def window_opens_at(tz_name: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """next_window_open honouring SEND_WINDOW_ENABLED"""
+    if not settings.SEND_WINDOW_ENABLED:
+        return None
+    return next_window_open(tz_name, now)
+
+
+def stagger(opens: datetime, contact_id: int) -> datetime:
+    """Spread one timezone's deferred sends deterministically after the window opens"""
+    return opens + timedelta(minutes=contact_id % max(settings.SEND_WINDOW_SPREAD_MINUTES, 1))
+
+
+def release_time(contact_id: int, tz_name: str, now: Optional[datetime] = None) -> Optional[datetime]:
+    """When a message to this contact may go out; None means right away"""
+    opens = window_opens_at(tz_name, now)
+    return stagger(opens, contact_id) if opens else None
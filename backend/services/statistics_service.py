@@ -0,0 +1,81 @@
+"""
+Dashboard statistics.
+On PostgreSQL the totals live in `statistics_counters`, kept current by
+statement-level triggers (see migrate_statistics_counters.py), so reading
+them costs the same however large `messages` grows. Elsewhere, or before the
+migration has run, they come from one aggregate statement. Either way the
+result is cached in-process for STATISTICS_CACHE_SECONDS.
+"""
+from sqlalchemy import select, func
+from sqlalchemy.orm import Session
+from typing import Dict, Optional
+from config import settings
+from models import Contact, Message, CallLog, ScheduledReminder, MessageStatus, StatisticsCounter
+import threading
+import time
+
+# Keys of StatisticsResponse, also the counter names
+COUNTERS = (
+    "total_contacts",
+    "active_contacts",
+    "total_messages_sent",
+    "total_calls_made",
+    "scheduled_reminders",
+)
+
+# Messages that went out; delivery callbacks move SENT on to DELIVERED
+SENT_STATUSES = (MessageStatus.SENT, MessageStatus.DELIVERED)
+
+
+class StatisticsService:
+    def __init__(self):
+        self._cached: Optional[Dict[str, int]] = None
+        self._cached_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        """Drop the cached totals; call after contact or reminder writes"""
+        self._cached = None
+
+    def get(self, db: Session) -> Dict[str, int]:
+        cached = self._cached
+        if cached is not None and time.monotonic() - self._cached_at < settings.STATISTICS_CACHE_SECONDS:
+            return cached
+
+        with self._lock:
+            # Another request may have refreshed it while we waited
+            if self._cached is not None and time.monotonic() - self._cached_at < settings.STATISTICS_CACHE_SECONDS:
+                return self._cached
+            stats = self._from_counters(db) or self._aggregate(db)
+            self._cached, self._cached_at = stats, time.monotonic()
+            return stats
+
+    @staticmethod
+    def _from_counters(db: Session) -> Optional[Dict[str, int]]:
+        """Trigger-maintained totals, or None if the counters aren't installed"""
+        if db.get_bind().dialect.name != "postgresql":
+            return None
+        counters = dict(db.query(StatisticsCounter.name, StatisticsCounter.value).all())
+        if not all(name in counters for name in COUNTERS):
+            return None
+        return {name: int(counters[name]) for name in COUNTERS}
+
+    @staticmethod
+    def _aggregate(db: Session) -> Dict[str, int]:
+        """All totals in one round trip"""
+        row = db.execute(select(
+            select(func.count(Contact.id)).scalar_subquery().label("total_contacts"),
+            select(func.count(Contact.id)).where(Contact.active == True).scalar_subquery().label("active_contacts"),
+            select(func.count(Message.id)).where(
+                Message.status.in_(SENT_STATUSES)
+            ).scalar_subquery().label("total_messages_sent"),
+            select(func.count(CallLog.id)).scalar_subquery().label("total_calls_made"),
+            select(func.count(ScheduledReminder.id)).where(
+                ScheduledReminder.active == True
+            ).scalar_subquery().label("scheduled_reminders"),
+        )).one()
+        return dict(row._mapping)
+
+
+# Create singleton instance
+statistics_service = StatisticsService()
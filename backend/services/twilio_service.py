@@ -1,12 +1,22 @@
 from twilio.rest import Client
+from twilio.base.exceptions import TwilioRestException
 from twilio.twiml.voice_response import VoiceResponse, Gather
 from config import settings
 from typing import Optional
 import logging
+import requests
 
 logger = logging.getLogger(__name__)
 
 
+def is_retryable(error: Exception) -> bool:
+    """Rate limits, Twilio 5xx and network failures are worth retrying;
+    anything else (bad number, unsubscribed recipient, auth) is permanent"""
+    if isinstance(error, TwilioRestException):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
 class TwilioService:
     def __init__(self):
         self.client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
@@ -18,7 +28,8 @@ class TwilioService:
             message_obj = self.client.messages.create(
                 body=message,
                 from_=self.phone_number,
-                to=to_phone
+                to=to_phone,
+                status_callback=f"{settings.BACKEND_URL}/api/webhooks/twilio/sms-status"
             )
             
             return {
@@ -30,7 +41,8 @@ class TwilioService:
             logger.error(f"Failed to send SMS to {to_phone}: {str(e)}")
             return {
                 "success": False,
-                "error": str(e)
+                "error": str(e),
+                "retryable": is_retryable(e)
             }
     
     def make_call(self, to_phone: str, message: Optional[str] = None) -> dict:
@@ -57,7 +69,8 @@ class TwilioService:
             logger.error(f"Failed to make call to {to_phone}: {str(e)}")
             return {
                 "success": False,
-                "error": str(e)
+                "error": str(e),
+                "retryable": is_retryable(e)
             }
     
     def generate_greeting_twiml(self, language: str = "en") -> str:
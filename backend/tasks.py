@@ -1,14 +1,34 @@
 from celery import Celery
+from celery.signals import worker_process_init, task_postrun
 from config import settings
+from sqlalchemy import insert, select
 from sqlalchemy.orm import Session
-from database import SessionLocal
-from models import Message, Contact, MessageStatus, ScheduledReminder
+from database import SessionLocal, engine, async_engine, pool_report
+from models import Message, Contact, Campaign, MessageStatus, MessageType, ScheduledReminder
 from services.twilio_service import twilio_service
-from datetime import datetime
+from services.segment_service import segment_service
+from services.campaign_service import campaign_service
+from services.delivery_status import delivery_status
+from services.dead_letter_service import dead_letter_service
+from services.analytics_service import analytics_service
+from services.archive_service import archive_service
+from services.reminder_scheduler import next_run_for, as_utc
+from services.send_window import contact_timezone, window_opens_at, stagger
+from http_cache import REMINDERS, bump_version
+from outbox import enqueue_sends, publish_batch, publish_now
+from pool_metrics import publish_worker_report, POOL_REPORT_INTERVAL
+from partitions import ensure_partitions
+from datetime import datetime, timedelta, timezone
 import logging
+import os
+import socket
+import time
 
 logger = logging.getLogger(__name__)
 
+# Log a warning when a reminder fires this long after its scheduled time
+MISSED_RUN_THRESHOLD = timedelta(minutes=2)
+
 # Create Celery app
 celery_app = Celery(
     "church_tasks",
@@ -16,60 +36,220 @@ celery_app = Celery(
     backend=settings.REDIS_URL
 )
 
+# Queues, so a broadcast never sits in front of a one-off text. Workers
+# subscribe per queue (see docker-compose.yml); a worker consuming several
+# drains them in the order given to -Q.
+INTERACTIVE_QUEUE = "interactive"  # single sends from the dashboard
+BULK_QUEUE = "bulk"  # broadcast and reminder chunks
+VOICE_QUEUE = "voice"  # calls hold a worker slot while Twilio dials
+SCHEDULER_QUEUE = "scheduler"  # beat ticks
+
 celery_app.conf.update(
     task_serializer='json',
     accept_content=['json'],
     result_serializer='json',
-    timezone='America/Los_Angeles',
+    timezone=settings.CHURCH_TIMEZONE,
     enable_utc=True,
+    task_default_queue=BULK_QUEUE,
+    task_routes={
+        'send_sms_task': {'queue': INTERACTIVE_QUEUE, 'priority': 0},
+        'send_sms_batch_task': {'queue': BULK_QUEUE, 'priority': 5},
+        'make_call_task': {'queue': VOICE_QUEUE, 'priority': 3},
+        'process_scheduled_reminders': {'queue': SCHEDULER_QUEUE},
+        'release_scheduled_messages': {'queue': SCHEDULER_QUEUE},
+        'relay_outbox': {'queue': SCHEDULER_QUEUE},
+        'apply_sms_statuses': {'queue': SCHEDULER_QUEUE},
+        'rollup_analytics': {'queue': SCHEDULER_QUEUE},
+        'maintain_partitions': {'queue': SCHEDULER_QUEUE},
+        'archive_history': {'queue': SCHEDULER_QUEUE},
+    },
+    # Redis emulates priorities with sub-queues; 0 is served first
+    task_default_priority=5,
+    broker_transport_options={
+        'priority_steps': list(range(10)),
+        'sep': ':',
+        'queue_order_strategy': 'priority',
+    },
+    # Ack after the task finishes so a lost worker's tasks are redelivered;
+    # delivery skips messages that are no longer QUEUED
+    task_acks_late=True,
+    task_reject_on_worker_lost=True,
+    worker_prefetch_multiplier=settings.CELERY_PREFETCH_MULTIPLIER,
+    # Send and beat tasks record their outcome on Message rows, so nothing
+    # reads their results. A task that is polled opts in with
+    # ignore_result=False and its result expires after CELERY_RESULT_EXPIRES.
+    task_ignore_result=True,
+    result_expires=settings.CELERY_RESULT_EXPIRES,
 )
 
 
-@celery_app.task(name="send_sms_task")
-def send_sms_task(message_id: int):
-    """Send SMS message"""
-    db = SessionLocal()
+_last_pool_report = {"at": 0.0}
+
+
+@worker_process_init.connect
+def _reset_db_pools(**kwargs):
+    """Forked worker processes must not reuse connections opened by the parent"""
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
+
+@task_postrun.connect
+def _report_db_pool(**kwargs):
+    """Publish this process's pool usage for /health/db, at most every POOL_REPORT_INTERVAL"""
+    now = time.monotonic()
+    if now - _last_pool_report["at"] < POOL_REPORT_INTERVAL:
+        return
+    _last_pool_report["at"] = now
+    publish_worker_report(f"{socket.gethostname()}:{os.getpid()}", pool_report())
+
+
+def _set_status(db: Session, message: Message, status: MessageStatus):
+    """Change a message's status and move its campaign counter in the same transaction"""
+    campaign_service.record(db, message.campaign_id, message.status, status)
+    message.status = status
+
+
+def _deliver(db: Session, message_id: int, attempt: int = 1, final_attempt: bool = True) -> bool:
+    """Send one queued SMS or call and record the outcome on its Message row.
+    Returns True when a transient error left the message QUEUED for a retry;
+    on the final attempt it is marked FAILED and dead-lettered instead."""
+    message = None
+    result = None
     try:
-        message = db.query(Message).filter(Message.id == message_id).first()
-        if not message:
+        row = db.query(Message, Campaign.status).outerjoin(
+            Campaign, Campaign.id == Message.campaign_id
+        ).filter(Message.id == message_id).first()
+        if not row:
             logger.error(f"Message {message_id} not found")
-            return
+            return False
+        message, campaign_status = row
+        if message.status != MessageStatus.QUEUED:
+            # Cancelled, or already handled by a republished task
+            logger.info(f"Message {message_id} is {message.status.value}, skipping")
+            return False
+        if campaign_status == "cancelled":
+            # Queued before the campaign was cancelled
+            _set_status(db, message, MessageStatus.CANCELLED)
+            db.commit()
+            logger.info(f"Campaign {message.campaign_id} was cancelled, skipping message {message_id}")
+            return False
         
         contact = db.query(Contact).filter(Contact.id == message.contact_id).first()
         if not contact:
             logger.error(f"Contact {message.contact_id} not found")
-            message.status = MessageStatus.FAILED
+            _set_status(db, message, MessageStatus.FAILED)
             message.error_message = "Contact not found"
             db.commit()
-            return
+            return False
         
-        # Send SMS
-        result = twilio_service.send_sms(contact.phone, message.content)
+        # Send SMS or place the call
+        if message.message_type == MessageType.SMS:
+            result = twilio_service.send_sms(contact.phone, message.content)
+        else:
+            result = twilio_service.make_call(contact.phone, message.content)
         
+        # Re-read under lock: a cancel may have landed while we were sending
+        db.refresh(message, with_for_update=True)
+        retry = False
         if result["success"]:
-            message.status = MessageStatus.SENT
+            _set_status(db, message, MessageStatus.SENT)
             message.twilio_sid = result["sid"]
             message.sent_at = datetime.utcnow()
+        elif message.status != MessageStatus.QUEUED:
+            pass  # cancelled while we were sending; nothing went out
+        elif result.get("retryable"):
+            message.error_message = result.get("error", "Unknown error")
+            if final_attempt:
+                _set_status(db, message, MessageStatus.FAILED)
+                dead_letter_service.record(db, message, message.error_message, attempt)
+            else:
+                retry = True
         else:
-            message.status = MessageStatus.FAILED
+            _set_status(db, message, MessageStatus.FAILED)
             message.error_message = result.get("error", "Unknown error")
         
         db.commit()
-        logger.info(f"SMS sent to {contact.phone}: {result}")
+        logger.info(f"{message.message_type.value} sent to {contact.phone}: {result}")
+        return retry
         
     except Exception as e:
-        logger.error(f"Error sending SMS for message {message_id}: {str(e)}")
-        if message:
-            message.status = MessageStatus.FAILED
-            message.error_message = str(e)
+        logger.error(f"Error sending message {message_id}: {str(e)}")
+        db.rollback()
+        if not message:
+            return False
+        try:
+            if result and result["success"]:
+                # It went out; failing it here would let a requeue send it twice
+                _set_status(db, message, MessageStatus.SENT)
+                message.twilio_sid = result["sid"]
+                message.sent_at = datetime.utcnow()
+            else:
+                _set_status(db, message, MessageStatus.FAILED)
+                message.error_message = str(e)
+                dead_letter_service.record(db, message, message.error_message, attempt)
             db.commit()
+        except Exception as record_error:
+            db.rollback()
+            sid = result.get("sid") if result else None
+            logger.error(
+                f"Could not record the outcome of message {message_id} (sid {sid}); "
+                f"left unchanged for reconciliation: {str(record_error)}"
+            )
+        return False
+
+
+class TransientSendError(Exception):
+    """Messages hit retryable provider errors and are still QUEUED"""
+
+
+# Jittered exponential backoff for transient provider errors. Retries re-run
+# the task with its original arguments; messages that already went out are
+# no longer QUEUED and are skipped.
+SEND_RETRY_POLICY = dict(
+    bind=True,
+    autoretry_for=(TransientSendError,),
+    max_retries=settings.SEND_MAX_RETRIES,
+    retry_backoff=settings.SEND_RETRY_BACKOFF,
+    retry_backoff_max=settings.SEND_RETRY_BACKOFF_MAX,
+    retry_jitter=True,
+)
+
+
+def _deliver_all(task, message_ids: list):
+    """Deliver messages for a retrying task; raise to schedule a retry if any need one"""
+    attempt = task.request.retries + 1
+    final_attempt = task.request.retries >= task.max_retries
+    db = SessionLocal()
+    try:
+        pending = [
+            message_id for message_id in message_ids
+            if _deliver(db, message_id, attempt=attempt, final_attempt=final_attempt)
+        ]
     finally:
         db.close()
+    if pending:
+        raise TransientSendError(f"{len(pending)} messages will be retried (attempt {attempt})")
+
 
+@celery_app.task(name="send_sms_task", **SEND_RETRY_POLICY)
+def send_sms_task(self, message_id: int):
+    """Send SMS message"""
+    _deliver_all(self, [message_id])
 
-@celery_app.task(name="make_call_task")
-def make_call_task(contact_id: int, message: str = None):
-    """Make voice call"""
+
+@celery_app.task(name="send_sms_batch_task", **SEND_RETRY_POLICY)
+def send_sms_batch_task(self, message_ids: list):
+    """Send a chunk of fan-out messages with one task and one session"""
+    _deliver_all(self, message_ids)
+
+
+@celery_app.task(name="make_call_task", **SEND_RETRY_POLICY)
+def make_call_task(self, contact_id: int, message: str = None, message_id: int = None):
+    """Make voice call; with message_id the outcome is recorded on that Message"""
+    if message_id:
+        _deliver_all(self, [message_id])
+        return
+    
     db = SessionLocal()
     try:
         contact = db.query(Contact).filter(Contact.id == contact_id).first()
@@ -88,61 +268,176 @@ def make_call_task(contact_id: int, message: str = None):
         db.close()
 
 
+def _recipient_batches(recipients, batch_size: int):
+    """Yield recipient rows from `recipients` (a select ordered by its first,
+    id column) one keyset page at a time; no read transaction stays open
+    between pages."""
+    id_column = recipients.selected_columns[0]
+    read_db = SessionLocal()
+    last_id = None
+    try:
+        while True:
+            page = recipients if last_id is None else recipients.where(id_column > last_id)
+            rows = read_db.execute(page.limit(batch_size)).all()
+            read_db.commit()
+            if not rows:
+                return
+            yield rows
+            last_id = rows[-1][0]
+    finally:
+        read_db.close()
+
+
+def _fan_out(
+    recipients,
+    campaign_id: int,
+    message_type: MessageType,
+    content: str,
+    scheduled_at: datetime
+) -> int:
+    """Create and queue one campaign message per (contact id, timezone,
+    state_zip) row in `recipients`. Rows are streamed in pages; each batch of
+    Message rows is bulk-inserted with RETURNING and committed with its
+    campaign counters, so memory stays flat and a failed batch doesn't undo
+    the ones already queued. Recipients outside their local send window are
+    stored PENDING until it opens. Stops early if the campaign is cancelled."""
+    write_db = SessionLocal()
+    queued = 0
+    try:
+        batches = _recipient_batches(recipients, settings.FANOUT_BATCH_SIZE)
+        for batch_number, rows in enumerate(batches, start=1):
+            try:
+                # Bucket by timezone: one window computation per zone per batch
+                window_opens = {}
+                values = []
+                for contact_id, tz, state_zip in rows:
+                    tz_name = contact_timezone(tz, state_zip)
+                    if tz_name not in window_opens:
+                        window_opens[tz_name] = window_opens_at(tz_name, now=scheduled_at)
+                    opens = window_opens[tz_name]
+                    send_at = stagger(opens, contact_id) if opens else None
+                    values.append({
+                        "contact_id": contact_id,
+                        "campaign_id": campaign_id,
+                        "message_type": message_type,
+                        "content": content,
+                        "status": MessageStatus.PENDING if send_at else MessageStatus.QUEUED,
+                        "scheduled_at": send_at or scheduled_at,
+                    })
+                
+                inserted = write_db.execute(
+                    insert(Message).returning(
+                        Message.id, Message.contact_id, Message.message_type, Message.status,
+                        sort_by_parameter_order=True
+                    ),
+                    values
+                ).all()
+                if not campaign_service.add_messages(write_db, campaign_id, len(inserted)):
+                    write_db.rollback()
+                    logger.info(f"Campaign {campaign_id} was cancelled, stopping fan-out")
+                    return queued
+                # Queue the batch; held messages wait for release_scheduled_messages
+                events = enqueue_sends(write_db, [row for row in inserted if row.status == MessageStatus.QUEUED])
+                write_db.commit()
+                publish_now(write_db, celery_app, events)
+            except Exception as e:
+                write_db.rollback()
+                logger.error(f"Fan-out batch {batch_number} ({len(rows)} recipients) failed: {str(e)}")
+                continue
+            queued += len(inserted)
+        
+        campaign_service.finish_fanout(write_db, campaign_id)
+        write_db.commit()
+    except Exception as e:
+        # Reading recipients failed: nothing retries this run, so don't leave it running
+        write_db.rollback()
+        logger.error(f"Fan-out for campaign {campaign_id} stopped after {queued} messages: {str(e)}")
+        try:
+            campaign_service.fail_fanout(write_db, campaign_id)
+            write_db.commit()
+        except Exception as mark_error:
+            write_db.rollback()
+            logger.error(f"Could not mark campaign {campaign_id} failed: {str(mark_error)}")
+        raise
+    finally:
+        write_db.close()
+    return queued
+
+
+def _reminder_recipients(reminder: ScheduledReminder):
+    """Select of recipient (contact id, timezone, state_zip) rows, in id order"""
+    if reminder.send_to_all:
+        return select(Contact.id, Contact.timezone, Contact.state_zip).where(
+            Contact.active == True
+        ).order_by(Contact.id)
+    if reminder.segment_id:
+        return segment_service.recipient_rows(reminder.segment_id)
+    return None
+
+
 @celery_app.task(name="process_scheduled_reminders")
 def process_scheduled_reminders():
-    """Process scheduled reminders (runs periodically)"""
+    """Fire reminders whose next_run_at has passed (runs periodically).
+    Each due reminder is claimed with SELECT ... FOR UPDATE SKIP LOCKED, so
+    several beat or worker nodes can run the tick without double-sending.
+    A tick that runs late still fires everything that came due meanwhile."""
     db = SessionLocal()
+    fired = 0
+    failed_ids = []
     try:
-        now = datetime.utcnow()
-        current_time = now.strftime("%H:%M")
-        current_day = now.strftime("%A").lower()
-        
-        # Find active reminders that should be sent
-        reminders = db.query(ScheduledReminder).filter(
-            ScheduledReminder.active == True,
-            ScheduledReminder.schedule_time == current_time
-        ).all()
-        
-        for reminder in reminders:
-            # Check if it's the right day for weekly reminders
-            if reminder.schedule_type == "weekly":
-                if reminder.schedule_day.lower() != current_day:
-                    continue
-            
-            # Check if it's the right date for one-time reminders
-            elif reminder.schedule_type == "once":
-                if not reminder.schedule_date or reminder.schedule_date.date() != now.date():
-                    continue
-                # Deactivate after sending
-                reminder.active = False
+        while True:
+            now = datetime.now(timezone.utc)
+            query = db.query(ScheduledReminder).filter(
+                ScheduledReminder.active == True,
+                ScheduledReminder.next_run_at <= now
+            )
+            if failed_ids:
+                query = query.filter(ScheduledReminder.id.notin_(failed_ids))
+            reminder = query.order_by(ScheduledReminder.next_run_at).with_for_update(skip_locked=True).first()
+            if not reminder:
+                break
+            reminder_id = reminder.id
             
-            # Get contacts to send to
-            if reminder.send_to_all:
-                contacts = db.query(Contact).filter(Contact.active == True).all()
-            else:
-                # TODO: Add contact selection for specific groups
-                contacts = []
-            
-            # Create and queue messages
-            for contact in contacts:
-                message = Message(
-                    contact_id=contact.id,
-                    message_type=reminder.message_type,
-                    content=reminder.message_content,
-                    status=MessageStatus.QUEUED,
-                    scheduled_at=now
-                )
-                db.add(message)
-                db.flush()
+            try:
+                lateness = now - as_utc(reminder.next_run_at)
+                if lateness > MISSED_RUN_THRESHOLD:
+                    logger.warning(f"Catching up reminder {reminder_id}, {lateness} late")
                 
-                # Queue the message
-                if reminder.message_type.value == "sms":
-                    send_sms_task.delay(message.id)
-                else:
-                    make_call_task.delay(contact.id, reminder.message_content)
+                # Advance before fanning out: a crash mid fan-out skips the
+                # rest of this run rather than re-sending it on the next tick
+                reminder.last_run_at = now
+                reminder.next_run_at = next_run_for(reminder, after=now)
+                if reminder.next_run_at is None:
+                    reminder.active = False
+                bump_version(db, REMINDERS)
+                recipients = _reminder_recipients(reminder)
+                message_type, content = reminder.message_type, reminder.message_content
+                next_run_at = reminder.next_run_at
+                campaign_id = None
+                if recipients is not None:
+                    campaign_id = campaign_service.create(
+                        db, reminder.name, message_type, content,
+                        reminder_id=reminder.id, segment_id=reminder.segment_id
+                    ).id
+                db.commit()
+            except Exception as e:
+                db.rollback()
+                failed_ids.append(reminder_id)
+                logger.error(f"Error processing reminder {reminder_id}: {str(e)}")
+                continue
+            
+            fired += 1
+            if recipients is None:
+                logger.warning(f"Reminder {reminder_id} has no recipients configured")
+                continue
+            try:
+                queued = _fan_out(recipients, campaign_id, message_type, content, now)
+                logger.info(f"Reminder {reminder_id} queued for {queued} contacts, next run {next_run_at}")
+            except Exception as e:
+                logger.error(f"Fan-out for reminder {reminder_id} failed: {str(e)}")
         
-        db.commit()
-        logger.info(f"Processed scheduled reminders at {current_time}")
+        if fired or failed_ids:
+            logger.info(f"Processed {fired} scheduled reminders, {len(failed_ids)} failed")
         
     except Exception as e:
         logger.error(f"Error processing scheduled reminders: {str(e)}")
@@ -150,10 +445,136 @@ def process_scheduled_reminders():
         db.close()
 
 
+@celery_app.task(name="release_scheduled_messages")
+def release_scheduled_messages():
+    """Queue pending messages whose scheduled_at has passed (runs periodically).
+    Future-dated messages sit in the (status, scheduled_at) index and cost
+    nothing until due. At most SCHEDULED_RELEASE_BATCH are released per tick,
+    claimed with FOR UPDATE SKIP LOCKED so several nodes can run the tick."""
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        due = db.query(Message.id, Message.contact_id, Message.message_type).filter(
+            Message.status == MessageStatus.PENDING,
+            Message.scheduled_at <= now
+        ).order_by(Message.scheduled_at).limit(
+            settings.SCHEDULED_RELEASE_BATCH
+        ).with_for_update(skip_locked=True).all()
+        if not due:
+            return
+        
+        db.query(Message).filter(Message.id.in_([row.id for row in due])).update(
+            {Message.status: MessageStatus.QUEUED}, synchronize_session=False
+        )
+        events = enqueue_sends(db, due)
+        db.commit()
+        publish_now(db, celery_app, events)
+        
+        logger.info(f"Released {len(due)} scheduled messages")
+        
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error releasing scheduled messages: {str(e)}")
+    finally:
+        db.close()
+
+
+@celery_app.task(name="relay_outbox")
+def relay_outbox():
+    """Publish outbox events (runs periodically). A backstop for the
+    outbox_relay.py process, which publishes with sub-second latency."""
+    db = SessionLocal()
+    try:
+        published = 0
+        while True:
+            count = publish_batch(db, celery_app, settings.OUTBOX_RELAY_BATCH)
+            published += count
+            if count < settings.OUTBOX_RELAY_BATCH:
+                break
+        if published:
+            logger.info(f"Relayed {published} outbox events")
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error relaying outbox: {str(e)}")
+    finally:
+        db.close()
+
+
+@celery_app.task(name="apply_sms_statuses")
+def apply_sms_statuses():
+    """Apply buffered SMS status callbacks in bulk (runs periodically)"""
+    db = SessionLocal()
+    try:
+        delivery_status.flush(db)
+    except Exception as e:
+        logger.error(f"Error applying SMS statuses: {str(e)}")
+    finally:
+        db.close()
+
+
+@celery_app.task(name="rollup_analytics")
+def rollup_analytics():
+    """Bring the hourly and daily analytics rollups up to date (runs periodically)"""
+    db = SessionLocal()
+    try:
+        analytics_service.rollup(db)
+        db.commit()
+    except Exception as e:
+        db.rollback()
+        logger.error(f"Error rolling up analytics: {str(e)}")
+    finally:
+        db.close()
+
+
+@celery_app.task(name="maintain_partitions")
+def maintain_partitions():
+    """Create the coming months' history partitions (runs daily; PostgreSQL only)"""
+    try:
+        with engine.begin() as conn:
+            ensure_partitions(conn)
+    except Exception as e:
+        logger.error(f"Error creating history partitions: {str(e)}")
+
+
+@celery_app.task(name="archive_history")
+def archive_history():
+    """Move history older than ARCHIVE_AFTER_MONTHS to archive files (runs periodically)"""
+    try:
+        archived = archive_service.archive()
+        if any(archived.values()):
+            logger.info(f"Archived history rows: {archived}")
+    except Exception as e:
+        logger.error(f"Error archiving history: {str(e)}")
+
+
 # Configure periodic tasks
 celery_app.conf.beat_schedule = {
     'process-reminders-every-minute': {
         'task': 'process_scheduled_reminders',
         'schedule': 60.0,  # Run every minute
     },
+    'release-scheduled-messages': {
+        'task': 'release_scheduled_messages',
+        'schedule': settings.SCHEDULED_RELEASE_INTERVAL,
+    },
+    'relay-outbox': {
+        'task': 'relay_outbox',
+        'schedule': settings.OUTBOX_SWEEP_INTERVAL,
+    },
+    'apply-sms-statuses': {
+        'task': 'apply_sms_statuses',
+        'schedule': settings.STATUS_FLUSH_INTERVAL,
+    },
+    'rollup-analytics': {
+        'task': 'rollup_analytics',
+        'schedule': settings.ANALYTICS_ROLLUP_INTERVAL,
+    },
+    'maintain-partitions': {
+        'task': 'maintain_partitions',
+        'schedule': 86400.0,  # Daily; PARTITION_MONTHS_AHEAD leaves months of slack
+    },
+    'archive-history': {
+        'task': 'archive_history',
+        'schedule': settings.ARCHIVE_INTERVAL,
+    },
 }
@@ -0,0 +1,34 @@
+"""
+Shared fixtures. Tests run against a throwaway SQLite database with Twilio,
+Redis and the Celery broker mocked out; settings come from the environment
+set here before any backend module is imported.
+"""
+import os
+import sys
+import tempfile
+
+_db_dir = tempfile.mkdtemp(prefix="church-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_db_dir, 'test.db')}")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/15")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("OPENAI_API_KEY", "test")
+os.environ.setdefault("TWILIO_ACCOUNT_SID", "ACtest")
+os.environ.setdefault("TWILIO_AUTH_TOKEN", "test")
+os.environ.setdefault("TWILIO_PHONE_NUMBER", "+15550000000")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+from database import engine, Base, SessionLocal
+import models  # noqa: F401  registers the tables
+
+
+@pytest.fixture
+def db():
+    Base.metadata.create_all(engine)
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(engine)
@@ -0,0 +1,55 @@
+"""
+Contact phone uniqueness through the API: numbers are unique among active
+contacts, and unique-index violations map to 409 (number taken) or 400
+(any other field).
+"""
+from unittest import mock
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(db):
+    return TestClient(main.app)
+
+
+def test_deleted_contact_frees_its_number(client):
+    created = client.post("/api/contacts", json={"name": "A", "phone": "909-763-0454"}).json()
+    assert client.delete(f"/api/contacts/{created['id']}").status_code == 200
+
+    recreated = client.post("/api/contacts", json={"name": "B", "phone": "9097630454"})
+
+    assert recreated.status_code == 200
+    # Reactivating the old contact would give the number two owners
+    assert client.put(f"/api/contacts/{created['id']}", json={"active": True}).status_code == 409
+
+
+def test_concurrent_create_with_same_number_is_409(client):
+    client.post("/api/contacts", json={"name": "A", "phone": "9097630454"})
+
+    # As if another request passed the check first
+    with mock.patch.object(main, "ensure_phone_available"):
+        response = client.post("/api/contacts", json={"name": "B", "phone": "+1 909 763 0454"})
+
+    assert response.status_code == 409
+
+
+def test_duplicate_serial_number_is_400_naming_the_field(client):
+    client.post("/api/contacts", json={"name": "A", "phone": "9097630454", "sl_no": "1"})
+
+    response = client.post("/api/contacts", json={"name": "B", "phone": "9097630455", "sl_no": "1"})
+
+    assert response.status_code == 400
+    assert "sl_no" in response.json()["detail"]
+
+
+def test_import_with_duplicate_serial_numbers_is_400(client):
+    csv = "Sl.No,Name,Phone_E164\n7,C,+19097630456\n7,D,+19097630457\n"
+
+    response = client.post("/api/contacts/import", files={"file": ("contacts.csv", csv, "text/csv")})
+
+    assert response.status_code == 400
+    assert "sl_no" in response.json()["detail"]
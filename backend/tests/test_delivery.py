@@ -0,0 +1,132 @@
+"""
+Send retries and dead letters: tasks.send_sms_task under SEND_RETRY_POLICY,
+with Twilio mocked. Tasks run eagerly through `apply`, which re-runs a
+retried task in place, so a whole retry sequence happens inside one call.
+"""
+from unittest import mock
+
+import pytest
+from sqlalchemy.orm import Session
+from twilio.base.exceptions import TwilioRestException
+
+import tasks
+from models import Contact, DeadLetter, Message, MessageStatus, MessageType, OutboxEvent
+from services.dead_letter_service import dead_letter_service
+from services.twilio_service import twilio_service
+
+
+def twilio_error(status: int) -> TwilioRestException:
+    return TwilioRestException(status, "https://api.twilio.com/Messages.json", msg=f"HTTP {status}")
+
+
+def accepted(sid: str = "SM123"):
+    return mock.Mock(sid=sid, status="queued")
+
+
+@pytest.fixture
+def message(db):
+    contact = Contact(name="Member", phone="9097630454")
+    db.add(contact)
+    db.flush()
+    message = Message(
+        contact_id=contact.id,
+        message_type=MessageType.SMS,
+        content="Service moved to 11am",
+        status=MessageStatus.QUEUED
+    )
+    db.add(message)
+    db.commit()
+    return message
+
+
+@pytest.fixture
+def provider():
+    with mock.patch.object(twilio_service.client.messages, "create") as create:
+        yield create
+
+
+def send(message_id: int):
+    return tasks.send_sms_task.apply(args=[message_id])
+
+
+def reload(db, message: Message) -> Message:
+    db.expire_all()
+    return db.get(Message, message.id)
+
+
+def test_rate_limited_send_is_retried_until_it_goes_out(db, message, provider):
+    provider.side_effect = [twilio_error(429), accepted("SM429")]
+
+    send(message.id)
+
+    sent = reload(db, message)
+    assert provider.call_count == 2
+    assert sent.status == MessageStatus.SENT
+    assert sent.twilio_sid == "SM429"
+    assert db.query(DeadLetter).count() == 0
+
+
+def test_permanent_error_fails_without_retry(db, message, provider):
+    provider.side_effect = twilio_error(400)
+
+    send(message.id)
+
+    failed = reload(db, message)
+    assert provider.call_count == 1
+    assert failed.status == MessageStatus.FAILED
+    assert "HTTP 400" in failed.error_message
+
+
+def test_exhausted_retries_dead_letter_the_message(db, message, provider):
+    provider.side_effect = twilio_error(503)
+
+    send(message.id)
+
+    attempts = tasks.send_sms_task.max_retries + 1
+    failed = reload(db, message)
+    assert provider.call_count == attempts
+    assert failed.status == MessageStatus.FAILED
+    dead_letter = db.query(DeadLetter).filter(DeadLetter.message_id == message.id).one()
+    assert dead_letter.attempts == attempts
+
+
+def test_error_after_provider_accepted_records_sent(db, message, provider):
+    provider.return_value = accepted("SMOK")
+    refresh = Session.refresh
+
+    def fail_locked_refresh(session, instance, *args, **kwargs):
+        if kwargs.get("with_for_update"):
+            raise RuntimeError("connection reset")
+        return refresh(session, instance, *args, **kwargs)
+
+    with mock.patch.object(Session, "refresh", fail_locked_refresh):
+        send(message.id)
+
+    sent = reload(db, message)
+    assert provider.call_count == 1
+    assert sent.status == MessageStatus.SENT
+    assert sent.twilio_sid == "SMOK"
+    assert db.query(DeadLetter).count() == 0
+
+
+def test_requeue_puts_dead_letters_back_in_the_outbox(db, message, provider):
+    provider.side_effect = twilio_error(503)
+    send(message.id)
+    assert db.query(DeadLetter).count() == 1
+
+    requeued = dead_letter_service.requeue(db)
+    db.commit()
+
+    assert requeued == 1
+    assert reload(db, message).status == MessageStatus.QUEUED
+    assert reload(db, message).error_message is None
+    assert db.query(DeadLetter).count() == 0
+    events = db.query(OutboxEvent).all()
+    assert [(event.task_name, event.args) for event in events] == [("send_sms_batch_task", [[message.id]])]
+
+    # The requeued send goes out once and isn't dead-lettered again
+    provider.side_effect = None
+    provider.return_value = accepted("SMAGAIN")
+    send(message.id)
+    assert reload(db, message).status == MessageStatus.SENT
+    assert db.query(DeadLetter).count() == 0
@@ -0,0 +1,194 @@
+"""
+Monthly partitioning, archival and restore against a real PostgreSQL (14+).
+Skipped on other databases; run with
+
+    DATABASE_URL=postgresql://postgres@localhost/church_test python -m pytest -q tests/test_partitioning_postgres.py
+
+The database's public schema is dropped and recreated, so point it at a
+scratch database. Starting from plain tables with rows in several months,
+it runs migrate_partitioning.py, archives months before the horizon and
+restores the files.
+"""
+import os
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from config import settings
+from database import engine, Base, SessionLocal
+from models import (
+    CallLog, Contact, Conversation, ConversationHistory, DeadLetter, Message, MessageStatus, MessageType
+)
+from partitions import add_months, month_start, partition_name, is_partitioned
+from services.archive_service import archive_service
+import migrate_partitioning
+import migrate_statistics_counters
+import restore_archive
+
+pytestmark = pytest.mark.skipif(engine.dialect.name != "postgresql", reason="needs PostgreSQL")
+
+TABLES = ("messages", "conversations", "conversation_history")
+
+
+def _reset_schema():
+    engine.dispose()
+    with engine.begin() as conn:
+        # Sessions a failed assertion left open would block the DROP
+        conn.execute(text(
+            "SELECT pg_terminate_backend(pid) FROM pg_stat_activity "
+            "WHERE datname = current_database() AND pid <> pg_backend_pid()"
+        ))
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+
+
+@pytest.fixture
+def history(tmp_path, monkeypatch):
+    """Plain tables holding messages, conversations and call turns in four
+    months: oldest (sent), one with a message still pending, one with a
+    dead-lettered message, and the current month"""
+    _reset_schema()
+    Base.metadata.create_all(engine)
+    migrate_statistics_counters.migrate()
+    monkeypatch.setattr(settings, "ARCHIVE_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "ARCHIVE_AFTER_MONTHS", 6)
+
+    current = month_start(datetime.now(timezone.utc))
+    months = {
+        "sent": add_months(current, -9),
+        "unsent": add_months(current, -8),
+        "dead": add_months(current, -7),
+        "current": current,
+    }
+    db = SessionLocal()
+    contact = Contact(name="Member", phone="9097630454")
+    db.add(contact)
+    db.flush()
+    call = CallLog(contact_id=contact.id, caller_phone="+19097630454", direction="inbound", twilio_call_sid="CA1")
+    db.add(call)
+    db.flush()
+    for label, month in months.items():
+        for day in (1, 15):
+            moment = month + timedelta(days=day - 1, hours=12)
+            status = MessageStatus.PENDING if label == "unsent" and day == 15 else MessageStatus.SENT
+            message = Message(
+                contact_id=contact.id, message_type=MessageType.SMS, content=f"{label} {day}",
+                status=status, created_at=moment, sent_at=moment
+            )
+            db.add(message)
+            db.flush()
+            if label == "dead" and day == 1:
+                message.status = MessageStatus.FAILED
+                db.add(DeadLetter(message_id=message.id, error="HTTP 400", attempts=1))
+            db.add(Conversation(contact_id=contact.id, direction="inbound", message=f"{label} {day}", timestamp=moment))
+            db.add(ConversationHistory(call_log_id=call.id, role="user", content=f"{label} {day}", timestamp=moment))
+    db.commit()
+    db.close()
+    yield months
+    _reset_schema()
+
+
+def _scalar(sql: str, **params):
+    with engine.connect() as conn:
+        return conn.execute(text(sql), params).scalar()
+
+
+def _counts():
+    return {table: _scalar(f"SELECT count(*) FROM {table}") for table in TABLES}
+
+
+def _sent_counter():
+    return _scalar("SELECT value FROM statistics_counters WHERE name = 'total_messages_sent'")
+
+
+def _exists(name: str) -> bool:
+    return _scalar("SELECT to_regclass(:name) IS NOT NULL", name=name)
+
+
+def test_migrate_archive_restore_round_trip(history):
+    before = _counts()
+    assert before == {"messages": 8, "conversations": 8, "conversation_history": 8}
+    sent_before = _sent_counter()
+    assert sent_before == 6
+
+    # Parent swap with existing rows
+    migrate_partitioning.migrate()
+    migrate_partitioning.migrate()  # second run is a no-op
+    with engine.connect() as conn:
+        assert all(is_partitioned(conn, table) for table in TABLES)
+    assert _counts() == before
+    for month in history.values():
+        assert all(_exists(partition_name(table, month)) for table in TABLES)
+    assert _scalar("SELECT count(*) FROM ONLY messages_default") == 0
+
+    # Keys, indexes and foreign keys recreated on the new parents
+    primary_key = _scalar(
+        "SELECT pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = 'messages'::regclass AND contype = 'p'"
+    )
+    assert primary_key == "PRIMARY KEY (id, created_at)"
+    foreign_keys = {
+        table: _scalar(
+            "SELECT string_agg(confrelid::regclass::text, ',' ORDER BY 1) FROM pg_constraint "
+            "WHERE conrelid = to_regclass(:table) AND contype = 'f'", table=table
+        )
+        for table in TABLES + ("dead_letters",)
+    }
+    assert foreign_keys == {
+        "messages": "campaigns,contacts",
+        "conversations": "contacts",
+        "conversation_history": "call_logs",
+        "dead_letters": None,
+    }
+    for model in (Message, Conversation, ConversationHistory):
+        for index in model.__table__.indexes:
+            assert _exists(index.name), index.name
+
+    # Ids keep counting from the old sequence; statistics triggers moved over
+    db = SessionLocal()
+    db.add(Message(contact_id=1, message_type=MessageType.SMS, content="after", status=MessageStatus.SENT))
+    db.commit()
+    assert _scalar("SELECT max(id) FROM messages") == 9
+    assert _sent_counter() == sent_before + 1
+    db.close()
+
+    # Conversation turns take the concurrent detach: no default partition
+    with engine.begin() as conn:
+        conn.execute(text("DROP TABLE conversation_history_default"))
+
+    archived = archive_service.archive()
+
+    assert archived == {"messages": 4, "conversations": 6, "conversation_history": 6}
+    for label in ("sent", "dead"):
+        assert not any(_exists(partition_name(table, history[label])) for table in TABLES)
+    # The month with a pending message stays; its conversations still go
+    assert _exists(partition_name("messages", history["unsent"]))
+    assert not _exists(partition_name("conversations", history["unsent"]))
+    assert _scalar("SELECT count(*) FROM messages WHERE status = 'PENDING'") == 1
+    assert _scalar("SELECT count(*) FROM dead_letters") == 0
+    assert _counts() == {"messages": 5, "conversations": 2, "conversation_history": 2}
+    # 3 of the 4 archived messages were sent
+    assert _sent_counter() == sent_before + 1 - 3
+    files = sorted(os.listdir(os.path.join(settings.ARCHIVE_DIR, "messages")))
+    assert len(files) == 2
+    assert archive_service.archive() == {"messages": 0, "conversations": 0, "conversation_history": 0}
+
+    # Restore round-trips the NDJSON, recreating the dropped partitions
+    restored = sum(
+        archive_service.restore(path)
+        for path in restore_archive.archive_files([settings.ARCHIVE_DIR])
+    )
+    assert restored == 16
+    assert _counts() == {"messages": 9, "conversations": 8, "conversation_history": 8}
+    assert _exists(partition_name("messages", history["sent"]))
+    assert _sent_counter() == sent_before + 1
+    db = SessionLocal()
+    dead = db.query(Message).filter(Message.content == "dead 1").one()
+    db.close()
+    assert dead.status == MessageStatus.FAILED
+    assert dead.created_at.replace(tzinfo=None) == (history["dead"] + timedelta(hours=12)).replace(tzinfo=None)
+    # Restoring again skips rows already present
+    assert sum(
+        archive_service.restore(path)
+        for path in restore_archive.archive_files([settings.ARCHIVE_DIR])
+    ) == 0
@@ -156,4 +156,6 @@ echo "⚠️  Important:"
 echo "- Store your admin password securely"
 echo "- Monitor your Railway usage (free tier: \$5/month)"
 echo "- Set up a custom domain if desired"
+echo "- Sends need Redis plus worker, beat and outbox relay services: add"
+echo "  services from this backend with SERVICE_ROLE=worker, beat and outbox_relay"
 echo ""
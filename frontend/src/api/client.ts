@@ -25,6 +25,24 @@ export const pythonAPI = axios.create({
   },
 });
 
+// After a write the backend returns X-Read-Primary-Until; echoing it keeps our
+// reads off a lagging read replica until our own changes have replicated
+const READ_PRIMARY_HEADER = 'X-Read-Primary-Until';
+let readPrimaryUntil: string | null = null;
+
+pythonAPI.interceptors.response.use((response) => {
+  const until = response.headers[READ_PRIMARY_HEADER.toLowerCase()];
+  if (until) readPrimaryUntil = until;
+  return response;
+});
+
+pythonAPI.interceptors.request.use((config) => {
+  if (readPrimaryUntil && Number(readPrimaryUntil) * 1000 > Date.now()) {
+    config.headers[READ_PRIMARY_HEADER] = readPrimaryUntil;
+  }
+  return config;
+});
+
 export interface Contact {
   id: number;
   sl_no?: string;